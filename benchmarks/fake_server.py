@@ -0,0 +1,189 @@
+"""Lokalny serwer udający Everhour API i dashboard - do testów wydajności"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ID_SEGMENT = re.compile(r"/[^/]*\d[^/]*")
+
+
+class FakeState:
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after="0", put_supported=True, etags=True, seed=1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.put_supported = put_supported
+        self.etags = etags
+        self.not_modified = 0
+        self.random = random.Random(seed)
+        self.records = {}
+        self.employees = []
+        self.next_id = 1
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def seed_team(self, users, records_per_user, dates):
+        """Tworzy zespół i rekordy czasu (records_per_user na każdy dzień)"""
+        for user_id in range(1, users + 1):
+            self.employees.append({"id": user_id, "name": f"User {user_id}", "multiplier": 1.5, "active": True})
+            for date in dates:
+                for i in range(records_per_user):
+                    self.add_record({
+                        "time": 900 * (i + 1),
+                        "date": str(date),
+                        "user": user_id,
+                        "task": {"id": f"ev:{user_id}{i:03d}", "name": f"Task {i}", "projects": ["ev:100"]},
+                        "comment": "benchmark"
+                    })
+
+    def add_record(self, record):
+        with self.lock:
+            now = time.strftime("%Y-%m-%d %H:%M:%S")
+            record = dict(record, id=self.next_id, createdAt=now, updatedAt=now)
+            self.records[self.next_id] = record
+            self.next_id += 1
+            return record
+
+    def count(self, key):
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def total_requests(self):
+        with self.lock:
+            return sum(self.requests.values())
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_records(self, records):
+        """Wysyła rekordy czasu z ETag (jeśli włączone) - 304, gdy klient ma aktualną wersję"""
+        if not self.state.etags:
+            return self._send(200, records)
+        etag = '"' + hashlib.sha1(json.dumps(records, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.state.lock:
+                self.state.not_modified += 1
+            return self._send(304, None, {"ETag": etag})
+        return self._send(200, records, {"ETag": etag})
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _handle(self, method):
+        state = self.state
+        parts = urlsplit(self.path)
+        path = parts.path
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        body = self._body() if method in ("POST", "PUT") else None
+        state.count(f"{method} {ID_SEGMENT.sub('/{id}', path)}")
+
+        if state.latency:
+            time.sleep(state.latency)
+        if not path.startswith("/api/"):
+            if state.rate_limit_rate and state.random.random() < state.rate_limit_rate:
+                return self._send(429, {"message": "Too Many Requests"}, {"Retry-After": state.retry_after})
+            if state.error_rate and method != "POST" and state.random.random() < state.error_rate:
+                return self._send(503, {"message": "Service Unavailable"})
+
+        if method == "GET" and path == "/team/time":
+            return self._send_records(self._team_time(query))
+        match = re.fullmatch(r"/users/([^/]+)/time", path)
+        if method == "GET" and match:
+            records = [r for r in self._team_time(dict(query, limit="1000000", page="1")) if str(r["user"]) == match.group(1)]
+            return self._send_records(records)
+        match = re.fullmatch(r"/time/(\d+)", path)
+        if match and method == "PUT":
+            if not state.put_supported:
+                return self._send(405, {"message": "Method Not Allowed"})
+            with state.lock:
+                record = state.records.get(int(match.group(1)))
+                if record is None:
+                    return self._send(404, {"message": "Not Found"})
+                record["time"] = body["time"]
+                record["updatedAt"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            return self._send(200, record)
+        if match and method == "DELETE":
+            with state.lock:
+                removed = state.records.pop(int(match.group(1)), None)
+            return self._send(200 if removed else 404, {})
+        match = re.fullmatch(r"/tasks/([^/]+)/time", path)
+        if match and method == "POST":
+            record = state.add_record({
+                "time": body["time"],
+                "date": body["date"],
+                "user": body["user"],
+                "task": {"id": match.group(1)},
+                "comment": body.get("comment")
+            })
+            return self._send(201, record)
+
+        if method == "GET" and path == "/projects":
+            return self._send(200, [{"id": "ev:100", "name": "Benchmark"}])
+        match = re.fullmatch(r"/projects/([^/]+)/tasks", path)
+        if method == "GET" and match:
+            with state.lock:
+                tasks = {r["task"]["id"]: r["task"] for r in state.records.values() if match.group(1) in r["task"].get("projects", [])}
+            return self._send(200, [dict(task, name=task.get("name", task["id"])) for task in tasks.values()])
+
+        if method == "GET" and path == "/api/config":
+            return self._send(200, {"dry_run": False}, {"ETag": '"config-1"'})
+        if method == "GET" and path == "/api/employees":
+            etag = f'"employees-{len(state.employees)}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304)
+            return self._send(200, state.employees, {"ETag": etag})
+        if method == "POST" and path.startswith("/api/"):
+            return self._send(200, {"ok": True})
+        return self._send(404, {"message": "Not Found"})
+
+    def _team_time(self, query):
+        date_from = query.get("from", "")
+        date_to = query.get("to", "")
+        limit = int(query.get("limit", "1000"))
+        page = int(query.get("page", "1"))
+        with self.state.lock:
+            records = [r for r in self.state.records.values() if date_from <= r["date"] <= date_to]
+        return records[(page - 1) * limit:page * limit]
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def start_fake_server(state, host="127.0.0.1", port=0):
+    """Uruchamia serwer w wątku w tle - zwraca (serwer, bazowy URL)"""
+    handler = type("BoundFakeHandler", (FakeHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-everhour", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,132 @@
+"""Testy wydajności run_daily_update na lokalnym serwerze udającym Everhour i dashboard.
+
+Użycie:
+    python benchmarks/run_benchmarks.py                  # wszystkie scenariusze
+    python benchmarks/run_benchmarks.py --scenario large --json wyniki.json
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from fake_server import FakeState, start_fake_server
+
+# (użytkownicy, rekordy na użytkownika, opóźnienie [s], błędy 503, odpowiedzi 429, wątki, strategia aktualizacji)
+SCENARIOS = {
+    "small": dict(users=20, records=5, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, workers=1, strategy="auto"),
+    "medium": dict(users=100, records=10, latency=0.002, error_rate=0.0, rate_limit_rate=0.0, workers=8, strategy="auto"),
+    "large": dict(users=300, records=10, latency=0.002, error_rate=0.0, rate_limit_rate=0.0, workers=16, strategy="auto"),
+    "replace": dict(users=100, records=10, latency=0.002, error_rate=0.0, rate_limit_rate=0.0, workers=8, strategy="replace"),
+    "flaky": dict(users=100, records=10, latency=0.002, error_rate=0.02, rate_limit_rate=0.02, workers=8, strategy="auto"),
+}
+
+PROCESS_DATE = date(2024, 1, 15)
+
+
+def prepare_environment(base_url, work_dir):
+    """Ustawia zmienne środowiskowe przed importem main (konfiguracja jest czytana przy imporcie)"""
+    os.environ.update({
+        "EVERHOUR_API_KEY": "benchmark",
+        "EVERHOUR_BASE_URL": base_url,
+        "DASHBOARD_API_URL": base_url,
+        "DASHBOARD_TOKEN": "benchmark",
+        "EVERHOUR_RATE_LIMIT": os.environ.get("EVERHOUR_RATE_LIMIT", "0"),
+        "HTTP_BACKOFF_BASE": "0.01",
+        "HTTP_POOL_SIZE": "32",
+        "PROCESSED_RETENTION_DAYS": "0",
+        "DASHBOARD_SPOOL_FILE": os.path.join(work_dir, "dashboard_spool.ndjson"),
+        "DASHBOARD_CACHE_FILE": os.path.join(work_dir, "dashboard_cache.json"),
+        "DASHBOARD_CACHE_TTL": "0",
+        "METADATA_CACHE_FILE": os.path.join(work_dir, "metadata_cache.json"),
+        # Każdy scenariusz ma mierzyć pobieranie z serwera, a nie z cache poprzedniego
+        "RESPONSE_CACHE_TTL": "0",
+        "PLANS_DIR": os.path.join(work_dir, "plans"),
+        "REPORTS_DIR": "",
+    })
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+def run_scenario(main, state, name, config, work_dir):
+    scenario_dir = os.path.join(work_dir, name)
+    os.makedirs(scenario_dir)
+    main.PROCESSED_DB = os.path.join(scenario_dir, "processed_records.db")
+    main.BACKUP_DIR = os.path.join(scenario_dir, "backups")
+    main.MAX_WORKERS = config["workers"]
+    main.UPDATE_STRATEGY = config["strategy"]
+
+    state.seed_team(config["users"], config["records"], [PROCESS_DATE])
+    state.latency = config["latency"]
+    state.error_rate = config["error_rate"]
+    state.rate_limit_rate = config["rate_limit_rate"]
+    requests_before = state.total_requests()
+
+    multiplier = main.EverhourTimeMultiplier(main.EVERHOUR_API_KEY)
+    tracemalloc.start()
+    started = time.perf_counter()
+    multiplier.run_daily_update(PROCESS_DATE)
+    reporter = main.get_dashboard_reporter()
+    if reporter:
+        reporter.flush(wait=True, timeout=60)
+    wall_time = time.perf_counter() - started
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    updated = multiplier.processed_store.count()
+    multiplier.close()
+    total_requests = state.total_requests() - requests_before
+    return {
+        "scenario": name,
+        "users": config["users"],
+        "records": config["users"] * config["records"],
+        "updated": updated,
+        "wall_time_seconds": round(wall_time, 3),
+        "records_per_second": round(updated / wall_time, 1) if wall_time else 0,
+        "requests": total_requests,
+        "requests_per_record": round(total_requests / updated, 3) if updated else None,
+        "peak_python_memory_mb": round(peak_memory / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Testy wydajności Everhour Time Multiplier")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append", help="scenariusz (domyślnie wszystkie)")
+    parser.add_argument("--json", help="zapisz wyniki do pliku JSON")
+    parser.add_argument("--verbose", action="store_true", help="pokaż logi aplikacji")
+    args = parser.parse_args()
+
+    state = FakeState()
+    server, base_url = start_fake_server(state)
+    work_dir = tempfile.mkdtemp(prefix="everhour-bench-")
+    prepare_environment(base_url, work_dir)
+
+    import main as app
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        # Każdy scenariusz działa na osobnym zestawie danych
+        state.records.clear()
+        state.employees.clear()
+        result = run_scenario(app, state, name, SCENARIOS[name], work_dir)
+        results.append(result)
+        print(
+            f"{result['scenario']:<8} użytkownicy={result['users']:<4} rekordy={result['records']:<5} "
+            f"czas={result['wall_time_seconds']:>7.2f}s  rekordy/s={result['records_per_second']:>7.1f}  "
+            f"zapytania/rekord={result['requests_per_record']}  pamięć={result['peak_python_memory_mb']}MB"
+        )
+
+    print(f"Maksymalne RSS procesu: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
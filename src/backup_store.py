@@ -0,0 +1,222 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+
+
+def record_hash(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class BackupStore:
+    """Backupy rekordów: jeden plik NDJSON.gz na uruchomienie, indeks (użytkownik, data) -> segment w SQLite.
+
+    Każdy (użytkownik, dzień) zapisywany jest jako osobny człon gzip, więc można go odczytać
+    bez rozpakowywania całego pliku. Rekordy, które nie zmieniły się od poprzedniego backupu,
+    nie są zapisywane ponownie - segment przechowuje tylko listę ich ID.
+
+    Katalog może być wspólny dla kilku replik: nazwa pliku uruchomienia zawiera identyfikator
+    repliki i PID, więc do jednego pliku dopisuje zawsze tylko jeden proces (pod self.lock)
+    i przesunięcia segmentów w indeksie są poprawne.
+    """
+
+    def __init__(self, backup_dir, run_id=None, owner=None):
+        self.backup_dir = backup_dir
+        if not os.path.exists(backup_dir):
+            os.makedirs(backup_dir)
+        if run_id is None:
+            # Repliki uruchamiane przez ten sam harmonogram startują w tej samej sekundzie
+            process = re.sub(r"[^A-Za-z0-9.-]+", "-", f"{owner or socket.gethostname()}_{os.getpid()}")
+            run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{process}"
+        self.run_id = run_id
+        self.run_file = f"backup_{self.run_id}.ndjson.gz"
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(backup_dir, "index.db"), check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS segments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                file TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                record_ids TEXT NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS segments_user_date ON segments (user_id, date)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS record_versions (
+                record_id TEXT NOT NULL,
+                segment_id INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (record_id, segment_id)
+            ) WITHOUT ROWID
+        """)
+
+    def _latest_hash(self, record_id):
+        row = self.conn.execute(
+            "SELECT hash FROM record_versions WHERE record_id = ? ORDER BY segment_id DESC LIMIT 1",
+            (record_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, user_id, date, records):
+        """Zapisuje backup rekordów użytkownika z danego dnia - zwraca (segment_id, liczba zmienionych rekordów)"""
+        with self.lock:
+            changed = []
+            for record in records:
+                digest = record_hash(record)
+                if self._latest_hash(str(record.get('id'))) != digest:
+                    changed.append((str(record.get('id')), digest, record))
+
+            offset = 0
+            length = 0
+            if changed:
+                lines = "".join(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n" for _, _, record in changed)
+                data = gzip.compress(lines.encode("utf-8"))
+                # Backup musi być na dysku, zanim zaczniemy zmieniać dane w Everhour
+                with open(os.path.join(self.backup_dir, self.run_file), "ab") as f:
+                    f.seek(0, os.SEEK_END)
+                    offset = f.tell()
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                length = len(data)
+
+            self.conn.execute("BEGIN")
+            cursor = self.conn.execute(
+                "INSERT INTO segments (run_id, user_id, date, file, offset, length, record_ids, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.run_id, str(user_id), str(date), self.run_file, offset, length,
+                 json.dumps([str(record.get('id')) for record in records]), int(time.time()))
+            )
+            segment_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO record_versions (record_id, segment_id, hash) VALUES (?, ?, ?)",
+                [(record_id, segment_id, digest) for record_id, digest, _ in changed]
+            )
+            self.conn.execute("COMMIT")
+        return segment_id, len(changed)
+
+    def read_segment(self, segment_id):
+        """Zwraca rekordy zapisane fizycznie w danym segmencie (tylko zmienione w tym backupie)"""
+        with self.lock:
+            row = self.conn.execute("SELECT file, offset, length FROM segments WHERE id = ?", (segment_id,)).fetchone()
+        if not row or not row[2]:
+            return []
+        file, offset, length = row
+        with open(os.path.join(self.backup_dir, file), "rb") as f:
+            f.seek(offset)
+            data = gzip.decompress(f.read(length))
+        return [json.loads(line) for line in data.decode("utf-8").splitlines() if line]
+
+    def list_segments(self, user_id=None, date=None):
+        """Zwraca listę segmentów (id, run_id, user_id, date, created_at), najstarsze pierwsze"""
+        query = "SELECT id, run_id, user_id, date, created_at FROM segments WHERE 1 = 1"
+        params = []
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(str(user_id))
+        if date is not None:
+            query += " AND date = ?"
+            params.append(str(date))
+        with self.lock:
+            return self.conn.execute(query + " ORDER BY id", params).fetchall()
+
+    def load(self, user_id, date, segment_id=None, latest=False):
+        """Odtwarza rekordy użytkownika z danego dnia.
+
+        Domyślnie zwraca najstarszy backup (stan sprzed pierwszej zmiany), latest=True - najnowszy.
+        """
+        with self.lock:
+            if segment_id is None:
+                order = "DESC" if latest else "ASC"
+                row = self.conn.execute(
+                    f"SELECT id, record_ids FROM segments WHERE user_id = ? AND date = ? ORDER BY id {order} LIMIT 1",
+                    (str(user_id), str(date))
+                ).fetchone()
+            else:
+                row = self.conn.execute("SELECT id, record_ids FROM segments WHERE id = ?", (segment_id,)).fetchone()
+            if not row:
+                return None
+            segment_id, record_ids = row[0], json.loads(row[1])
+            locations = {}
+            for record_id in record_ids:
+                version = self.conn.execute(
+                    "SELECT segment_id FROM record_versions WHERE record_id = ? AND segment_id <= ? "
+                    "ORDER BY segment_id DESC LIMIT 1",
+                    (record_id, segment_id)
+                ).fetchone()
+                if version:
+                    locations[record_id] = version[0]
+
+        segments = {}
+        records = []
+        for record_id in record_ids:
+            source = locations.get(record_id)
+            if source is None:
+                continue
+            if source not in segments:
+                segments[source] = {str(record.get('id')): record for record in self.read_segment(source)}
+            record = segments[source].get(record_id)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def units(self, date_from, date_to, user_id=None):
+        """Zwraca (użytkownik, data) mające backup w zakresie dat"""
+        query = "SELECT DISTINCT user_id, date FROM segments WHERE date BETWEEN ? AND ?"
+        params = [str(date_from), str(date_to)]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(str(user_id))
+        with self.lock:
+            return self.conn.execute(query + " ORDER BY date, user_id", params).fetchall()
+
+    def load_originals(self, user_id, date):
+        """Odtwarza stan sprzed pierwszej zmiany: najstarszą wersję każdego rekordu z backupów użytkownika z danego dnia.
+
+        Zwraca listę (rekord, pierwszy segment, ostatni segment, w którym rekord występował). Backupy
+        trybu przyrostowego obejmują tylko część rekordów dnia, dlatego łączone są wszystkie segmenty.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, record_ids FROM segments WHERE user_id = ? AND date = ? ORDER BY id",
+                (str(user_id), str(date))
+            ).fetchall()
+            seen = {}
+            for segment_id, record_ids in rows:
+                for record_id in json.loads(record_ids):
+                    seen.setdefault(record_id, [segment_id, segment_id])[1] = segment_id
+            locations = {}
+            for record_id in seen:
+                version = self.conn.execute(
+                    "SELECT MIN(segment_id) FROM record_versions WHERE record_id = ?", (record_id,)
+                ).fetchone()
+                if version and version[0] is not None:
+                    locations[record_id] = version[0]
+
+        segments = {}
+        originals = []
+        for record_id, (first_segment, last_segment) in seen.items():
+            source = locations.get(record_id)
+            if source is None:
+                continue
+            if source not in segments:
+                segments[source] = {str(record.get('id')): record for record in self.read_segment(source)}
+            record = segments[source].get(record_id)
+            if record is not None:
+                originals.append((record, first_segment, last_segment))
+        return originals
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
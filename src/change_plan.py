@@ -0,0 +1,48 @@
+import gzip
+import json
+import os
+
+PLAN_VERSION = 1
+
+
+def _open(path, mode, compressed=None):
+    # Plik tymczasowy nie ma końcówki .gz - kompresję wybiera ścieżka docelowa
+    if compressed is None:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_plan(path, header, entries):
+    """Zapisuje plan zmian jako JSON Lines: nagłówek, a potem jedna linia na rekord"""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    header = dict(header, version=PLAN_VERSION, entries=len(entries))
+    tmp_path = path + ".tmp"
+    with _open(tmp_path, "w", compressed=path.endswith(".gz")) as f:
+        f.write(json.dumps(header, separators=(",", ":"), ensure_ascii=False) + "\n")
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_plan(path):
+    """Wczytuje plan zmian - zwraca (nagłówek, lista wpisów)"""
+    with _open(path, "r") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != PLAN_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja planu: {header.get('version')}")
+        entries = [json.loads(line) for line in f if line.strip()]
+    return header, entries
+
+
+def count_actions(entries):
+    """Zlicza wpisy planu według akcji/powodu pominięcia"""
+    counts = {}
+    for entry in entries:
+        key = entry["action"] if entry["action"] != "skip" else f"skip:{entry.get('reason')}"
+        counts[key] = counts.get(key, 0) + 1
+    return counts
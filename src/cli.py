@@ -0,0 +1,218 @@
+"""Wiersz poleceń Everhour Time Multiplier.
+
+    python src/cli.py run --date 2024-01-15            # jeden dzień i koniec
+    python src/cli.py backfill 2024-01-01 2024-01-31   # zakres dat
+    python src/cli.py plan --date 2024-01-15           # plan zmian bez zapisów
+    python src/cli.py apply plans/plan_2024-01-15.jsonl
+    python src/cli.py restore --list --employee 12     # backupy pracownika
+    python src/cli.py restore --apply --date 2024-01-15 # cofnięcie zmian całego zespołu z dnia
+    python src/cli.py serve                            # scheduler (jak python src/main.py)
+
+Moduł main (requests, klient HTTP, konfiguracja) jest importowany dopiero przez polecenie, które go
+potrzebuje, a APScheduler i konfiguracja z dashboard - tylko przez "serve".
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+from datetime import datetime
+
+_app = None
+
+
+def set_app(module):
+    """Używane, gdy CLI jest wywoływane z main.py - żeby nie importować main drugi raz"""
+    global _app
+    _app = module
+
+
+def get_app():
+    global _app
+    if _app is None:
+        _app = importlib.import_module("main")
+    return _app
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"nieprawidłowa data {value!r} (oczekiwano RRRR-MM-DD)")
+
+
+def apply_overrides(app, args):
+    if getattr(args, "dry_run", False):
+        app.DRY_RUN = True
+    if getattr(args, "workers", None):
+        app.MAX_WORKERS = args.workers
+
+
+def require_api_key(app):
+    if not app.EVERHOUR_API_KEY:
+        app.logging.error("Brak klucza API Everhour!")
+        return False
+    return True
+
+
+def cmd_run(args):
+    app = get_app()
+    apply_overrides(app, args)
+    result = app.manual_trigger(args.employee, str(args.date) if args.date else None)
+    app.logging.info(f"Wynik: {result}")
+    return 1 if "error" in result else 0
+
+
+def cmd_backfill(args):
+    app = get_app()
+    apply_overrides(app, args)
+    result = app.backfill_trigger(str(args.date_from), str(args.date_to) if args.date_to else None, args.employee)
+    app.logging.info(f"Wynik backfillu: {result}")
+    return 1 if "error" in result else 0
+
+
+def cmd_incremental(args):
+    app = get_app()
+    apply_overrides(app, args)
+    if not require_api_key(app):
+        return 1
+    with app.EverhourTimeMultiplier(app.EVERHOUR_API_KEY) as multiplier:
+        multiplier.run_incremental_update()
+    return 0
+
+
+def cmd_plan(args):
+    app = get_app()
+    apply_overrides(app, args)
+    if not require_api_key(app):
+        return 1
+    with app.EverhourTimeMultiplier(app.EVERHOUR_API_KEY) as multiplier:
+        multiplier.create_plan(args.date, plan_file=args.file)
+    return 0
+
+
+def cmd_apply(args):
+    app = get_app()
+    apply_overrides(app, args)
+    if not require_api_key(app):
+        return 1
+    if args.no_validate:
+        app.PLAN_VALIDATE = False
+    with app.EverhourTimeMultiplier(app.EVERHOUR_API_KEY) as multiplier:
+        results = multiplier.apply_plan(args.plan_file)
+    return 0 if results is not None and all(ok for ok, _ in results) else 1
+
+
+def cmd_restore(args):
+    if args.apply:
+        return cmd_rollback(args)
+    # Odczyt backupów nie potrzebuje klienta HTTP - main nie jest importowany
+    from backup_store import BackupStore
+
+    backup_dir = args.backup_dir or os.environ.get("BACKUP_DIR", "backups")
+    if not os.path.exists(os.path.join(backup_dir, "index.db")):
+        print(f"Brak backupów w {backup_dir}", file=sys.stderr)
+        return 1
+    store = BackupStore(backup_dir, run_id="restore")
+    try:
+        if args.list or not (args.employee and args.date):
+            for segment_id, run_id, user_id, date, created_at in store.list_segments(args.employee, args.date):
+                created = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"{segment_id}\t{date}\t{user_id}\t{run_id}\t{created}")
+            return 0
+        records = store.load(args.employee, args.date, segment_id=args.segment, latest=args.latest)
+        if records is None:
+            print(f"Brak backupu pracownika {args.employee} z dnia {args.date}", file=sys.stderr)
+            return 1
+        output = json.dumps(records, indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        else:
+            print(output)
+        return 0
+    finally:
+        store.close()
+
+
+def cmd_rollback(args):
+    if not args.date:
+        print("Przywracanie wymaga --date", file=sys.stderr)
+        return 2
+    app = get_app()
+    apply_overrides(app, args)
+    if args.backup_dir:
+        app.BACKUP_DIR = args.backup_dir
+    result = app.restore_trigger(str(args.date), str(args.date_to) if args.date_to else None, args.employee)
+    app.logging.info(f"Wynik przywracania: {result}")
+    return 1 if "error" in result or result.get("failed") else 0
+
+
+def cmd_serve(args):
+    app = get_app()
+    app.main()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="everhour-time-multiplier", description="Mnożnik czasu w Everhour")
+    commands = parser.add_subparsers(dest="command", metavar="polecenie")
+    commands.required = True
+
+    def add_common(command):
+        command.add_argument("--dry-run", action="store_true", help="bez zmian w Everhour")
+        command.add_argument("--workers", type=int, help="liczba pracowników przetwarzanych równolegle")
+
+    run = commands.add_parser("run", help="przetwórz jeden dzień (domyślnie wczoraj)")
+    run.add_argument("--date", type=parse_date)
+    run.add_argument("--employee", help="ID pracownika (domyślnie wszyscy z dashboard)")
+    add_common(run)
+    run.set_defaults(func=cmd_run)
+
+    backfill = commands.add_parser("backfill", help="przetwórz zakres dat")
+    backfill.add_argument("date_from", type=parse_date)
+    backfill.add_argument("date_to", type=parse_date, nargs="?", help="domyślnie wczoraj")
+    backfill.add_argument("--employee")
+    add_common(backfill)
+    backfill.set_defaults(func=cmd_backfill)
+
+    incremental = commands.add_parser("incremental", help="jedno sprawdzenie przyrostowe (nowe i zmienione rekordy)")
+    add_common(incremental)
+    incremental.set_defaults(func=cmd_incremental)
+
+    plan = commands.add_parser("plan", help="utwórz plan zmian bez modyfikowania danych")
+    plan.add_argument("--date", type=parse_date)
+    plan.add_argument("--file", help="ścieżka pliku planu")
+    plan.set_defaults(func=cmd_plan, dry_run=False)
+
+    apply = commands.add_parser("apply", help="wykonaj zapisany plan zmian")
+    apply.add_argument("plan_file")
+    apply.add_argument("--no-validate", action="store_true", help="nie sprawdzaj planu z aktualnym stanem Everhour")
+    add_common(apply)
+    apply.set_defaults(func=cmd_apply)
+
+    restore = commands.add_parser("restore", help="pokaż backupy, wypisz rekordy sprzed zmian albo przywróć je w Everhour (--apply)")
+    restore.add_argument("--list", action="store_true", help="lista backupów")
+    restore.add_argument("--employee")
+    restore.add_argument("--date", type=parse_date)
+    restore.add_argument("--to", dest="date_to", type=parse_date, help="koniec zakresu przywracania (domyślnie --date)")
+    restore.add_argument("--apply", action="store_true", help="przywróć czas rekordów w Everhour i wyczyść bazę przetworzonych")
+    restore.add_argument("--segment", type=int, help="konkretny segment backupu")
+    restore.add_argument("--latest", action="store_true", help="najnowszy backup zamiast najstarszego")
+    restore.add_argument("--output", help="zapisz rekordy do pliku JSON")
+    restore.add_argument("--backup-dir")
+    add_common(restore)
+    restore.set_defaults(func=cmd_restore)
+
+    serve = commands.add_parser("serve", help="uruchom scheduler (zachowanie python src/main.py)")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def run(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import threading
+import time
+
+
+class DashboardCache:
+    """Cache odpowiedzi dashboard: TTL w pamięci, rewalidacja ETag/If-None-Match
+    i kopia na dysku używana, gdy dashboard jest niedostępny."""
+
+    def __init__(self, http, headers, snapshot_file, ttl):
+        self.http = http
+        self.headers = headers
+        self.snapshot_file = snapshot_file
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = self._load_snapshot()
+        # Wpisy z dysku mają ETag, ale wymagają rewalidacji przed użyciem
+        for entry in self.entries.values():
+            entry["checked_at"] = 0
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_snapshot(self):
+        data = {
+            name: {"etag": entry.get("etag"), "value": entry.get("value")}
+            for name, entry in self.entries.items()
+        }
+        tmp_file = self.snapshot_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.snapshot_file)
+
+    def get(self, name, url):
+        """Zwraca (wartość, czy_zmieniona). Przy błędzie dashboard zwraca ostatnią znaną wartość."""
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry and time.time() - entry.get("checked_at", 0) < self.ttl:
+                return entry["value"], False
+
+            headers = dict(self.headers)
+            if entry and entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            try:
+                response = self.http.get(url, headers=headers)
+                if response.status_code == 304 and entry:
+                    entry["checked_at"] = time.time()
+                    return entry["value"], False
+                response.raise_for_status()
+                value = response.json()
+            except Exception:
+                if entry and entry.get("value") is not None:
+                    logging.warning(f"⚠️  Dashboard niedostępny - używam zapisanej kopii ({name})")
+                    return entry["value"], False
+                raise
+
+            changed = entry is None or entry.get("value") != value
+            self.entries[name] = {
+                "etag": response.headers.get("ETag"),
+                "value": value,
+                "checked_at": time.time()
+            }
+            try:
+                self._save_snapshot()
+            except Exception as e:
+                logging.warning(f"⚠️  Nie udało się zapisać kopii odpowiedzi dashboard: {e}")
+            return value, changed
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import metrics
+
+# Endpointy zbiorcze i ich odpowiedniki dla pojedynczych wpisów (starsze wersje dashboard)
+BATCH_ENDPOINTS = {
+    "log": ("/api/logs/batch", "logs", "/api/logs/record"),
+    "backup": ("/api/backups/batch", "backups", "/api/backups"),
+}
+
+
+class DashboardReporter:
+    """Wysyła logi i backupy do dashboard w tle: zbiorczo, przez ograniczoną kolejkę,
+    a nieudane wysyłki odkłada do pliku (spool) i ponawia przy kolejnym wysyłaniu."""
+
+    def __init__(self, base_url, token, http, spool_file, batch_size=100, flush_interval=5.0, queue_size=10000):
+        self.base_url = base_url
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.http = http
+        self.spool_file = spool_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        # Prośba o wysłanie bez czekania, gdy kolejka jest pełna (wątek w tle i tak ją opróżnia)
+        self.flush_requested = threading.Event()
+        self.spool_lock = threading.Lock()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self.thread is None:
+            with self.thread_lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="dashboard-reporter", daemon=True)
+                    self.thread.start()
+
+    def submit(self, kind, item):
+        """Dodaje wpis do wysłania - nigdy nie blokuje przetwarzania"""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((kind, item))
+        except queue.Full:
+            logging.warning("⚠️  Kolejka dashboard pełna - zapisuję wpis do pliku zapasowego")
+            self._spool([(kind, item)])
+
+    def flush(self, wait=True, timeout=None):
+        """Wymusza wysłanie zebranych wpisów; przy wait=True czeka na zakończenie"""
+        self._ensure_started()
+        done = threading.Event()
+        if not wait:
+            # Wątek przetwarzający nigdy nie czeka na miejsce w kolejce
+            try:
+                self.queue.put_nowait(("flush", done))
+            except queue.Full:
+                self.flush_requested.set()
+            return True
+        try:
+            self.queue.put(("flush", done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=30):
+        if self.thread is None:
+            return
+        if not self.flush(wait=True, timeout=timeout):
+            # Nie zdążyliśmy - to, co zostało w kolejce, trafia do pliku zapasowego
+            leftovers = []
+            while True:
+                try:
+                    kind, item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if kind != "flush":
+                    leftovers.append((kind, item))
+            self._spool(leftovers)
+
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                kind, item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                kind, item = None, None
+            if kind == "flush":
+                self._send_all(pending)
+                pending = []
+                item.set()
+            elif kind is not None:
+                pending.append((kind, item))
+            if self.flush_requested.is_set() or len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                self.flush_requested.clear()
+                self._send_all(pending)
+                pending = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _send_all(self, pending):
+        batch = self._take_spool() + pending
+        if not batch:
+            return
+        by_kind = {}
+        for kind, item in batch:
+            by_kind.setdefault(kind, []).append(item)
+        for kind, items in by_kind.items():
+            try:
+                self._send(kind, items)
+                logging.info(f"☁️  Wysłano do dashboard: {len(items)} ({kind})")
+            except Exception as e:
+                logging.warning(f"⚠️  Nie udało się wysłać {len(items)} wpisów ({kind}) do dashboard: {e}")
+                self._spool([(kind, item) for item in items])
+
+    @metrics.timed("dashboard_report")
+    def _send(self, kind, items):
+        batch_path, batch_key, single_path = BATCH_ENDPOINTS[kind]
+        response = self.http.post(f"{self.base_url}{batch_path}", json={batch_key: items}, headers=self.headers)
+        if response.status_code not in (404, 405):
+            response.raise_for_status()
+            return
+        # Starszy dashboard bez endpointów zbiorczych
+        for item in items:
+            if kind == "backup":
+                item = dict(item, data=json.dumps(item["records"]))
+                item.pop("records")
+            self.http.post(f"{self.base_url}{single_path}", json=item, headers=self.headers).raise_for_status()
+
+    def _spool(self, entries):
+        if not entries:
+            return
+        with self.spool_lock:
+            with open(self.spool_file, "a", encoding="utf-8") as f:
+                for kind, item in entries:
+                    f.write(json.dumps({"kind": kind, "item": item}, ensure_ascii=False) + "\n")
+
+    def _take_spool(self):
+        with self.spool_lock:
+            if not os.path.exists(self.spool_file):
+                return []
+            with open(self.spool_file, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            os.remove(self.spool_file)
+        entries = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                entries.append((entry["kind"], entry["item"]))
+            except (ValueError, KeyError):
+                continue
+        return entries
@@ -0,0 +1,207 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Limity czasu zapytań (sekundy)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "30"))
+
+# Ponawianie zapytań
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "5"))
+HTTP_BACKOFF_BASE = float(os.environ.get("HTTP_BACKOFF_BASE", "1"))
+HTTP_BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", "60"))
+# Najdłuższe czekanie wskazane przez Retry-After - dłuższe kończy zapytanie błędem zamiast ponawiać je za wcześnie
+HTTP_RETRY_AFTER_MAX = float(os.environ.get("HTTP_RETRY_AFTER_MAX", "600"))
+
+# Rozmiar puli połączeń keep-alive na host
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+
+# false = nie czytaj proxy, .netrc i CA bundle ze środowiska przy każdym zapytaniu (oszczędza czas przy
+# tysiącach zapytań, ale NO_PROXY/.netrc przestają działać; CA bundle z REQUESTS_CA_BUNDLE jest brany raz)
+HTTP_TRUST_ENV = os.environ.get("HTTP_TRUST_ENV", "true").lower() == "true"
+
+# Statusy, po których ponawiamy zapytanie
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Metody bezpieczne do ponowienia również po błędzie serwera
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+# Segmenty ścieżki z identyfikatorami (np. /users/123/time) zamieniamy na {id}, żeby ograniczyć liczbę etykiet
+ID_SEGMENT = re.compile(r"/[^/]*\d[^/]*")
+
+
+def endpoint_label(path):
+    return ID_SEGMENT.sub("/{id}", path) or "/"
+
+
+class RateLimiter:
+    """Token bucket współdzielony przez wszystkie wątki wysyłające zapytania do jednego hosta"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # Po 429 wstrzymujemy wszystkie wątki, a nie tylko ten, który dostał odpowiedź
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class HttpClient:
+    """Wspólny klient HTTP: pule połączeń keep-alive, timeouty, limit zapytań i ponawianie"""
+
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not HTTP_TRUST_ENV:
+            self.session.trust_env = False
+            ca_bundle = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE")
+            if ca_bundle:
+                self.session.verify = ca_bundle
+        self.limiters = {}
+
+    def set_rate_limit(self, base_url, rate, burst):
+        host = urlsplit(base_url).netloc
+        if rate and rate > 0:
+            self.limiters[host] = RateLimiter(rate, burst)
+        else:
+            self.limiters.pop(host, None)
+
+    def _backoff(self, attempt):
+        delay = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def _retry_after(self, response):
+        """Czas czekania z nagłówka Retry-After (sekundy albo data HTTP) - bez przycinania, albo None"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _can_retry_status(self, method, status_code):
+        if status_code == 429:
+            # 429 oznacza, że serwer nie wykonał zapytania - można ponowić każdą metodę
+            return True
+        return status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS
+
+    def _can_retry_error(self, method, error):
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            # Zapytanie nie zostało wysłane
+            return True
+        return method in IDEMPOTENT_METHODS
+
+    def request(self, method, url, **kwargs):
+        method = method.upper()
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT))
+        parts = urlsplit(url)
+        host = parts.netloc
+        endpoint = endpoint_label(parts.path)
+        limiter = self.limiters.get(host)
+        attempt = 0
+        while True:
+            if limiter:
+                limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.HTTP_REQUESTS.inc(host=host, method=method, endpoint=endpoint, status="error")
+                if attempt >= HTTP_MAX_RETRIES or not self._can_retry_error(method, e):
+                    raise
+                delay = self._backoff(attempt)
+                metrics.HTTP_RETRIES.inc(host=host, endpoint=endpoint, reason="error")
+                logging.warning(f"🔁 {method} {url} - błąd połączenia ({e}), ponawiam za {delay:.1f}s")
+            else:
+                metrics.HTTP_REQUESTS.inc(host=host, method=method, endpoint=endpoint, status=str(response.status_code))
+                metrics.HTTP_LATENCY.observe(time.monotonic() - started, host=host, method=method, endpoint=endpoint)
+                if response.status_code == 429:
+                    metrics.HTTP_RATE_LIMITED.inc(host=host)
+                if attempt >= HTTP_MAX_RETRIES or not self._can_retry_status(method, response.status_code):
+                    # Liczba prób - np. 404 na ponowionym DELETE oznacza, że pierwsza próba jednak usunęła rekord
+                    response.attempts = attempt + 1
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                elif delay > HTTP_RETRY_AFTER_MAX:
+                    # Ponowienie przed czasem wskazanym przez serwer i tak zostałoby odrzucone
+                    logging.error(
+                        f"❌ {method} {url} - status {response.status_code}, serwer każe czekać {delay:.0f}s "
+                        f"(więcej niż HTTP_RETRY_AFTER_MAX={HTTP_RETRY_AFTER_MAX:g}s) - nie ponawiam"
+                    )
+                    response.attempts = attempt + 1
+                    return response
+                if response.status_code == 429 and limiter:
+                    limiter.pause(delay)
+                metrics.HTTP_RETRIES.inc(host=host, endpoint=endpoint, reason=str(response.status_code))
+                logging.warning(f"🔁 {method} {url} - status {response.status_code}, ponawiam za {delay:.1f}s")
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Zwraca współdzielony klient HTTP (tworzony przy pierwszym użyciu)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
@@ -0,0 +1,68 @@
+import atexit
+import itertools
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Profile logowania: "verbose" - wszystko, "summary" - bez linii dla pojedynczych rekordów i użytkowników
+LOG_PROFILES = {"verbose", "summary"}
+
+# Linie dla pojedynczych rekordów i pojedynczych użytkowników mają osobne loggery,
+# żeby profil "summary" mógł je wyciszyć bez wpływu na podsumowania, ostrzeżenia i błędy
+RECORD_LOG = logging.getLogger("everhour.records")
+USER_LOG = logging.getLogger("everhour.users")
+
+_listener = None
+
+
+class LogSampler:
+    """Przepuszcza co n-tą linię (1 = wszystkie) - wspólny licznik dla wszystkich wątków"""
+
+    def __init__(self, rate):
+        self.rate = max(1, int(rate))
+        self.counter = itertools.count()
+
+    def sample(self):
+        return self.rate == 1 or next(self.counter) % self.rate == 0
+
+
+class UnitLogAdapter(logging.LoggerAdapter):
+    """Dopisuje pracownika i dzień na początku linii - przy przetwarzaniu równoległym
+    linie różnych pracowników przeplatają się w logu"""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['user_id']} {self.extra['date']}] {msg}", kwargs
+
+
+def configure_logging(level, profile="verbose", use_queue=False):
+    """Konfiguruje logowanie; przy use_queue=True zapis do stdout odbywa się w osobnym wątku"""
+    global _listener
+    if profile not in LOG_PROFILES:
+        logging.warning(f"⚠️  Nieznany profil logowania {profile!r}, używam 'verbose'")
+        profile = "verbose"
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(level)
+    if use_queue:
+        # Wątki robocze tylko wrzucają wpis do kolejki, a wolny zapis na konsolę robi listener
+        log_queue = queue.SimpleQueue()
+        root.addHandler(QueueHandler(log_queue))
+        _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        root.addHandler(handler)
+    if profile == "summary" and level > logging.DEBUG:
+        RECORD_LOG.setLevel(logging.WARNING)
+        USER_LOG.setLevel(logging.WARNING)
+
+
+def stop_logging():
+    """Zapisuje wpisy czekające w kolejce (wywoływane przy zamykaniu procesu)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
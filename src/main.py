@@ -3,17 +3,52 @@ from datetime import datetime, timedelta
 import json
 import logging
 import os
+import atexit
+import threading
 import time
-from apscheduler.schedulers.blocking import BlockingScheduler
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from http_client import get_http_client
+from processed_store import ProcessedStore
+from backup_store import BackupStore
+from dashboard_cache import DashboardCache
+from metadata_cache import MetadataCache
+from response_cache import ResponseCache
+from dashboard_reporter import DashboardReporter
+from change_plan import count_actions, read_plan, write_plan
+from rollback import diff_records
+from work_leases import LeaseStore
+from schedules import parse_schedules, select_employees
+from time_records import TimeRecord, iter_time_records, to_dicts
+from log_config import RECORD_LOG, USER_LOG, LogSampler, UnitLogAdapter, configure_logging
 
 # Konfiguracja z zmiennych środowiskowych
 EVERHOUR_API_KEY = os.environ.get("EVERHOUR_API_KEY")
-BASE_URL = "https://api.everhour.com"
+BASE_URL = os.environ.get("EVERHOUR_BASE_URL", "https://api.everhour.com")
+
+# Limit zapytań do Everhour (domyślnie 20 zapytań na 10 sekund)
+EVERHOUR_RATE_LIMIT = float(os.environ.get("EVERHOUR_RATE_LIMIT", "2"))
+EVERHOUR_RATE_BURST = int(os.environ.get("EVERHOUR_RATE_BURST", "20"))
 
 # Dashboard integration
 DASHBOARD_API_URL = os.environ.get("DASHBOARD_API_URL")
 DASHBOARD_TOKEN = os.environ.get("DASHBOARD_TOKEN")
 
+# Wysyłanie do dashboard w tle: rozmiar paczki, co ile sekund, rozmiar kolejki, plik na nieudane wysyłki
+DASHBOARD_BATCH_SIZE = int(os.environ.get("DASHBOARD_BATCH_SIZE", "100"))
+DASHBOARD_FLUSH_INTERVAL = float(os.environ.get("DASHBOARD_FLUSH_INTERVAL", "5"))
+DASHBOARD_QUEUE_SIZE = int(os.environ.get("DASHBOARD_QUEUE_SIZE", "10000"))
+DASHBOARD_SPOOL_FILE = os.environ.get("DASHBOARD_SPOOL_FILE", "dashboard_spool.ndjson")
+
+# Cache konfiguracji i listy pracowników z dashboard (sekundy) i jego kopia na dysku
+DASHBOARD_CACHE_TTL = float(os.environ.get("DASHBOARD_CACHE_TTL", "300"))
+DASHBOARD_CACHE_FILE = os.environ.get("DASHBOARD_CACHE_FILE", "dashboard_cache.json")
+
+# Cache nazw zadań i projektów (pobieranych zbiorczo przed przetwarzaniem) i jego kopia na dysku
+METADATA_PREFETCH = os.environ.get("METADATA_PREFETCH", "true").lower() == "true"
+METADATA_CACHE_FILE = os.environ.get("METADATA_CACHE_FILE", "metadata_cache.json")
+METADATA_CACHE_SIZE = int(os.environ.get("METADATA_CACHE_SIZE", "20000"))
+
 # Lista ID pracowników z mnożnikiem (z env lub domyślna)
 EMPLOYEES_WITH_MULTIPLIER = os.environ.get("EMPLOYEES_IDS", "").split(",")
 
@@ -24,6 +59,82 @@ TIME_MULTIPLIER = float(os.environ.get("TIME_MULTIPLIER", "1.5"))
 RUN_HOUR = int(os.environ.get("RUN_HOUR", "1"))
 RUN_MINUTE = int(os.environ.get("RUN_MINUTE", "0"))
 
+# Harmonogramy: SCHEDULES="nazwa@GG:MM=id1,id2;reszta@GG:MM" albo automatyczny podział zespołu
+# na SCHEDULE_GROUPS grup rozłożonych w oknie SCHEDULE_WINDOW_MINUTES od RUN_HOUR:RUN_MINUTE
+SCHEDULES = os.environ.get("SCHEDULES", "")
+SCHEDULE_GROUPS = int(os.environ.get("SCHEDULE_GROUPS", "1"))
+SCHEDULE_WINDOW_MINUTES = int(os.environ.get("SCHEDULE_WINDOW_MINUTES", "60"))
+# Losowe przesunięcie startu (sekundy) i czas, w którym pominięte uruchomienie (np. po restarcie) jest jeszcze wykonywane
+SCHEDULE_JITTER_SECONDS = int(os.environ.get("SCHEDULE_JITTER_SECONDS", "0"))
+SCHEDULE_MISFIRE_GRACE_SECONDS = int(os.environ.get("SCHEDULE_MISFIRE_GRACE_SECONDS", "3600"))
+# Trwały magazyn zadań schedulera: plik SQLite (bez dodatkowych pakietów), URL SQLAlchemy (np. postgresql://...)
+# albo puste = w pamięci (pominięte w czasie przestoju uruchomienia przepadają)
+SCHEDULER_JOBSTORE = os.environ.get("SCHEDULER_JOBSTORE", "scheduler_jobs.db")
+
+# Pobieranie czasu całego zespołu jednym (stronicowanym) zapytaniem zamiast osobno dla każdego pracownika
+BULK_FETCH = os.environ.get("BULK_FETCH", "true").lower() == "true"
+TEAM_TIME_PAGE_SIZE = int(os.environ.get("TEAM_TIME_PAGE_SIZE", "1000"))
+
+# Parsowanie odpowiedzi z rekordami czasu strumieniowo (bez wczytywania całej odpowiedzi do pamięci)
+STREAM_RESPONSES = os.environ.get("STREAM_RESPONSES", "true").lower() == "true"
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "65536"))
+
+# Krótkotrwały cache pobranych rekordów - ważność w sekundach, 0 = wyłączony. Uruchomienia zmieniające dane używają
+# rekordów z cache tylko po potwierdzeniu przez Everhour (304 na zapytanie z ETag/Last-Modified)
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR", "response_cache")
+
+# Liczba pracowników przetwarzanych równolegle (1 = sekwencyjnie)
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", "1"))
+
+# Baza przetworzonych rekordów (SQLite) i czas ich przechowywania (0 = bez limitu)
+PROCESSED_DB = os.environ.get("PROCESSED_DB", "processed_records.db")
+PROCESSED_RETENTION_DAYS = int(os.environ.get("PROCESSED_RETENTION_DAYS", "400"))
+# Ile ostatnich dni przetworzonych rekordów trzymać w pamięci (starsze są sprawdzane w bazie)
+PROCESSED_INDEX_DAYS = int(os.environ.get("PROCESSED_INDEX_DAYS", "35"))
+# Filtr Blooma dla starszej historii - chybienia nie trafiają do bazy (kilka bitów pamięci na rekord)
+PROCESSED_HISTORY_FILTER = os.environ.get("PROCESSED_HISTORY_FILTER", "false").lower() == "true"
+LEGACY_PROCESSED_FILE = "processed_records.json"
+
+# Podział pracy między repliki: jednostki (dzień, pracownik) zajmowane przez dzierżawy we wspólnej bazie.
+# LEASE_DB, PROCESSED_DB i BACKUP_DIR muszą wskazywać na wspólny wolumen (inaczej przywracanie widzi tylko
+# backupy swojej repliki); LEASE_TTL - po ilu sekundach dzierżawa repliki, która przestała działać, może zostać przejęta
+SHARDING = os.environ.get("SHARDING", "false").lower() == "true"
+LEASE_DB = os.environ.get("LEASE_DB", "leases.db")
+LEASE_TTL = float(os.environ.get("LEASE_TTL", "300"))
+LEASE_OWNER = os.environ.get("LEASE_OWNER") or os.environ.get("RAILWAY_REPLICA_ID")
+
+# Backfill - zakres dat (YYYY-MM-DD) i liczba dni pobieranych jednym zapytaniem zespołowym
+BACKFILL_FROM = os.environ.get("BACKFILL_FROM")
+BACKFILL_TO = os.environ.get("BACKFILL_TO")
+BACKFILL_CHUNK_DAYS = max(1, int(os.environ.get("BACKFILL_CHUNK_DAYS", "7")))
+
+# Sposób aktualizacji rekordu: "auto" (PUT, a gdy niedostępny - DELETE + POST), "in_place" (tylko PUT), "replace" (DELETE + POST)
+UPDATE_STRATEGY = os.environ.get("UPDATE_STRATEGY", "auto").lower()
+# Tylko te statusy oznaczają brak endpointu - 404 dotyczy pojedynczego rekordu (np. usuniętego przez pracownika)
+IN_PLACE_UNSUPPORTED_STATUSES = {405, 501}
+
+# Plany zmian (etap planowania i osobnego wykonania)
+PLANS_DIR = os.environ.get("PLANS_DIR", "plans")
+PLAN_CREATE = os.environ.get("PLAN_CREATE", "false").lower() == "true"
+PLAN_APPLY = os.environ.get("PLAN_APPLY")
+PLAN_VALIDATE = os.environ.get("PLAN_VALIDATE", "true").lower() == "true"
+
+# Katalog backupów (jeden plik NDJSON.gz na uruchomienie i proces + wspólny indeks index.db)
+BACKUP_DIR = os.environ.get("BACKUP_DIR", "backups")
+
+# Tryb przyrostowy w ciągu dnia: co ile minut sprawdzać nowe i zmienione rekordy (0 = wyłączony)
+# oraz ile poprzednich dni sprawdzać oprócz dzisiejszego (zmiany wpisane tuż przed północą)
+INCREMENTAL_INTERVAL_MINUTES = float(os.environ.get("INCREMENTAL_INTERVAL_MINUTES", "0"))
+INCREMENTAL_LOOKBACK_DAYS = int(os.environ.get("INCREMENTAL_LOOKBACK_DAYS", "1"))
+
+# Pola rekordu Everhour ze znacznikiem ostatniej zmiany (używane jest pierwsze dostępne)
+RECORD_CHANGE_FIELDS = ("updatedAt", "createdAt")
+
+# Metryki: port endpointu /metrics (0 = wyłączony) i katalog raportów JSON z uruchomień (puste = bez raportów)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+REPORTS_DIR = os.environ.get("REPORTS_DIR", "reports")
+
 # TRYB TESTOWY
 DRY_RUN = os.environ.get("DRY_RUN", "false").lower() == "true"
 
@@ -33,11 +144,18 @@ DEBUG = os.environ.get("DEBUG", "false").lower() == "true"
 # SUPER DEBUG - jeszcze więcej logów
 SUPER_DEBUG = os.environ.get("SUPER_DEBUG", "false").lower() == "true"
 
+# Profil logowania: "verbose" (wszystkie linie) albo "summary" (tylko podsumowania, ostrzeżenia i błędy)
+LOG_PROFILE = os.environ.get("LOG_PROFILE", "verbose").lower()
+
+# Logowanie co n-tego rekordu (1 = każdy) - podsumowania i błędy są zawsze logowane
+LOG_SAMPLE_RATE = int(os.environ.get("LOG_SAMPLE_RATE", "1"))
+
+# Zapis logów na konsolę w osobnym wątku (kolejka), żeby nie spowalniać przetwarzania
+LOG_QUEUE = os.environ.get("LOG_QUEUE", "false").lower() == "true"
+
 # Konfiguracja logowania
-logging.basicConfig(
-    level=logging.DEBUG if SUPER_DEBUG else logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+configure_logging(logging.DEBUG if SUPER_DEBUG else logging.INFO, LOG_PROFILE, LOG_QUEUE)
+record_sampler = LogSampler(LOG_SAMPLE_RATE)
 
 class EverhourTimeMultiplier:
     def __init__(self, api_key):
@@ -46,85 +164,206 @@ class EverhourTimeMultiplier:
             "X-Api-Key": api_key,
             "Content-Type": "application/json"
         }
+        self.http = get_http_client()
+        self.http.set_rate_limit(BASE_URL, EVERHOUR_RATE_LIMIT, EVERHOUR_RATE_BURST)
         self.processed_dates = set()
-        self.processed_records_file = "processed_records.json"
-        self.processed_records = self.load_processed_records()
+        # None = jeszcze nie sprawdzono, czy Everhour obsługuje PUT /time/{id}
+        self.in_place_supported = None
+        self.processed_store = ProcessedStore(PROCESSED_DB, PROCESSED_INDEX_DAYS, PROCESSED_HISTORY_FILTER)
+        self.processed_store.import_legacy_json(LEGACY_PROCESSED_FILE)
+        self.backup_store = BackupStore(BACKUP_DIR, owner=LEASE_OWNER)
+        self.leases = LeaseStore(LEASE_DB, LEASE_OWNER, LEASE_TTL) if SHARDING else None
+        self.response_cache = ResponseCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_TTL) if RESPONSE_CACHE_TTL > 0 else None
 
-    def load_processed_records(self):
-        try:
-            with open(self.processed_records_file, 'r') as f:
-                return set(json.load(f))
-        except:
-            return set()
+    def close(self):
+        """Zamyka bazy i zatrzymuje odnawianie dzierżaw - wywoływane po zakończeniu uruchomienia"""
+        if self.leases is not None:
+            self.leases.close()
+        self.backup_store.close()
+        self.processed_store.close()
+
+    def __enter__(self):
+        return self
 
-    def save_processed_records(self):
-        with open(self.processed_records_file, 'w') as f:
-            json.dump(list(self.processed_records), f)
+    def __exit__(self, *exc_info):
+        self.close()
 
-    def is_record_processed(self, date, user_id, task_id):
-        record_key = f"{date}_{user_id}_{task_id}"
-        return record_key in self.processed_records
+    def is_record_processed(self, date, user_id, task_id, record_id=None):
+        if record_id is not None and self.processed_store.contains_record(date, record_id):
+            return True
+        # Dni przetworzone przed indeksem po ID rekordów mają tylko klucz (data, użytkownik, zadanie)
+        return self.processed_store.contains(date, user_id, task_id)
 
-    def mark_record_as_processed(self, date, user_id, task_id):
-        record_key = f"{date}_{user_id}_{task_id}"
-        self.processed_records.add(record_key)
-        self.save_processed_records()
+    def mark_record_as_processed(self, date, user_id, record_id, new_record_id=None, written_time=None, original_time=None):
+        self.processed_store.add_record(date, user_id, record_id, new_record_id, written_time, original_time)
 
-    def backup_user_records(self, user_id, date):
-        records = self.get_user_time_records(user_id, date)
+    def is_own_write(self, record):
+        """Rekord niezmieniony od naszego zapisu (np. PUT przesunął tylko updatedAt)"""
+        written_time = self.processed_store.get_written_time(record.get('date'), record.get('id'))
+        return written_time is not None and written_time == record.get('time')
+
+    def prune_processed_records(self):
+        if PROCESSED_RETENTION_DAYS <= 0:
+            return
+        cutoff_time = datetime.now() - timedelta(days=PROCESSED_RETENTION_DAYS)
+        cutoff = cutoff_time.strftime("%Y-%m-%d")
+        removed = self.processed_store.prune(cutoff, cutoff_time.timestamp())
+        if self.leases is not None:
+            self.leases.prune(cutoff, cutoff_time.timestamp())
+        if removed:
+            logging.info(f"🧹 Usunięto {removed} przetworzonych rekordów starszych niż {cutoff}")
+
+    @metrics.timed("backup")
+    def backup_user_records(self, user_id, date, records):
         if records:
-            # Zapisz do pliku (tymczasowo)
-            backup_dir = "backups"
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
-            backup_file = os.path.join(backup_dir, f"backup_{user_id}_{date.strftime('%Y%m%d')}_{int(time.time())}.json")
-            with open(backup_file, 'w') as f:
-                json.dump(records, f, indent=2)
-            logging.info(f"📁 Utworzono backup lokalnie: {backup_file}")
-            
-            # Zapisz do dashboard/bazy
-            if DASHBOARD_API_URL and DASHBOARD_TOKEN:
-                try:
-                    backup_data = {
+            records = to_dicts(records)
+            segment_id, changed = self.backup_store.add(user_id, date, records)
+            backup_ref = f"{self.backup_store.run_file}#{segment_id}"
+            if changed:
+                USER_LOG.info("[%s %s] 📁 Utworzono backup lokalnie: %s (%d/%d nowych lub zmienionych rekordów)", user_id, date, backup_ref, changed, len(records))
+                # Do dashboard wysyłamy w tle, zbiorczo
+                reporter = get_dashboard_reporter()
+                if reporter:
+                    reporter.submit("backup", {
                         "user_id": user_id,
                         "date": str(date),
-                        "data": json.dumps(records),
-                        "filename": os.path.basename(backup_file)
-                    }
-                    response = requests.post(
-                        f"{DASHBOARD_API_URL}/api/backups",
-                        json=backup_data,
-                        headers={"Authorization": f"Bearer {DASHBOARD_TOKEN}"}
-                    )
-                    if response.ok:
-                        logging.info("☁️  Backup zapisany w dashboard")
-                    else:
-                        logging.warning(f"⚠️  Nie udało się zapisać backupu w dashboard: {response.status_code}")
-                except Exception as e:
-                    logging.error(f"❌ Błąd zapisywania backupu do dashboard: {e}")
-            
-            return backup_file
+                        "records": records,
+                        "filename": backup_ref
+                    })
+            else:
+                USER_LOG.info("[%s %s] 📁 Backup bez zmian od poprzedniego uruchomienia: %s", user_id, date, backup_ref)
+            return backup_ref
         return None
 
-    def get_user_time_records(self, user_id, date):
+    def fetch_time_records(self, url, params, cached_page=None):
+        """Zwraca (rekordy czasu z odpowiedzi jako TimeRecord, walidatory odpowiedzi) - strumieniowo, jeśli włączone.
+
+        Z cached_page zapytanie jest warunkowe (If-None-Match/If-Modified-Since) - przy 304 zwraca (None, None).
+        """
+        headers = self.headers
+        if cached_page and (cached_page.get("etag") or cached_page.get("last_modified")):
+            headers = dict(headers)
+            if cached_page.get("etag"):
+                headers["If-None-Match"] = cached_page["etag"]
+            if cached_page.get("last_modified"):
+                headers["If-Modified-Since"] = cached_page["last_modified"]
+        response = self.http.get(url, headers=headers, params=params, stream=STREAM_RESPONSES)
+        if response.status_code == 304 and headers is not self.headers:
+            response.close()
+            return None, None
+        if not response.ok:
+            response.close()
+        response.raise_for_status()
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if STREAM_RESPONSES:
+            return iter_time_records(response, STREAM_CHUNK_SIZE), validators
+        return (
+            TimeRecord.from_dict(record, raw=json.dumps(record, separators=(",", ":"), ensure_ascii=False))
+            for record in response.json()
+        ), validators
+
+    def fetch_time_pages(self, url, params, date_from, date_to, user_ids=None, allow_stale=False, page_size=None):
+        """Pobiera rekordy czasu z url (wszystkie strony, jeśli podano page_size) - tylko użytkowników z user_ids.
+
+        Zwraca (rekordy, liczba stron, liczba stron potwierdzonych z cache). Strony zapamiętane w cache są
+        pobierane warunkowo - 304 oznacza, że rekordy z cache są aktualne, więc korzystają z nich także
+        uruchomienia zmieniające dane. allow_stale=True (uruchomienia bez zapisów i backupów) pozwala użyć
+        wpisu, którego serwer nie umie potwierdzić (brak ETag/Last-Modified), bez żadnego zapytania.
+        """
+        wanted = {str(user_id) for user_id in user_ids} if user_ids else None
+        cached_pages = self.response_cache.get(url, date_from, date_to, user_ids) if self.response_cache is not None else None
+        if cached_pages is not None and allow_stale and not any(page["etag"] or page["last_modified"] for page in cached_pages):
+            return [record for page in cached_pages for record in page["records"]], len(cached_pages), len(cached_pages)
+        pages = []
+        confirmed = 0
+        while True:
+            page_params = dict(params, limit=page_size, page=len(pages) + 1) if page_size else params
+            cached_page = cached_pages[len(pages)] if cached_pages is not None and len(pages) < len(cached_pages) else None
+            # Rekordy trafiają na listę w trakcie parsowania - rekordy innych użytkowników są odrzucane od razu,
+            # a cała odpowiedź nigdy nie jest trzymana w pamięci
+            records, validators = self.fetch_time_records(url, page_params, cached_page)
+            if records is None:
+                confirmed += 1
+                pages.append(cached_page)
+            else:
+                page = dict(validators, count=0, records=[])
+                for record in records:
+                    page["count"] += 1
+                    if wanted is None or str(record.user) in wanted:
+                        page["records"].append(record)
+                pages.append(page)
+            if not page_size or pages[-1]["count"] < page_size:
+                break
+        # Wpis bez walidatorów przydaje się tylko uruchomieniom bez zapisów
+        if self.response_cache is not None and (allow_stale or any(page["etag"] or page["last_modified"] for page in pages)):
+            self.response_cache.put(url, date_from, date_to, user_ids, pages)
+        return [record for page in pages for record in page["records"]], len(pages), confirmed
+
+    @metrics.timed("fetch")
+    def get_user_time_records(self, user_id, date, allow_stale=False):
         date_str = date.strftime("%Y-%m-%d")
         url = f"{BASE_URL}/users/{user_id}/time"
         params = {"from": date_str, "to": date_str}
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            if (DEBUG or SUPER_DEBUG) and data:
-                logging.debug("=" * 60)
-                logging.debug("STRUKTURA PIERWSZEGO REKORDU:")
-                logging.debug("=" * 60)
-                logging.debug(json.dumps(data[0], indent=2))
-                logging.debug("=" * 60)
+            data, _, confirmed = self.fetch_time_pages(url, params, date, date, [user_id], allow_stale)
+            if confirmed:
+                USER_LOG.info("♻️  Rekordy użytkownika %s z dnia %s z cache (bez zmian od poprzedniego pobrania)", user_id, date)
+            self.prefetch_metadata(data)
+            if data and RECORD_LOG.isEnabledFor(logging.DEBUG):
+                RECORD_LOG.debug("=" * 60)
+                RECORD_LOG.debug("STRUKTURA PIERWSZEGO REKORDU:")
+                RECORD_LOG.debug("=" * 60)
+                RECORD_LOG.debug(json.dumps(data[0].to_dict(), indent=2))
+                RECORD_LOG.debug("=" * 60)
             return data
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logging.error(f"Błąd podczas pobierania rekordów dla użytkownika {user_id}: {e}")
             return None
 
+    @metrics.timed("fetch")
+    def get_team_time_records(self, date_from, date_to, user_ids=None, allow_stale=False):
+        """Pobiera rekordy czasu całego zespołu za zakres dat, pogrupowane po (użytkownik, data).
+
+        Odpowiedź jest parsowana strumieniowo, ale snapshot jest kompletny przed przetwarzaniem - rekordy
+        jednego użytkownika mogą być na kilku stronach, a backup dnia musi powstać przed pierwszym zapisem.
+
+        Strony z cache są używane tylko po potwierdzeniu przez serwer (304), więc backup i mnożenie zawsze
+        dotyczą aktualnego stanu. allow_stale=True - tylko tam, gdzie nic nie jest zapisywane ani backupowane
+        (DRY RUN) - pozwala użyć wpisu, którego serwer nie potwierdza, bez pobierania.
+        """
+        url = f"{BASE_URL}/team/time"
+        params = {"from": date_from.strftime("%Y-%m-%d"), "to": date_to.strftime("%Y-%m-%d")}
+        try:
+            records, pages, confirmed = self.fetch_time_pages(url, params, date_from, date_to, user_ids, allow_stale, TEAM_TIME_PAGE_SIZE)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.error(f"Błąd podczas pobierania rekordów zespołu: {e}")
+            return None
+        snapshot = {}
+        for record in records:
+            snapshot.setdefault((str(record.user), record.date), []).append(record)
+        if confirmed:
+            logging.info(f"♻️  Rekordy zespołu za {date_from} - {date_to} z cache: {confirmed}/{pages} str. bez zmian od poprzedniego pobrania ({len(records)} rekordów)")
+        else:
+            logging.info(f"📥 Pobrano rekordy zespołu za {date_from} - {date_to} ({pages} str., {len(records)} rekordów)")
+        self.prefetch_metadata(records)
+        return snapshot
+
+    @staticmethod
+    def get_snapshot_records(snapshot, user_id, date):
+        return snapshot.get((str(user_id), date.strftime("%Y-%m-%d")), [])
+
+    @staticmethod
+    def get_record_user_id(record):
+        user_data = record.get('user')
+        return user_data.get('id') if isinstance(user_data, dict) else user_data
+
+    @staticmethod
+    def get_record_change_mark(record):
+        for field in RECORD_CHANGE_FIELDS:
+            if record.get(field):
+                return str(record.get(field))
+        return None
+
     def update_time_record(self, record_id, new_time_seconds, original_record, multiplier):
         task_data = original_record.get('task')
         if not task_data:
@@ -133,24 +372,65 @@ class EverhourTimeMultiplier:
         task_id = task_data.get('id') if isinstance(task_data, dict) else task_data
         user_data = original_record.get('user')
         user_id = user_data.get('id') if isinstance(user_data, dict) else user_data
-        hours = new_time_seconds / 3600
 
         if DRY_RUN:
-            logging.info(f"     🧪 [DRY RUN] Usunąłbym rekord {record_id} i dodał nowy z czasem {hours:.2f}h (mnożnik {multiplier}x)")
-            if SUPER_DEBUG:
-                logging.debug(f"     Task ID: {task_id}")
-                logging.debug(f"     User ID: {user_id}")
-                logging.debug(f"     Date: {original_record.get('date')}")
-            return {"success": True, "dry_run": True}
+            # Linię o planowanej zmianie loguje execute_entries (z próbkowaniem)
+            RECORD_LOG.debug("     Task ID: %s, User ID: %s, Date: %s", task_id, user_id, original_record.get('date'))
+            return {"success": True, "dry_run": True, "strategy": UPDATE_STRATEGY}
+
+        if UPDATE_STRATEGY == "in_place" or (UPDATE_STRATEGY == "auto" and self.in_place_supported is not False):
+            new_record = self.update_time_record_in_place(record_id, new_time_seconds, original_record, user_id)
+            if new_record is not None:
+                return {"success": True, "strategy": "in_place", "record": new_record}
+            # Strategia "in_place" nigdy nie usuwa rekordów - błąd PUT to błąd tego rekordu
+            if UPDATE_STRATEGY == "in_place" or self.in_place_supported is not False:
+                return None
+            logging.warning("⚠️  Everhour nie obsługuje aktualizacji rekordu w miejscu - używam DELETE + POST")
 
+        new_record = self.replace_time_record(record_id, new_time_seconds, original_record, task_id, user_id)
+        if new_record is None:
+            return None
+        return {"success": True, "strategy": "replace", "record": new_record}
+
+    def update_time_record_in_place(self, record_id, new_time_seconds, original_record, user_id):
+        """Zmienia czas istniejącego rekordu jednym zapytaniem PUT /time/{id}"""
+        update_url = f"{BASE_URL}/time/{record_id}"
+        new_data = {
+            "time": int(new_time_seconds),
+            "date": original_record.get('date'),
+            "user": user_id
+        }
+        if original_record.get('comment'):
+            new_data["comment"] = original_record.get('comment')
+        try:
+            RECORD_LOG.debug("Aktualizuję rekord: PUT %s", update_url)
+            response = self.http.put(update_url, headers=self.headers, json=new_data)
+            if response.status_code in IN_PLACE_UNSUPPORTED_STATUSES and UPDATE_STRATEGY == "auto" and self.in_place_supported is None:
+                # Endpoint niedostępny - przy strategii "auto" przełączamy się na DELETE + POST
+                self.in_place_supported = False
+                return None
+            response.raise_for_status()
+            self.in_place_supported = True
+            return response.json() if response.content else {"id": record_id}
+        except requests.exceptions.RequestException as e:
+            logging.error(f"❌ Błąd podczas aktualizacji rekordu {record_id}: {e}")
+            if hasattr(e, 'response') and e.response:
+                logging.error(f"Status: {e.response.status_code}")
+                logging.error(f"Odpowiedź: {e.response.text}")
+            return None
+
+    def replace_time_record(self, record_id, new_time_seconds, original_record, task_id, user_id):
+        """Zmienia czas rekordu przez DELETE /time/{id} i POST /tasks/{task_id}/time"""
         delete_url = f"{BASE_URL}/time/{record_id}"
         try:
-            if DEBUG:
-                logging.debug(f"Usuwam rekord: DELETE {delete_url}")
-            delete_response = requests.delete(delete_url, headers=self.headers)
-            delete_response.raise_for_status()
-            if SUPER_DEBUG:
-                logging.debug(f"Usunięcie - status: {delete_response.status_code}")
+            RECORD_LOG.debug("Usuwam rekord: DELETE %s", delete_url)
+            delete_response = self.http.delete(delete_url, headers=self.headers)
+            if delete_response.status_code == 404 and getattr(delete_response, "attempts", 1) > 1:
+                # Wcześniejsza próba usunęła rekord, ale odpowiedź nie dotarła (timeout, 5xx) - nie tracimy czasu, dodajemy nowy
+                logging.warning(f"⚠️  Rekord {record_id} usunięty przy wcześniejszej próbie DELETE - kontynuuję dodawanie")
+            else:
+                delete_response.raise_for_status()
+            RECORD_LOG.debug("Usunięcie - status: %s", delete_response.status_code)
         except requests.exceptions.RequestException as e:
             logging.error(f"❌ Błąd podczas usuwania rekordu {record_id}: {e}")
             if hasattr(e, 'response') and e.response:
@@ -168,15 +448,14 @@ class EverhourTimeMultiplier:
             new_data["comment"] = original_record.get('comment')
 
         try:
-            if DEBUG:
-                logging.debug(f"Dodaję nowy rekord: POST {add_url}")
-                logging.debug(f"Payload: {json.dumps(new_data, indent=2)}")
-            add_response = requests.post(add_url, headers=self.headers, json=new_data)
+            if RECORD_LOG.isEnabledFor(logging.DEBUG):
+                RECORD_LOG.debug("Dodaję nowy rekord: POST %s", add_url)
+                RECORD_LOG.debug("Payload: %s", json.dumps(new_data, indent=2))
+            add_response = self.http.post(add_url, headers=self.headers, json=new_data)
             add_response.raise_for_status()
             new_record = add_response.json()
-            if SUPER_DEBUG:
-                logging.debug(f"Nowy rekord utworzony: {json.dumps(new_record, indent=2)}")
-            logging.info(f"     ✅ Zaktualizowano czas na {hours:.2f}h")
+            if RECORD_LOG.isEnabledFor(logging.DEBUG):
+                RECORD_LOG.debug("Nowy rekord utworzony: %s", json.dumps(new_record, indent=2))
             if 'task' not in new_record or not new_record['task']:
                 logging.error(f"     ⚠️  UWAGA: Nowy rekord nie ma przypisanego taska!")
             return new_record
@@ -186,137 +465,741 @@ class EverhourTimeMultiplier:
                 logging.error(f"Status: {e.response.status_code}")
                 logging.error(f"Odpowiedź: {e.response.text}")
                 logging.error(f"⚠️  KRYTYCZNY BŁĄD: Usunięto rekord {record_id} ale nie udało się dodać nowego!")
-                logging.error(f"⚠️  Utracone dane: {hours:.2f}h dla zadania {task_id} użytkownika {user_id} z dnia {original_record.get('date')}")
+                logging.error(f"⚠️  Utracone dane: {new_time_seconds / 3600:.2f}h dla zadania {task_id} użytkownika {user_id} z dnia {original_record.get('date')}")
             return None
 
+    @metrics.timed("metadata")
+    def prefetch_metadata(self, records):
+        """Uzupełnia cache nazw zadań i projektów zbiorczo: jedna lista projektów i lista zadań
+        projektu zamiast zapytania o każdy rekord. Zadania podane tylko jako ID pobierane są
+        pojedynczo, ale raz - potem są w cache (także między uruchomieniami)."""
+        if not METADATA_PREFETCH:
+            return
+        cache = get_metadata_cache()
+        missing_projects = set()
+        task_projects = set()
+        bare_tasks = set()
+        for record in records:
+            task = record.get('task')
+            if not isinstance(task, dict):
+                if task is not None and not cache.has_task(task):
+                    bare_tasks.add(task)
+                continue
+            projects = task.get('projects') or []
+            project_id = projects[0] if projects else None
+            if project_id is None:
+                # Samo ID zadania (bez projektu) - nazwy nie da się pobrać zbiorczo
+                if task.get('name') is None and task.get('id') is not None and not cache.has_task(task['id']):
+                    bare_tasks.add(task['id'])
+                continue
+            if not isinstance(task.get('project'), dict) and not cache.has_project(project_id):
+                missing_projects.add(project_id)
+            if task.get('name') is None and task.get('id') is not None and not cache.has_task(task['id']):
+                task_projects.add(project_id)
+        if not (missing_projects or task_projects or bare_tasks):
+            return
+        
+        try:
+            if missing_projects:
+                response = self.http.get(f"{BASE_URL}/projects", headers=self.headers)
+                response.raise_for_status()
+                for project in response.json():
+                    cache.add_project(project.get('id'), project.get('name'))
+                for project_id in missing_projects:
+                    if not cache.has_project(project_id):
+                        cache.add_project(project_id, None)
+            for project_id in task_projects:
+                response = self.http.get(f"{BASE_URL}/projects/{project_id}/tasks", headers=self.headers)
+                response.raise_for_status()
+                for task in response.json():
+                    cache.add_task(task.get('id'), task.get('name'), project_id)
+            for task_id in bare_tasks:
+                response = self.http.get(f"{BASE_URL}/tasks/{task_id}", headers=self.headers)
+                if response.status_code == 404:
+                    cache.add_task(task_id, None)
+                    continue
+                response.raise_for_status()
+                task = response.json()
+                projects = task.get('projects') or []
+                cache.add_task(task_id, task.get('name'), projects[0] if projects else None)
+            logging.info(f"🏷️  Pobrano nazwy: {len(missing_projects)} projektów, zadania z {len(task_projects)} projektów, {len(bare_tasks)} pojedynczych zadań")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # Brak nazw nie blokuje przetwarzania - zostaną pokazane ID
+            logging.warning(f"⚠️  Nie udało się pobrać nazw zadań i projektów: {e}")
+        cache.save()
+
     def get_task_name(self, task_data):
         if task_data is None:
             return "Bez zadania"
-        if isinstance(task_data, str):
-            return f"Zadanie ID: {task_data}"
-        if isinstance(task_data, dict):
-            return task_data.get('name', f"Zadanie ID: {task_data.get('id', 'Nieznane')}")
-        return "Nieznane zadanie"
+        if isinstance(task_data, dict) and task_data.get('name') is not None:
+            return task_data['name']
+        task_id = task_data.get('id') if isinstance(task_data, dict) else task_data
+        if task_id is None:
+            return "Zadanie ID: Nieznane" if isinstance(task_data, dict) else "Nieznane zadanie"
+        cached = get_metadata_cache().task(task_id)
+        if cached and cached[0]:
+            return cached[0]
+        return f"Zadanie ID: {task_id}"
 
     def get_project_name(self, task_data):
-        if not isinstance(task_data, dict):
+        if isinstance(task_data, str):
+            cached = get_metadata_cache().task(task_data)
+            project_id = cached[1] if cached else None
+        elif isinstance(task_data, dict):
+            if 'project' in task_data and isinstance(task_data['project'], dict):
+                return task_data['project'].get('name', 'Bez nazwy projektu')
+            projects = task_data.get('projects', [])
+            project_id = projects[0] if projects and isinstance(projects, list) else None
+        else:
             return "Bez projektu"
-        if 'project' in task_data and isinstance(task_data['project'], dict):
-            return task_data['project'].get('name', 'Bez nazwy projektu')
-        projects = task_data.get('projects', [])
-        if projects and isinstance(projects, list) and len(projects) > 0:
-            return f"Projekt ID: {projects[0]}"
-        return "Bez projektu"
-
-    def process_user_time(self, user_id, date, user_name="", multiplier=None):
-        # Użyj indywidualnego mnożnika lub domyślnego
-        effective_multiplier = multiplier if multiplier is not None else TIME_MULTIPLIER
-        
-        if DRY_RUN:
-            logging.info(f"🧪 [DRY RUN] Przetwarzanie czasu dla użytkownika {user_name} ({user_id}) z dnia {date} [Mnożnik: {effective_multiplier}x]")
+        if project_id is None:
+            return "Bez projektu"
+        return get_metadata_cache().project_name(project_id) or f"Projekt ID: {project_id}"
+
+    def plan_record(self, record, multiplier):
+        """Decyduje, co zrobić z rekordem (bez żadnych zapisów) - zwraca wpis planu"""
+        original_time_seconds = record.get('time', 0)
+        task_data = record.get('task')
+        entry = {
+            "record_id": record.get('id'),
+            "user_id": self.get_record_user_id(record),
+            "date": record.get('date'),
+            "task_id": task_data.get('id') if isinstance(task_data, dict) else task_data,
+            "task_name": self.get_task_name(task_data),
+            "project_name": self.get_project_name(task_data),
+            "original_time": original_time_seconds,
+            "new_time": original_time_seconds,
+            "multiplier": multiplier,
+            "action": "skip",
+            "reason": None
+        }
+        if record.get('comment'):
+            entry["comment"] = record.get('comment')
+        if original_time_seconds <= 0:
+            entry["reason"] = "zero_time"
+        elif not task_data:
+            entry["reason"] = "no_task"
+        elif self.is_record_processed(entry["date"], entry["user_id"], entry["task_id"], entry["record_id"]):
+            entry["reason"] = "already_processed"
+            written_time = self.processed_store.get_written_time(entry["date"], entry["record_id"])
+            if written_time is not None and original_time_seconds != written_time:
+                # Pracownik zmienił rekord po przetworzeniu - mnożymy tylko dopisany czas, zmniejszenia nie ruszamy
+                entry["reason"] = "edited"
+                entry["written_time"] = written_time
+                if original_time_seconds > written_time:
+                    entry["action"] = "update"
+                    entry["new_time"] = written_time + int((original_time_seconds - written_time) * multiplier)
         else:
-            logging.info(f"Przetwarzanie czasu dla użytkownika {user_name} ({user_id}) z dnia {date} [Mnożnik: {effective_multiplier}x]")
-        
+            # Używamy indywidualnego mnożnika
+            entry["action"] = "update"
+            entry["new_time"] = int(original_time_seconds * multiplier)
+        return entry
+
+    @metrics.timed("plan")
+    def plan_user_records(self, time_records, multiplier):
+        entries = []
+        for i, record in enumerate(time_records):
+            try:
+                entries.append(self.plan_record(record, multiplier))
+            except Exception as e:
+                logging.error(f"Błąd podczas przetwarzania rekordu {i}: {e}")
+        return entries
+
+    @metrics.timed("writes")
+    def apply_entry(self, entry, plan_id=None):
+        """Wykonuje jeden wpis planu i oznacza rekord jako przetworzony"""
+        record = {
+            "id": entry["record_id"],
+            "task": entry["task_id"],
+            "user": entry["user_id"],
+            "date": entry["date"]
+        }
+        if entry.get("comment"):
+            record["comment"] = entry["comment"]
+        result = self.update_time_record(entry["record_id"], entry["new_time"], record, entry["multiplier"])
         if not DRY_RUN:
-            backup_file = self.backup_user_records(user_id, date)
-            if backup_file:
-                logging.info(f"✅ Backup utworzony: {backup_file}")
-        
-        time_records = self.get_user_time_records(user_id, date)
-        if not time_records:
-            logging.warning(f"Brak rekordów czasu dla użytkownika {user_id}")
-            return None
-        
+            if self.response_cache is not None:
+                # Po zapisie pobrane wcześniej rekordy tego dnia są nieaktualne
+                self.response_cache.invalidate(entry["user_id"], entry["date"])
+            if result:
+                # Przy DELETE + POST zapamiętujemy też nowe ID - nowy rekord nie zostanie pomnożony ponownie
+                new_record_id = (result.get("record") or {}).get("id") if result.get("strategy") == "replace" else None
+                self.mark_record_as_processed(entry["date"], entry["user_id"], entry["record_id"], new_record_id, entry["new_time"], entry["original_time"])
+            if plan_id:
+                self.processed_store.mark_plan_entry(plan_id, entry["record_id"], "done" if result else "failed")
+        return result
+
+    def execute_entries(self, entries, plan_id=None):
+        """Wykonuje wpisy planu jednego użytkownika po kolei i zwraca podsumowanie"""
         total_original_time = 0
         total_updated_time = 0
         successful_updates = 0
-        skipped_no_task = 0
-        skipped_zero_time = 0
-        skipped_already_processed = 0
+        failed_updates = 0
+        edited_updates = 0
+        skipped = {"no_task": 0, "zero_time": 0, "already_processed": 0, "stale": 0, "edited": 0}
+        strategies = {}
+        # Wpisy jednego wywołania dotyczą jednego pracownika i dnia - każda linia dostaje ich prefiks
+        unit = {"user_id": entries[0]["user_id"], "date": entries[0]["date"]} if entries else {"user_id": "-", "date": "-"}
+        record_log = UnitLogAdapter(RECORD_LOG, unit)
+        user_log = UnitLogAdapter(USER_LOG, unit)
         
-        logging.info(f"Znaleziono {len(time_records)} rekordów:")
-        for i, record in enumerate(time_records):
+        user_log.info("Znaleziono %d rekordów:", len(entries))
+        # Linie dla pojedynczych rekordów są budowane tylko, gdy logger je przepuści (i wypadnie próbka)
+        log_records = RECORD_LOG.isEnabledFor(logging.INFO)
+        for i, entry in enumerate(entries):
             try:
-                record_id = record.get('id')
-                original_time_seconds = record.get('time', 0)
-                if SUPER_DEBUG:
-                    logging.debug(f"\n--- REKORD {i+1} ---")
-                    logging.debug(f"ID: {record_id}")
-                    logging.debug(f"Time: {original_time_seconds}")
-                    logging.debug(f"User: {record.get('user')}")
-                if original_time_seconds <= 0:
-                    logging.warning(f"  ⚠️  Pomijam rekord {record_id} - czas = {original_time_seconds}")
-                    skipped_zero_time += 1
-                    continue
-                task_data = record.get('task')
-                task_name = self.get_task_name(task_data)
-                project_name = self.get_project_name(task_data)
-                if not task_data:
-                    logging.warning(f"  ⚠️  Pomijam rekord {record_id} - brak przypisanego zadania")
-                    skipped_no_task += 1
+                record_id = entry["record_id"]
+                original_time_seconds = entry["original_time"]
+                record_log.debug("--- REKORD %d --- ID: %s, Time: %s, User: %s", i + 1, record_id, original_time_seconds, entry['user_id'])
+                log_entry = log_records and record_sampler.sample()
+                if entry["action"] == "skip":
+                    reason = entry.get("reason")
+                    skipped[reason] = skipped.get(reason, 0) + 1
+                    metrics.record_result(f"skipped_{reason}")
+                    if reason == "zero_time":
+                        record_log.warning("  ⚠️  Pomijam rekord %s - czas = %s", record_id, original_time_seconds)
+                    elif reason == "no_task":
+                        record_log.warning("  ⚠️  Pomijam rekord %s - brak przypisanego zadania", record_id)
+                    elif reason == "stale":
+                        record_log.warning("  ⚠️  [%s] %s - rekord zmienił się od utworzenia planu, pomijam", entry["project_name"], entry["task_name"])
+                    elif reason == "edited":
+                        record_log.warning("  ⚠️  [%s] %s - czas zmniejszony po przetworzeniu (%.2fh → %.2fh), nie zmieniam", entry["project_name"], entry["task_name"], entry["written_time"] / 3600, original_time_seconds / 3600)
+                    elif log_entry:
+                        record_log.info("  ⏭️  [%s] %s - już przetworzony, pomijam", entry["project_name"], entry["task_name"])
                     continue
-                task_id = task_data.get('id') if isinstance(task_data, dict) else task_data
-                user_id_from_record = record.get('user')
-                if isinstance(user_id_from_record, dict):
-                    user_id_from_record = user_id_from_record.get('id')
-                if self.is_record_processed(record.get('date'), user_id_from_record, task_id):
-                    logging.info(f"  ⏭️  [{project_name}] {task_name} - już przetworzony, pomijam")
-                    skipped_already_processed += 1
-                    continue
-                
-                # Używamy indywidualnego mnożnika
-                new_time_seconds = int(original_time_seconds * effective_multiplier)
-                original_hours = original_time_seconds / 3600
-                new_hours = new_time_seconds / 3600
                 
-                logging.info(f"  📋 [{project_name}] {task_name}:")
-                logging.info(f"     ⏱️  {original_hours:.2f}h → {new_hours:.2f}h (+{new_hours - original_hours:.2f}h) [×{effective_multiplier}]")
+                new_time_seconds = entry["new_time"]
+                if entry.get("reason") == "edited":
+                    # Zmiany rekordów już przetworzonych logujemy zawsze (bez próbkowania)
+                    record_log.warning("  ✏️  [%s] %s - rekord zmieniony po przetworzeniu (%.2fh → %.2fh), mnożę dopisany czas", entry["project_name"], entry["task_name"], entry["written_time"] / 3600, original_time_seconds / 3600)
+                if log_entry:
+                    original_hours = original_time_seconds / 3600
+                    new_hours = new_time_seconds / 3600
+                    record_log.info("  📋 [%s] %s:", entry["project_name"], entry["task_name"])
+                    record_log.info("     ⏱️  %.2fh → %.2fh (+%.2fh) [×%s]", original_hours, new_hours, new_hours - original_hours, entry['multiplier'])
                 
-                result = self.update_time_record(record_id, new_time_seconds, record, effective_multiplier)
+                result = self.apply_entry(entry, plan_id)
+                metrics.record_result("updated" if result else "failed")
                 if result:
                     total_original_time += original_time_seconds
                     total_updated_time += new_time_seconds
                     successful_updates += 1
-                    if not DRY_RUN:
-                        self.mark_record_as_processed(record.get('date'), user_id_from_record, task_id)
+                    if entry.get("reason") == "edited":
+                        edited_updates += 1
+                    strategy = result.get("strategy", UPDATE_STRATEGY)
+                    strategies[strategy] = strategies.get(strategy, 0) + 1
+                    if log_entry:
+                        if not DRY_RUN:
+                            record_log.info("     ✅ Zaktualizowano czas na %.2fh", new_time_seconds / 3600)
+                        elif UPDATE_STRATEGY == "replace":
+                            record_log.info("     🧪 [DRY RUN] Usunąłbym rekord %s i dodał nowy z czasem %.2fh (mnożnik %sx)", record_id, new_time_seconds / 3600, entry['multiplier'])
+                        else:
+                            record_log.info("     🧪 [DRY RUN] Zmieniłbym czas rekordu %s na %.2fh (mnożnik %sx)", record_id, new_time_seconds / 3600, entry['multiplier'])
                 else:
+                    failed_updates += 1
                     if not DRY_RUN:
-                        logging.error(f"     ❌ Błąd aktualizacji")
+                        record_log.error("     ❌ Błąd aktualizacji rekordu %s", record_id)
             except Exception as e:
-                logging.error(f"Błąd podczas przetwarzania rekordu {i}: {e}")
+                record_log.error("Błąd podczas przetwarzania rekordu %d: %s", i, e)
                 if SUPER_DEBUG:
                     import traceback
                     logging.debug(f"Traceback: {traceback.format_exc()}")
                 
-        logging.info("")
-        logging.info("📊 PODSUMOWANIE:")
-        logging.info(f"   Znalezionych rekordów: {len(time_records)}")
-        logging.info(f"   Przetworzonych rekordów: {successful_updates}")
-        logging.info(f"   Pominiętych (brak zadania): {skipped_no_task}")
-        logging.info(f"   Pominiętych (zero czasu): {skipped_zero_time}")
-        logging.info(f"   Pominiętych (już przetworzone): {skipped_already_processed}")
-        
         summary = {
-            "total_records": len(time_records),
+            "total_records": len(entries),
             "processed": successful_updates,
-            "original_hours": 0,
-            "updated_hours": 0
+            "failed": failed_updates,
+            "edited": edited_updates,
+            "strategies": strategies,
+            "original_hours": total_original_time / 3600 if total_original_time > 0 else 0,
+            "updated_hours": total_updated_time / 3600 if total_original_time > 0 else 0
         }
+        if USER_LOG.isEnabledFor(logging.INFO):
+            self.log_user_summary(summary, skipped, user_log)
+        return summary
+
+    def log_user_summary(self, summary, skipped, log=USER_LOG):
+        # Jedna linia logu (wieloliniowa) - przy przetwarzaniu równoległym podsumowanie się nie rozsypuje
+        lines = [
+            "📊 PODSUMOWANIE:",
+            f"   Znalezionych rekordów: {summary['total_records']}",
+            f"   Przetworzonych rekordów: {summary['processed']}",
+            f"   Pominiętych (brak zadania): {skipped['no_task']}",
+            f"   Pominiętych (zero czasu): {skipped['zero_time']}",
+            f"   Pominiętych (już przetworzone): {skipped['already_processed']}",
+        ]
+        if summary["edited"]:
+            lines.append(f"   Zmienionych po przetworzeniu (dopisany czas pomnożony): {summary['edited']}")
+        if skipped["edited"]:
+            lines.append(f"   Pominiętych (czas zmniejszony po przetworzeniu): {skipped['edited']}")
+        if skipped["stale"]:
+            lines.append(f"   Pominiętych (zmienione od utworzenia planu): {skipped['stale']}")
+        if summary["failed"]:
+            lines.append(f"   Błędów aktualizacji: {summary['failed']}")
+        if summary["strategies"]:
+            lines.append(f"   Sposób aktualizacji: {', '.join(f'{name}={count}' for name, count in sorted(summary['strategies'].items()))}")
+        if summary["original_hours"]:
+            original_hours = summary["original_hours"]
+            updated_hours = summary["updated_hours"]
+            lines.append(f"   Czas oryginalny: {original_hours:.2f}h")
+            lines.append(f"   Czas po aktualizacji: {updated_hours:.2f}h")
+            lines.append(f"   Różnica: +{updated_hours - original_hours:.2f}h")
+        log.info("\n".join(lines))
+
+    def process_user_time(self, user_id, date, user_name="", multiplier=None, time_records=None):
+        # Użyj indywidualnego mnożnika lub domyślnego
+        effective_multiplier = multiplier if multiplier is not None else TIME_MULTIPLIER
         
-        if total_original_time > 0:
-            original_hours = total_original_time / 3600
-            updated_hours = total_updated_time / 3600
-            diff_hours = updated_hours - original_hours
-            logging.info(f"   Czas oryginalny: {original_hours:.2f}h")
-            logging.info(f"   Czas po aktualizacji: {updated_hours:.2f}h")
-            logging.info(f"   Różnica: +{diff_hours:.2f}h")
-            
-            summary["original_hours"] = original_hours
-            summary["updated_hours"] = updated_hours
+        if DRY_RUN:
+            USER_LOG.info("🧪 [DRY RUN] Przetwarzanie czasu dla użytkownika %s (%s) z dnia %s [Mnożnik: %sx]", user_name, user_id, date, effective_multiplier)
+        else:
+            USER_LOG.info("Przetwarzanie czasu dla użytkownika %s (%s) z dnia %s [Mnożnik: %sx]", user_name, user_id, date, effective_multiplier)
+        
+        # Backup i przetwarzanie korzystają z tego samego zestawu rekordów
+        if time_records is None:
+            time_records = self.get_user_time_records(user_id, date, allow_stale=DRY_RUN)
+            if time_records is None:
+                # Błąd pobierania to błąd przetwarzania, a nie "brak rekordów" - dzień nie może zostać oznaczony jako zrobiony
+                raise RuntimeError(f"nie udało się pobrać rekordów czasu z dnia {date}")
+        
+        if not DRY_RUN:
+            backup_file = self.backup_user_records(user_id, date, time_records)
+            if backup_file:
+                USER_LOG.info("[%s %s] ✅ Backup utworzony: %s", user_id, date, backup_file)
+        
+        if not time_records:
+            logging.warning(f"Brak rekordów czasu dla użytkownika {user_id}")
+            return None
         
+        entries = self.plan_user_records(time_records, effective_multiplier)
+        summary = self.execute_entries(entries)
+        if DRY_RUN:
+            # W trybie testowym wpisy trafiają do pliku planu (szczegółowy raport)
+            summary["entries"] = entries
         return summary
 
-    def run_daily_update(self, process_date=None, employees_list=None):
+    @staticmethod
+    def parse_employee(employee):
+        """Zamienia wpis z listy pracowników na (id, nazwa, mnożnik)"""
+        if isinstance(employee, tuple) and len(employee) >= 3:
+            return tuple(employee[:3])
+        if isinstance(employee, tuple) and len(employee) == 2:
+            return employee[0], employee[1], TIME_MULTIPLIER
+        return employee, "", TIME_MULTIPLIER
+
+    def process_employee(self, user_id, user_name, user_multiplier, process_date, snapshot=None, checkpoint_job=None, lease_done=True):
+        """Przetwarza jednego pracownika - zwraca (sukces, podsumowanie).
+
+        Przy podziale pracy między repliki (SHARDING) pracownik jest pomijany, jeśli jego dzień
+        przetwarza lub przetworzyła inna replika. lease_done=False zwalnia dzierżawę po udanym
+        przetworzeniu zamiast oznaczać dzień jako zakończony (tryb przyrostowy).
+        """
+        if self.leases is not None and not self.leases.claim(process_date, user_id):
+            USER_LOG.info("🔒 %s (%s) z dnia %s - przetwarza inna replika, pomijam", user_name, user_id, process_date)
+            return True, None
+        time_records = None
+        if snapshot is not None:
+            time_records = self.get_snapshot_records(snapshot, user_id, process_date)
+        try:
+            summary = self.process_user_time(user_id, process_date, user_name, user_multiplier, time_records)
+            # Dzień bez żadnej zmiany (wszystko już przetworzone) nie trafia do logów dashboard
+            if summary and (summary.get("processed") or summary.get("failed")) and not DRY_RUN:
+                send_log_to_dashboard(user_id, user_name, process_date, summary)
+            # Dzień z nieudanymi zapisami nie jest oznaczany jako zrobiony - wznowienie spróbuje ponownie
+            ok = not (summary and summary.get("failed"))
+            if ok and checkpoint_job and not DRY_RUN:
+                self.processed_store.mark_checkpoint(checkpoint_job, process_date, user_id)
+            if self.leases is not None:
+                if ok and lease_done and not DRY_RUN:
+                    self.leases.complete(process_date, user_id)
+                else:
+                    self.leases.release(process_date, user_id)
+            return ok, summary
+        except Exception as e:
+            logging.error(f"Błąd podczas przetwarzania użytkownika {user_id}: {e}")
+            if self.leases is not None:
+                self.leases.release(process_date, user_id)
+            return False, None
+
+    def process_employees(self, employees, process_date, snapshot=None, checkpoint_job=None, lease_done=True):
+        """Przetwarza listę pracowników - równolegle, jeśli MAX_WORKERS > 1"""
+        # Rekordy przetworzone w międzyczasie przez inne procesy (repliki, wcześniejszy backfill)
+        self.processed_store.refresh()
+        workers = max(1, min(int(MAX_WORKERS), len(employees)))
+        if workers == 1:
+            return [self.process_employee(*employee, process_date, snapshot, checkpoint_job, lease_done) for employee in employees]
+        
+        logging.info(f"⚙️  Przetwarzanie równoległe: {workers} wątków")
+        # Każdy pracownik jest obsługiwany w całości przez jeden wątek, więc kolejność operacji
+        # w obrębie użytkownika się nie zmienia. Limit zapytań jest wspólny (klient HTTP).
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="employee") as executor:
+            futures = [
+                executor.submit(self.process_employee, *employee, process_date, snapshot, checkpoint_job, lease_done)
+                for employee in employees
+            ]
+            return [future.result() for future in futures]
+
+    def log_run_totals(self, summaries):
+        total_records = sum(summary.get("total_records", 0) for summary in summaries)
+        total_processed = sum(summary.get("processed", 0) for summary in summaries)
+        original_hours = sum(summary.get("original_hours", 0) for summary in summaries)
+        updated_hours = sum(summary.get("updated_hours", 0) for summary in summaries)
+        logging.info("📊 PODSUMOWANIE CAŁOŚCI:")
+        strategies = {}
+        for summary in summaries:
+            for name, count in summary.get("strategies", {}).items():
+                strategies[name] = strategies.get(name, 0) + count
+        logging.info(f"   Rekordów: {total_records}, przetworzonych: {total_processed}")
+        if strategies:
+            logging.info(f"   Sposób aktualizacji: {', '.join(f'{name}={count}' for name, count in sorted(strategies.items()))}")
+        logging.info(f"   Czas oryginalny: {original_hours:.2f}h → po aktualizacji: {updated_hours:.2f}h (+{updated_hours - original_hours:.2f}h)")
+
+    def reclaim_expired_leases(self, employees):
+        """Dokańcza dni porzucone przez repliki, które przestały działać w trakcie pracy"""
+        by_date = {}
+        for date_key, user_id in self.leases.expired_units():
+            by_date.setdefault(date_key, set()).add(user_id)
+        known = {str(employee[0]): employee for employee in employees}
+        results = []
+        for date_key, user_ids in sorted(by_date.items()):
+            pending = [known[user_id] for user_id in sorted(user_ids) if user_id in known]
+            if pending:
+                logging.info(f"♻️  {date_key}: dokańczam pracę porzuconą przez inną replikę ({len(pending)} pracowników)")
+                results.extend(self.process_employees(pending, datetime.strptime(date_key, "%Y-%m-%d").date()))
+        return results
+
+    def resolve_employees(self, employees_list=None):
+        # Użyj przekazanej listy lub pobierz z dashboard/env
+        if employees_list is None:
+            employees_list = get_employees_from_dashboard()
+            if not employees_list:
+                employees_list = [(emp_id.strip(), "", TIME_MULTIPLIER) for emp_id in EMPLOYEES_WITH_MULTIPLIER if emp_id.strip()]
+        return [self.parse_employee(employee) for employee in employees_list]
+
+    def run_backfill(self, date_from, date_to, employees_list=None):
+        """Przetwarza zakres dat - paczkami dni, z zapisem postępu po każdym użytkowniku i dniu"""
+        if date_to < date_from:
+            logging.error(f"Nieprawidłowy zakres dat: {date_from} - {date_to}")
+            return
+        job = f"backfill:{date_from}:{date_to}"
+        report = metrics.start_run("backfill")
+        if DRY_RUN:
+            logging.info("🧪 [DRY RUN] Backfill bez zapisu postępu")
+        logging.info(f"=== Backfill {date_from} - {date_to} ===")
+        
+        employees = self.resolve_employees(employees_list)
+        done = self.processed_store.get_checkpoints(job, date_from, date_to)
+        if done:
+            logging.info(f"⏩ Wznawiam backfill - {len(done)} par (dzień, pracownik) już zakończonych")
+        
+        all_results = []
+        chunk_start = date_from
+        while chunk_start <= date_to:
+            chunk_end = min(date_to, chunk_start + timedelta(days=BACKFILL_CHUNK_DAYS - 1))
+            days = [chunk_start + timedelta(days=i) for i in range((chunk_end - chunk_start).days + 1)]
+            pending = {
+                day: [e for e in employees if (str(day), str(e[0])) not in done]
+                for day in days
+            }
+            if any(pending.values()):
+                snapshot = None
+                if BULK_FETCH:
+                    user_ids = {e[0] for day_employees in pending.values() for e in day_employees}
+                    snapshot = self.get_team_time_records(chunk_start, chunk_end, user_ids, allow_stale=DRY_RUN)
+                for day in days:
+                    if not pending[day]:
+                        continue
+                    logging.info(f"📅 Backfill: {day} ({len(pending[day])} pracowników)")
+                    results = self.process_employees(pending[day], day, snapshot, checkpoint_job=job)
+                    all_results.extend(results)
+                    if snapshot is not None:
+                        # Przetworzone dni zwalniamy od razu, nie czekając na koniec paczki
+                        for user_id, _, _ in pending[day]:
+                            snapshot.pop((str(user_id), day.strftime("%Y-%m-%d")), None)
+                    if not DRY_RUN and all(ok for ok, _ in results):
+                        self.processed_dates.add(day.strftime("%Y-%m-%d"))
+                flush_dashboard_reporter()
+            chunk_start = chunk_end + timedelta(days=1)
+        
+        success_count = sum(1 for ok, _ in all_results if ok)
+        self.log_run_totals([summary for _, summary in all_results if summary])
+        metrics.finish_run(report, REPORTS_DIR)
+        logging.info(f"=== Backfill zakończony. Sukces: {success_count}, Błędy: {len(all_results) - success_count} ===")
+
+    def run_incremental_update(self, employees_list=None, today=None):
+        """Przetwarza tylko rekordy dodane lub zmienione od poprzedniego sprawdzenia (znacznik na użytkownika i dzień)"""
+        today = today or datetime.now().date()
+        date_from = today - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+        employees = self.resolve_employees(employees_list)
+        if not employees:
+            logging.warning("Brak listy pracowników!")
+            return None
+        report = metrics.start_run("incremental")
+        
+        # Everhour nie filtruje rekordów po dacie zmiany, więc pobieramy całe dni jednym zapytaniem
+        # zespołowym, a dalej (backup, plan, zapisy) trafiają tylko rekordy nowsze niż znacznik
+        snapshot = self.get_team_time_records(date_from, today, [e[0] for e in employees])
+        if snapshot is None:
+            logging.warning("⚠️  Nie udało się pobrać rekordów zespołu - pomijam to sprawdzenie")
+            metrics.finish_run(report, REPORTS_DIR)
+            return None
+        
+        all_results = []
+        day = date_from
+        while day <= today:
+            date_key = day.strftime("%Y-%m-%d")
+            marks = self.processed_store.get_watermarks(date_key)
+            changed = {}
+            new_marks = {}
+            for user_id, _, _ in employees:
+                last_mark = marks.get(str(user_id))
+                records = self.get_snapshot_records(snapshot, user_id, day)
+                record_marks = [self.get_record_change_mark(record) for record in records]
+                # Rekordy bez znacznika zmiany przechodzą zawsze - powtórne przetworzenie blokuje baza przetworzonych
+                fresh = [
+                    record for record, mark in zip(records, record_marks)
+                    if mark is None or last_mark is None or mark > last_mark
+                ]
+                if not fresh:
+                    continue
+                new_mark = max((mark for mark in record_marks if mark), default=None)
+                # Nasz własny zapis (PUT) też przesuwa updatedAt - takie rekordy tylko przesuwają znacznik
+                fresh = [record for record in fresh if not self.is_own_write(record)]
+                if fresh:
+                    changed[(str(user_id), date_key)] = fresh
+                    new_marks[str(user_id)] = new_mark
+                elif new_mark and not DRY_RUN:
+                    self.processed_store.set_watermark(date_key, user_id, new_mark)
+            pending = [e for e in employees if (str(e[0]), date_key) in changed]
+            if pending:
+                logging.info(f"🔄 {day}: nowe lub zmienione rekordy u {len(pending)} pracowników ({sum(len(r) for r in changed.values())} rekordów)")
+                results = self.process_employees(pending, day, changed, lease_done=False)
+                for (user_id, _, _), (ok, summary) in zip(pending, results):
+                    mark = new_marks.get(str(user_id))
+                    # Znacznik przesuwamy tylko po udanym przetworzeniu - nieudane rekordy wrócą przy następnym sprawdzeniu
+                    if ok and mark and not DRY_RUN and not (summary and summary.get("failed")):
+                        self.processed_store.set_watermark(date_key, user_id, mark)
+                all_results.extend(results)
+            day += timedelta(days=1)
+        
+        if all_results:
+            flush_dashboard_reporter()
+            self.log_run_totals([summary for _, summary in all_results if summary])
+        else:
+            logging.info("🔄 Brak nowych lub zmienionych rekordów")
+        metrics.finish_run(report, REPORTS_DIR)
+        return all_results
+
+    def restore_unit(self, user_id, date_key, originals, current):
+        """Przywraca czas rekordów jednego pracownika z jednego dnia - zwraca (sukces, wpisy)"""
+        entries = diff_records(
+            originals,
+            current,
+            self.processed_store.get_replacement,
+            lambda record_id: self.processed_store.get_added_time(date_key, user_id, record_id)
+        )
+        if not DRY_RUN and current:
+            # Aktualny stan też trafia do backupu, więc samo przywrócenie można cofnąć
+            self.backup_user_records(user_id, date_key, current)
+        failed = 0
+        for entry in entries:
+            if entry["action"] != "restore":
+                if entry["reason"] == "missing":
+                    RECORD_LOG.warning("  ⚠️  Rekord %s (zadanie %s, %.2fh) nie istnieje już w Everhour - nie odtwarzam", entry["source_record_id"], entry["task_id"], entry["new_time"] / 3600)
+                elif entry["reason"] == "edited":
+                    RECORD_LOG.warning("  ⚠️  %s (%s) rekord %s: czas zmniejszony po przetworzeniu (%.2fh) poniżej dodanego czasu - nie zmieniam", user_id, date_key, entry["record_id"], entry["original_time"] / 3600)
+                continue
+            if entry.get("kept_time"):
+                RECORD_LOG.warning("  ✏️  %s (%s) rekord %s: zachowuję zmianę spoza mnożnika (%+.2fh), odejmuję tylko dodany czas", user_id, date_key, entry["record_id"], entry["kept_time"] / 3600)
+            record = {
+                "id": entry["record_id"],
+                "task": entry["task_id"],
+                "user": entry["user_id"],
+                "date": entry["date"]
+            }
+            if entry.get("comment"):
+                record["comment"] = entry["comment"]
+            RECORD_LOG.info("  ↩️  %s (%s) rekord %s: %.2fh → %.2fh", user_id, date_key, entry["record_id"], entry["original_time"] / 3600, entry["new_time"] / 3600)
+            result = self.update_time_record(entry["record_id"], entry["new_time"], record, None)
+            metrics.record_result("restored" if result else "failed")
+            entry["status"] = "done" if result else "failed"
+            if not result:
+                failed += 1
+        if not DRY_RUN and self.response_cache is not None:
+            self.response_cache.invalidate(user_id, date_key)
+        if not DRY_RUN and not failed:
+            # Dzień wraca do stanu "nieprzetworzony" - można go ponownie przeliczyć (np. z poprawionym mnożnikiem)
+            self.processed_store.remove(date_key, user_id)
+            if self.leases is not None:
+                self.leases.reset(date_key, user_id)
+        return failed == 0, entries
+
+    def run_restore(self, date_from, date_to, user_ids=None):
+        """Cofa zmiany z zakresu dat: odejmuje czas dodany przez mnożnik (bez historii zapisów - wraca
+        do najstarszych backupów) i czyści bazę przetworzonych"""
+        units = self.backup_store.units(date_from, date_to)
+        if user_ids:
+            wanted = {str(user_id) for user_id in user_ids}
+            units = [unit for unit in units if unit[0] in wanted]
+        if not units:
+            logging.warning(f"Brak backupów z zakresu {date_from} - {date_to}")
+            return None
+        if DRY_RUN:
+            logging.info("🧪 [DRY RUN] Przywracanie bez zmian w Everhour i w bazie przetworzonych")
+        logging.info(f"=== Przywracanie z backupów {date_from} - {date_to} ({len(units)} dni pracowników) ===")
+        report = metrics.start_run("restore")
+
+        # Aktualny stan całego zakresu jednym zapytaniem zespołowym - różnice liczone są lokalnie
+        snapshot = self.get_team_time_records(date_from, date_to, {user_id for user_id, _ in units})
+        if snapshot is None:
+            logging.error("❌ Nie udało się pobrać aktualnych rekordów - przerywam przywracanie")
+            metrics.finish_run(report, REPORTS_DIR)
+            return None
+
+        def restore(unit):
+            user_id, date_key = unit
+            try:
+                originals = self.backup_store.load_originals(user_id, date_key)
+                return self.restore_unit(user_id, date_key, originals, snapshot.get((user_id, date_key), []))
+            except Exception as e:
+                logging.error(f"Błąd podczas przywracania użytkownika {user_id} z dnia {date_key}: {e}")
+                return False, []
+
+        # Zapisy idą równolegle, a wspólny klient HTTP pilnuje limitu zapytań Everhour
+        workers = max(1, min(int(MAX_WORKERS), len(units)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="restore") as executor:
+            results = list(executor.map(restore, units))
+        flush_dashboard_reporter()
+
+        entries = [entry for _, unit_entries in results for entry in unit_entries]
+        restored = [entry for entry in entries if entry.get("status") == "done"]
+        success_count = sum(1 for ok, _ in results if ok)
+        logging.info("📊 PODSUMOWANIE PRZYWRACANIA:")
+        logging.info(f"   Wpisy: {count_actions(entries)}")
+        if restored:
+            before_hours = sum(entry["original_time"] for entry in restored) / 3600
+            after_hours = sum(entry["new_time"] for entry in restored) / 3600
+            logging.info(f"   Czas przed: {before_hours:.2f}h → po przywróceniu: {after_hours:.2f}h ({after_hours - before_hours:+.2f}h)")
+        metrics.finish_run(report, REPORTS_DIR)
+        logging.info(f"=== Przywracanie zakończone. Sukces: {success_count}, Błędy: {len(results) - success_count} ===")
+        if restored and not DRY_RUN and INCREMENTAL_INTERVAL_MINUTES > 0:
+            logging.warning("⚠️  Tryb przyrostowy jest włączony - przywrócone dni z ostatnich dni zostaną przy następnym sprawdzeniu przeliczone ponownie")
+        return results
+
+    def plan_header(self, dates, employees):
+        return {
+            "id": f"{dates[0]}_{int(time.time())}",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "dates": [str(date) for date in dates],
+            "dry_run": DRY_RUN,
+            "employees": {str(user_id): user_name for user_id, user_name, _ in employees}
+        }
+
+    def create_plan(self, process_date=None, employees_list=None, plan_file=None):
+        """Etap planowania: pobiera rekordy, robi backup i zapisuje plan zmian bez modyfikacji danych"""
+        if process_date is None:
+            process_date = datetime.now().date() - timedelta(days=1)
+        date_key = process_date.strftime("%Y-%m-%d")
+        plan_file = plan_file or os.path.join(PLANS_DIR, f"plan_{date_key}.jsonl")
+        logging.info(f"=== Tworzenie planu zmian za dzień {process_date} ===")
+        report = metrics.start_run("plan")
+        
+        employees = self.resolve_employees(employees_list)
+        snapshot = None
+        if BULK_FETCH:
+            snapshot = self.get_team_time_records(process_date, process_date, [e[0] for e in employees], allow_stale=DRY_RUN)
+        
+        entries = []
+        for user_id, user_name, user_multiplier in employees:
+            if snapshot is not None:
+                time_records = self.get_snapshot_records(snapshot, user_id, process_date)
+            else:
+                time_records = self.get_user_time_records(user_id, process_date, allow_stale=DRY_RUN)
+            if not time_records:
+                continue
+            if not DRY_RUN:
+                self.backup_user_records(user_id, process_date, time_records)
+            multiplier = user_multiplier if user_multiplier is not None else TIME_MULTIPLIER
+            entries.extend(self.plan_user_records(time_records, multiplier))
+        
+        flush_dashboard_reporter()
+        write_plan(plan_file, self.plan_header([process_date], employees), entries)
+        logging.info(f"📝 Plan zmian zapisany: {plan_file} {count_actions(entries)}")
+        metrics.finish_run(report, REPORTS_DIR)
+        return plan_file
+
+    def validate_plan(self, entries, snapshot):
+        """Oznacza jako nieaktualne wpisy, których rekord zmienił się od utworzenia planu"""
+        current_times = {
+            record.get('id'): record.get('time')
+            for records in snapshot.values() for record in records
+        }
+        for entry in entries:
+            if entry["action"] == "update" and current_times.get(entry["record_id"]) != entry["original_time"]:
+                entry["action"] = "skip"
+                entry["reason"] = "stale"
+
+    def apply_plan(self, plan_file):
+        """Etap wykonania: równolegle stosuje zapisany plan, śledząc postęp każdego wpisu.
+
+        Przed zapisami pobierany jest aktualny stan dni z planu - służy do sprawdzenia planu i jako backup,
+        więc zmiany z każdego planu (także z pliku DRY RUN, który nie robił backupu) można cofnąć.
+        """
+        header, entries = read_plan(plan_file)
+        plan_id = header["id"]
+        logging.info(f"=== Wykonywanie planu {plan_file} ({len(entries)} wpisów) ===")
+        report = metrics.start_run("apply_plan")
+        
+        progress = self.processed_store.get_plan_progress(plan_id)
+        for entry in entries:
+            if entry["action"] == "update" and progress.get(str(entry["record_id"])) == "done":
+                entry["action"] = "skip"
+                entry["reason"] = "already_processed"
+        
+        user_ids = {entry["user_id"] for entry in entries if entry["action"] == "update"}
+        snapshot = {}
+        if user_ids and (PLAN_VALIDATE or not DRY_RUN):
+            dates = sorted(datetime.strptime(date, "%Y-%m-%d").date() for date in header["dates"])
+            snapshot = self.get_team_time_records(dates[0], dates[-1], user_ids)
+            if snapshot is None:
+                logging.error("❌ Nie udało się pobrać aktualnego stanu Everhour (sprawdzenie planu i backup) - przerywam")
+                metrics.finish_run(report, REPORTS_DIR)
+                return None
+            if PLAN_VALIDATE:
+                self.validate_plan(entries, snapshot)
+        
+        entries_by_user = {}
+        for entry in entries:
+            entries_by_user.setdefault(str(entry["user_id"]), []).append(entry)
+        
+        def apply_user(user_id, user_entries):
+            try:
+                if not DRY_RUN:
+                    # Backup z aktualnego stanu przed pierwszym zapisem tego pracownika
+                    for date_key in sorted({entry["date"] for entry in user_entries if entry["action"] == "update"}):
+                        self.backup_user_records(user_id, date_key, snapshot.get((user_id, date_key), []))
+                summary = self.execute_entries(user_entries, plan_id)
+                if summary["processed"] and not DRY_RUN:
+                    user_name = header.get("employees", {}).get(user_id, "")
+                    send_log_to_dashboard(user_id, user_name, user_entries[0]["date"], summary)
+                return True, summary
+            except Exception as e:
+                logging.error(f"Błąd podczas przetwarzania użytkownika {user_id}: {e}")
+                return False, None
+        
+        workers = max(1, min(int(MAX_WORKERS), len(entries_by_user) or 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plan") as executor:
+            futures = [executor.submit(apply_user, user_id, user_entries) for user_id, user_entries in entries_by_user.items()]
+            results = [future.result() for future in futures]
+        flush_dashboard_reporter()
+        
+        success_count = sum(1 for ok, _ in results if ok)
+        self.log_run_totals([summary for _, summary in results if summary])
+        metrics.finish_run(report, REPORTS_DIR)
+        logging.info(f"=== Plan wykonany. Sukces: {success_count}, Błędy: {len(results) - success_count} ===")
+        return results
+
+    def run_daily_update(self, process_date=None, employees_list=None, checkpoint_job=None):
         if process_date is None:
             process_date = datetime.now().date() - timedelta(days=1)
         date_key = process_date.strftime("%Y-%m-%d")
@@ -328,44 +1211,64 @@ class EverhourTimeMultiplier:
             logging.info("🧪 TRYB TESTOWY (DRY RUN) - ŻADNE DANE NIE ZOSTANĄ ZMIENIONE")
             logging.info("=" * 60)
         logging.info(f"=== Rozpoczynanie aktualizacji czasu za dzień {process_date} ===")
+        report = metrics.start_run("daily_update")
         
-        # Użyj przekazanej listy lub pobierz z dashboard/env
-        if employees_list is None:
-            employees_list = get_employees_from_dashboard()
-            if not employees_list:
-                employees_list = [(emp_id.strip(), "", TIME_MULTIPLIER) for emp_id in EMPLOYEES_WITH_MULTIPLIER if emp_id.strip()]
+        employees = self.resolve_employees(employees_list)
+        if checkpoint_job:
+            # Po restarcie kontenera pomijamy pracowników, których ten harmonogram już przetworzył
+            done = self.processed_store.get_checkpoints(checkpoint_job, date_key, date_key)
+            if done:
+                employees = [e for e in employees if (date_key, str(e[0])) not in done]
+                logging.info(f"⏩ {len(done)} pracowników już przetworzonych przez {checkpoint_job}, pozostało {len(employees)}")
         
-        success_count = 0
-        error_count = 0
+        snapshot = None
+        if BULK_FETCH and employees:
+            snapshot = self.get_team_time_records(process_date, process_date, [e[0] for e in employees], allow_stale=DRY_RUN)
+            if snapshot is None:
+                logging.warning("⚠️  Nie udało się pobrać rekordów zespołu, pobieram osobno dla każdego pracownika")
         
-        for employee in employees_list:
-            if isinstance(employee, tuple) and len(employee) >= 3:
-                user_id, user_name, user_multiplier = employee[:3]
-            elif isinstance(employee, tuple) and len(employee) == 2:
-                user_id, user_name = employee
-                user_multiplier = TIME_MULTIPLIER
-            else:
-                user_id = employee
-                user_name = ""
-                user_multiplier = TIME_MULTIPLIER
-            
-            try:
-                summary = self.process_user_time(user_id, process_date, user_name, user_multiplier)
-                if summary and not DRY_RUN:
-                    send_log_to_dashboard(user_id, user_name, process_date, summary)
-                success_count += 1
-            except Exception as e:
-                logging.error(f"Błąd podczas przetwarzania użytkownika {user_id}: {e}")
-                error_count += 1
+        results = self.process_employees(employees, process_date, snapshot, checkpoint_job)
+        if self.leases is not None:
+            results.extend(self.reclaim_expired_leases(employees))
+        flush_dashboard_reporter()
+        success_count = sum(1 for ok, _ in results if ok)
+        error_count = len(results) - success_count
+        self.log_run_totals([summary for _, summary in results if summary])
         
-        if not DRY_RUN:
-            self.processed_dates.add(date_key)
+        if DRY_RUN:
+            entries = [entry for _, summary in results if summary for entry in summary.get("entries", [])]
+            plan_file = write_plan(
+                os.path.join(PLANS_DIR, f"dry_run_{date_key}.jsonl"),
+                self.plan_header([process_date], employees),
+                entries
+            )
+            logging.info(f"📝 Plan zmian (DRY RUN) zapisany: {plan_file} {count_actions(entries)}")
+        else:
+            if not error_count:
+                self.processed_dates.add(date_key)
+            self.prune_processed_records()
+        metrics.finish_run(report, REPORTS_DIR)
         logging.info(f"=== Aktualizacja zakończona. Sukces: {success_count}, Błędy: {error_count} ===")
         if DRY_RUN:
             logging.info("=" * 60)
             logging.info("🧪 KONIEC TRYBU TESTOWEGO - Aby naprawdę zaktualizować dane, ustaw DRY_RUN=false")
             logging.info("=" * 60)
 
+_dashboard_cache = None
+
+def get_dashboard_cache():
+    """Zwraca cache odpowiedzi dashboard (konfiguracja, pracownicy)"""
+    global _dashboard_cache
+    if _dashboard_cache is None:
+        _dashboard_cache = DashboardCache(
+            get_http_client(),
+            {"Authorization": f"Bearer {DASHBOARD_TOKEN}"},
+            DASHBOARD_CACHE_FILE,
+            DASHBOARD_CACHE_TTL
+        )
+    return _dashboard_cache
+
+@metrics.timed("employees")
 def get_employees_from_dashboard():
     """Pobiera listę aktywnych pracowników z dashboard"""
     if not DASHBOARD_API_URL or not DASHBOARD_TOKEN:
@@ -373,12 +1276,7 @@ def get_employees_from_dashboard():
         return None
     
     try:
-        response = requests.get(
-            f"{DASHBOARD_API_URL}/api/employees",
-            headers={"Authorization": f"Bearer {DASHBOARD_TOKEN}"}
-        )
-        response.raise_for_status()
-        employees = response.json()
+        employees, changed = get_dashboard_cache().get("employees", f"{DASHBOARD_API_URL}/api/employees")
         
         # Zwróć tylko aktywnych jako tuple (id, name, multiplier)
         active_employees = [
@@ -388,68 +1286,110 @@ def get_employees_from_dashboard():
         ]
         
         logging.info(f"✅ Pobrano {len(active_employees)} aktywnych pracowników z dashboard")
-        for emp_id, emp_name, emp_multiplier in active_employees:
-            logging.info(f"   - {emp_name} (ID: {emp_id}, Mnożnik: {emp_multiplier}x)")
+        # Pełną listę logujemy tylko, gdy się zmieniła
+        if changed:
+            for emp_id, emp_name, emp_multiplier in active_employees:
+                logging.info(f"   - {emp_name} (ID: {emp_id}, Mnożnik: {emp_multiplier}x)")
         
         return active_employees
     except Exception as e:
         logging.error(f"❌ Błąd pobierania pracowników z dashboard: {e}")
         return None
 
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+
+def get_metadata_cache():
+    """Zwraca współdzielony cache nazw zadań i projektów (wczytywany z dysku przy pierwszym użyciu)"""
+    global _metadata_cache
+    if _metadata_cache is None:
+        with _metadata_cache_lock:
+            if _metadata_cache is None:
+                _metadata_cache = MetadataCache(METADATA_CACHE_FILE, METADATA_CACHE_SIZE)
+    return _metadata_cache
+
+_dashboard_reporter = None
+_dashboard_reporter_lock = threading.Lock()
+
+def get_dashboard_reporter():
+    """Zwraca reporter dashboard działający w tle (None, jeśli dashboard nie jest skonfigurowany)"""
+    global _dashboard_reporter
+    if not DASHBOARD_API_URL or not DASHBOARD_TOKEN:
+        return None
+    if _dashboard_reporter is None:
+        with _dashboard_reporter_lock:
+            if _dashboard_reporter is None:
+                _dashboard_reporter = DashboardReporter(
+                    DASHBOARD_API_URL,
+                    DASHBOARD_TOKEN,
+                    get_http_client(),
+                    DASHBOARD_SPOOL_FILE,
+                    batch_size=DASHBOARD_BATCH_SIZE,
+                    flush_interval=DASHBOARD_FLUSH_INTERVAL,
+                    queue_size=DASHBOARD_QUEUE_SIZE
+                )
+                atexit.register(_dashboard_reporter.close)
+    return _dashboard_reporter
+
+def flush_dashboard_reporter():
+    """Zleca wysłanie zebranych wpisów bez czekania na dashboard"""
+    reporter = get_dashboard_reporter()
+    if reporter:
+        reporter.flush(wait=False)
+
 def send_log_to_dashboard(employee_id, employee_name, date, summary):
     """Wysyła log operacji do dashboard"""
-    if not DASHBOARD_API_URL or not DASHBOARD_TOKEN:
+    reporter = get_dashboard_reporter()
+    if not reporter:
         return
     
-    try:
-        log_data = {
-            "employee_id": employee_id,
-            "employee_name": employee_name or "Unknown",
-            "date": str(date),
-            "original_hours": summary.get("original_hours", 0),
-            "updated_hours": summary.get("updated_hours", 0),
-            "status": "success" if summary.get("processed", 0) > 0 else "error"
-        }
-        
-        response = requests.post(
-            f"{DASHBOARD_API_URL}/api/logs/record",
-            json=log_data,
-            headers={"Authorization": f"Bearer {DASHBOARD_TOKEN}"}
-        )
-        response.raise_for_status()
-        logging.info("✅ Log operacji wysłany do dashboard")
-    except Exception as e:
-        logging.warning(f"⚠️  Nie udało się wysłać logu do dashboard: {e}")
+    log_data = {
+        "employee_id": employee_id,
+        "employee_name": employee_name or "Unknown",
+        "date": str(date),
+        "original_hours": summary.get("original_hours", 0),
+        "updated_hours": summary.get("updated_hours", 0),
+        "status": "error" if summary.get("failed", 0) > 0 and not summary.get("processed", 0) else "success"
+    }
+    reporter.submit("log", log_data)
 
+@metrics.timed("config")
 def get_config_from_dashboard():
     """Pobiera konfigurację z dashboard"""
     if not DASHBOARD_API_URL or not DASHBOARD_TOKEN:
         return None
     
     try:
-        response = requests.get(
-            f"{DASHBOARD_API_URL}/api/config",
-            headers={"Authorization": f"Bearer {DASHBOARD_TOKEN}"}
-        )
-        response.raise_for_status()
-        return response.json()
+        config, _ = get_dashboard_cache().get("config", f"{DASHBOARD_API_URL}/api/config")
+        return config
     except Exception as e:
         logging.error(f"❌ Błąd pobierania konfiguracji z dashboard: {e}")
         return None
 
-def scheduled_job():
-    logging.info("Uruchamiam zaplanowane zadanie...")
+def scheduled_job(schedule_name=None):
+    logging.info(f"Uruchamiam zaplanowane zadanie{f' ({schedule_name})' if schedule_name else ''}...")
     if not EVERHOUR_API_KEY:
         logging.error("Brak klucza API Everhour!")
         return
     
+    report = metrics.start_run("scheduled_job")
+    try:
+        run_scheduled_update(schedule_name)
+    finally:
+        metrics.finish_run(report, REPORTS_DIR)
+
+def get_schedules(run_hour=RUN_HOUR, run_minute=RUN_MINUTE):
+    return parse_schedules(SCHEDULES, run_hour, run_minute, SCHEDULE_GROUPS, SCHEDULE_WINDOW_MINUTES)
+
+def run_scheduled_update(schedule_name=None):
     # Sprawdź konfigurację z dashboard
     config = get_config_from_dashboard()
     if config:
-        global DRY_RUN, TIME_MULTIPLIER
+        global DRY_RUN, TIME_MULTIPLIER, MAX_WORKERS
         DRY_RUN = config.get('dry_run', DRY_RUN)
         TIME_MULTIPLIER = config.get('default_multiplier', TIME_MULTIPLIER)
-        logging.info(f"✅ Pobrano konfigurację z dashboard: DRY_RUN={DRY_RUN}, MULTIPLIER={TIME_MULTIPLIER}")
+        MAX_WORKERS = config.get('workers', MAX_WORKERS)
+        logging.info(f"✅ Pobrano konfigurację z dashboard: DRY_RUN={DRY_RUN}, MULTIPLIER={TIME_MULTIPLIER}, WORKERS={MAX_WORKERS}")
     
     # Pobierz pracowników
     employees = get_employees_from_dashboard()
@@ -466,8 +1406,33 @@ def scheduled_job():
         except:
             logging.error(f"Nieprawidłowy format daty: {os.environ.get('PROCESS_DATE')}")
     
-    multiplier = EverhourTimeMultiplier(EVERHOUR_API_KEY)
-    multiplier.run_daily_update(process_date=process_date, employees_list=employees)
+    # Każde uruchomienie ma własną instancję - bazy i wątek dzierżaw są zamykane na końcu
+    with EverhourTimeMultiplier(EVERHOUR_API_KEY) as multiplier:
+        checkpoint_job = None
+        if schedule_name:
+            schedules = get_schedules()
+            employees = select_employees(schedules, schedule_name, multiplier.resolve_employees(employees))
+            if not employees:
+                logging.info(f"Harmonogram {schedule_name}: brak pracowników do przetworzenia")
+                return
+            checkpoint_job = f"schedule:{schedule_name}"
+            offset = next((s.get("offset_minutes", 0) for s in schedules if s["name"] == schedule_name), 0)
+            if process_date is None and offset:
+                process_date = (datetime.now() - timedelta(minutes=offset)).date() - timedelta(days=1)
+        multiplier.run_daily_update(process_date=process_date, employees_list=employees, checkpoint_job=checkpoint_job)
+
+_incremental_multiplier = None
+
+def incremental_job():
+    """Sprawdzenie przyrostowe w ciągu dnia (wywoływane co INCREMENTAL_INTERVAL_MINUTES)"""
+    global _incremental_multiplier
+    if not EVERHOUR_API_KEY:
+        logging.error("Brak klucza API Everhour!")
+        return
+    # Jedna instancja na cały proces - kolejne sprawdzenia dopisują do tego samego pliku backupu
+    if _incremental_multiplier is None:
+        _incremental_multiplier = EverhourTimeMultiplier(EVERHOUR_API_KEY)
+    _incremental_multiplier.run_incremental_update()
 
 def manual_trigger(employee_id=None, date=None):
     """Funkcja do ręcznego uruchomienia dla konkretnego pracownika/daty"""
@@ -496,29 +1461,117 @@ def manual_trigger(employee_id=None, date=None):
     if not employees:
         return {"error": "No employees to process"}
     
-    multiplier = EverhourTimeMultiplier(EVERHOUR_API_KEY)
-    multiplier.run_daily_update(process_date, employees)
+    with EverhourTimeMultiplier(EVERHOUR_API_KEY) as multiplier:
+        multiplier.run_daily_update(process_date, employees)
     
     return {"success": True, "processed": len(employees)}
 
+def backfill_trigger(date_from, date_to=None, employee_id=None):
+    """Funkcja do nadrabiania zakresu dat (np. po awarii)"""
+    logging.info(f"Backfill: {date_from} - {date_to}, employee_id={employee_id}")
+    
+    if not EVERHOUR_API_KEY:
+        logging.error("Brak klucza API Everhour!")
+        return {"error": "No Everhour API key"}
+    
+    try:
+        start = datetime.strptime(date_from, "%Y-%m-%d").date()
+        end = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else datetime.now().date() - timedelta(days=1)
+    except (TypeError, ValueError):
+        logging.error(f"Nieprawidłowy format daty: {date_from} - {date_to}")
+        return {"error": "Invalid date format"}
+    
+    employees = None
+    if employee_id:
+        employees = [(employee_id, "Manual trigger", TIME_MULTIPLIER)]
+    
+    with EverhourTimeMultiplier(EVERHOUR_API_KEY) as multiplier:
+        multiplier.run_backfill(start, end, employees)
+    
+    return {"success": True, "from": str(start), "to": str(end)}
+
+def restore_trigger(date_from, date_to=None, employee_id=None):
+    """Funkcja do cofania zmian z zakresu dat na podstawie backupów (np. po błędnym mnożniku)"""
+    logging.info(f"Przywracanie: {date_from} - {date_to}, employee_id={employee_id}")
+    
+    if not EVERHOUR_API_KEY:
+        logging.error("Brak klucza API Everhour!")
+        return {"error": "No Everhour API key"}
+    
+    try:
+        start = datetime.strptime(date_from, "%Y-%m-%d").date()
+        end = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else start
+    except (TypeError, ValueError):
+        logging.error(f"Nieprawidłowy format daty: {date_from} - {date_to}")
+        return {"error": "Invalid date format"}
+    
+    with EverhourTimeMultiplier(EVERHOUR_API_KEY) as multiplier:
+        results = multiplier.run_restore(start, end, [employee_id] if employee_id else None)
+    if results is None:
+        return {"error": "Nothing to restore"}
+    failed = sum(1 for ok, _ in results if not ok)
+    return {"success": not failed, "from": str(start), "to": str(end), "failed": failed}
+
+def create_jobstore():
+    """Zwraca trwały magazyn zadań schedulera według SCHEDULER_JOBSTORE (None = w pamięci)"""
+    if not SCHEDULER_JOBSTORE:
+        return None
+    if "://" in SCHEDULER_JOBSTORE:
+        try:
+            # SQLAlchemy jest opcjonalne - potrzebne tylko dla magazynu w innej bazie niż plik SQLite
+            from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+            jobstore = SQLAlchemyJobStore(url=SCHEDULER_JOBSTORE)
+        except ImportError:
+            logging.error(f"❌ SCHEDULER_JOBSTORE={SCHEDULER_JOBSTORE} wymaga pakietu SQLAlchemy - zadania schedulera będą trzymane w pamięci")
+            return None
+    else:
+        from sqlite_jobstore import SQLiteJobStore
+        jobstore = SQLiteJobStore(SCHEDULER_JOBSTORE)
+    logging.info(f"🗄️  Magazyn zadań schedulera: {SCHEDULER_JOBSTORE}")
+    return jobstore
+
+def create_scheduler(jobstore=None):
+    """Tworzy scheduler - z trwałym magazynem zadań, jeśli został podany"""
+    # APScheduler importujemy dopiero tutaj - jednorazowe uruchomienia (CLI, cron) go nie potrzebują
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    return BlockingScheduler(timezone='Europe/Warsaw', jobstores={"default": jobstore} if jobstore is not None else {})
+
+def add_scheduler_job(scheduler, jobstore, job_id, func, trigger, args=(), **options):
+    """Dodaje zadanie do schedulera. Zadanie zapisane w trwałym magazynie z tym samym wyzwalaczem zostaje
+    bez zmian - zachowuje czas następnego uruchomienia, więc uruchomienie pominięte w czasie przestoju
+    zostanie nadrobione (coalesce, misfire_grace_time), a nie przesunięte na kolejny termin"""
+    from apscheduler.util import obj_to_ref
+    if jobstore is not None:
+        try:
+            stored = jobstore.lookup_job(job_id)
+        except Exception as e:
+            logging.warning(f"⚠️  Nie udało się odczytać zapisanego zadania {job_id}: {e}")
+            stored = None
+        if (stored is not None and stored.next_run_time is not None and stored.func_ref == obj_to_ref(func)
+                and str(stored.trigger) == str(trigger) and getattr(stored.trigger, "jitter", None) == getattr(trigger, "jitter", None)
+                and tuple(stored.args) == tuple(args) and stored.misfire_grace_time == options.get("misfire_grace_time")):
+            logging.info(f"🗄️  Zadanie {job_id} z magazynu - następne uruchomienie {stored.next_run_time}")
+            return
+    scheduler.add_job(func, trigger, args=list(args), id=job_id, replace_existing=True, **options)
+
+def remove_stale_scheduler_jobs(jobstore, job_ids):
+    """Usuwa z trwałego magazynu zadania, których obecna konfiguracja już nie deklaruje (np. usunięty
+    harmonogram albo wyłączony tryb przyrostowy) - inaczej uruchamiałyby się dalej po każdym restarcie"""
+    if jobstore is None:
+        return
+    try:
+        stale = [job.id for job in jobstore.get_all_jobs() if job.id not in job_ids]
+        for job_id in stale:
+            jobstore.remove_job(job_id)
+            logging.info(f"🗑️  Usunięto z magazynu zadanie {job_id} - nie ma go już w konfiguracji")
+    except Exception as e:
+        logging.warning(f"⚠️  Nie udało się usunąć nieaktualnych zadań z magazynu: {e}")
+
 def main():
     logging.info("Everhour Time Multiplier - Start")
     logging.info(f"Mnożnik: {TIME_MULTIPLIER}x")
     logging.info(f"Pracownicy: {EMPLOYEES_WITH_MULTIPLIER}")
     
-    # Pobierz konfigurację z dashboard jeśli dostępne
-    config = get_config_from_dashboard()
-    if config:
-        run_hour = config.get('run_hour', RUN_HOUR)
-        run_minute = config.get('run_minute', RUN_MINUTE)
-        logging.info(f"✅ Pobrano harmonogram z dashboard: {run_hour:02d}:{run_minute:02d}")
-    else:
-        run_hour = RUN_HOUR
-        run_minute = RUN_MINUTE
-        logging.info(f"Używam harmonogramu z variables: {run_hour:02d}:{run_minute:02d}")
-    
-    logging.info(f"Zaplanowane uruchomienie: {run_hour:02d}:{run_minute:02d}")
-    
     if DRY_RUN:
         logging.info("🧪 TRYB DRY RUN WŁĄCZONY - dane nie będą modyfikowane")
     if DEBUG:
@@ -527,10 +1580,33 @@ def main():
         logging.info("🔬 TRYB SUPER DEBUG WŁĄCZONY - maksymalne logowanie")
     if DASHBOARD_API_URL:
         logging.info(f"📊 Dashboard API: {DASHBOARD_API_URL}")
+    if METRICS_PORT:
+        metrics.start_metrics_server(METRICS_PORT)
     
     if os.environ.get("RUN_ON_START", "false").lower() == "true":
         scheduled_job()
     
+    # Plan zmian: utworzenie albo wykonanie wcześniej przygotowanego planu
+    if PLAN_CREATE or PLAN_APPLY:
+        if not EVERHOUR_API_KEY:
+            logging.error("Brak klucza API Everhour!")
+            return
+        with EverhourTimeMultiplier(EVERHOUR_API_KEY) as multiplier:
+            if PLAN_APPLY:
+                multiplier.apply_plan(PLAN_APPLY)
+            else:
+                process_date = None
+                if os.environ.get("PROCESS_DATE"):
+                    process_date = datetime.strptime(os.environ.get("PROCESS_DATE"), "%Y-%m-%d").date()
+                multiplier.create_plan(process_date, plan_file=os.environ.get("PLAN_FILE"))
+        return
+    
+    # Nadrabianie zakresu dat
+    if BACKFILL_FROM:
+        result = backfill_trigger(BACKFILL_FROM, BACKFILL_TO, os.environ.get("MANUAL_EMPLOYEE_ID"))
+        logging.info(f"Wynik backfillu: {result}")
+        return
+    
     # Sprawdź czy to ręczne uruchomienie
     if os.environ.get("MANUAL_TRIGGER", "false").lower() == "true":
         result = manual_trigger(
@@ -540,14 +1616,57 @@ def main():
         logging.info(f"Wynik ręcznego uruchomienia: {result}")
         return
     
-    scheduler = BlockingScheduler(timezone='Europe/Warsaw')
-    scheduler.add_job(
-        scheduled_job,
-        'cron',
-        hour=run_hour,
-        minute=run_minute,
-        id='daily_time_update'
-    )
+    # Konfiguracja z dashboard jest potrzebna tylko schedulerowi - jednorazowe uruchomienia jej nie pobierają
+    config = get_config_from_dashboard()
+    if config:
+        run_hour = config.get('run_hour', RUN_HOUR)
+        run_minute = config.get('run_minute', RUN_MINUTE)
+        logging.info(f"✅ Pobrano harmonogram z dashboard: {run_hour:02d}:{run_minute:02d}")
+    else:
+        run_hour = RUN_HOUR
+        run_minute = RUN_MINUTE
+        logging.info(f"Używam harmonogramu z variables: {run_hour:02d}:{run_minute:02d}")
+    
+    logging.info(f"Zaplanowane uruchomienie: {run_hour:02d}:{run_minute:02d}")
+    
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
+    jobstore = create_jobstore()
+    scheduler = create_scheduler(jobstore)
+    schedules = get_schedules(run_hour, run_minute)
+    job_ids = set()
+    for schedule in schedules:
+        job_id = 'daily_time_update' if len(schedules) == 1 else f"time_update_{schedule['name']}"
+        job_ids.add(job_id)
+        # coalesce: kilka pominiętych uruchomień (np. kontener leżał) wykonuje się raz
+        add_scheduler_job(
+            scheduler,
+            jobstore,
+            job_id,
+            scheduled_job,
+            CronTrigger(hour=schedule["hour"], minute=schedule["minute"], jitter=SCHEDULE_JITTER_SECONDS or None, timezone=scheduler.timezone),
+            args=[schedule["name"]],
+            coalesce=True,
+            misfire_grace_time=SCHEDULE_MISFIRE_GRACE_SECONDS,
+            max_instances=1
+        )
+        if len(schedules) > 1:
+            logging.info(f"🗓️  Harmonogram {schedule['name']}: {schedule['hour']:02d}:{schedule['minute']:02d}")
+    if INCREMENTAL_INTERVAL_MINUTES > 0:
+        job_ids.add('incremental_time_update')
+        # Nocne uruchomienie zostaje jako zabezpieczenie - przetworzy to, co sprawdzenia w ciągu dnia pominęły
+        add_scheduler_job(
+            scheduler,
+            jobstore,
+            'incremental_time_update',
+            incremental_job,
+            IntervalTrigger(minutes=INCREMENTAL_INTERVAL_MINUTES, timezone=scheduler.timezone),
+            coalesce=True,
+            misfire_grace_time=SCHEDULE_MISFIRE_GRACE_SECONDS,
+            max_instances=1
+        )
+        logging.info(f"🔄 Tryb przyrostowy: sprawdzanie co {INCREMENTAL_INTERVAL_MINUTES:g} min")
+    remove_stale_scheduler_jobs(jobstore, job_ids)
     logging.info("Scheduler uruchomiony. Czekam na zaplanowane zadania...")
     try:
         scheduler.start()
@@ -556,4 +1675,10 @@ def main():
         scheduler.shutdown()
 
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        # python src/main.py <polecenie> ... - to samo co python src/cli.py
+        import cli
+        cli.set_app(sys.modules[__name__])
+        sys.exit(cli.run())
     main()
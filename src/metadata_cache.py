@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+
+class MetadataCache:
+    """Nazwy zadań i projektów Everhour: LRU w pamięci z kopią na dysku.
+
+    Nieznalezione ID też są zapamiętywane (z nazwą None), żeby w tym procesie nie pytać o nie ponownie.
+    """
+
+    def __init__(self, path, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.tasks = OrderedDict()
+        self.projects = OrderedDict()
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.warning(f"⚠️  Nie udało się wczytać cache nazw {self.path}: {e}")
+            return
+        for task_id, (name, project_id) in data.get("tasks", {}).items():
+            self.tasks[task_id] = (name, project_id)
+        self.projects.update(data.get("projects", {}))
+
+    def _touch(self, entries, key):
+        entries.move_to_end(key)
+
+    def _put(self, entries, key, value):
+        if entries.get(key, ()) != value:
+            self.dirty = True
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.dirty = True
+
+    def has_task(self, task_id):
+        with self.lock:
+            return str(task_id) in self.tasks
+
+    def has_project(self, project_id):
+        with self.lock:
+            return str(project_id) in self.projects
+
+    def task(self, task_id):
+        """Zwraca (nazwa, id projektu) albo None, jeśli zadania nie ma w cache"""
+        key = str(task_id)
+        with self.lock:
+            value = self.tasks.get(key)
+            if value is not None:
+                self._touch(self.tasks, key)
+            return value
+
+    def project_name(self, project_id):
+        key = str(project_id)
+        with self.lock:
+            if key not in self.projects:
+                return None
+            self._touch(self.projects, key)
+            return self.projects[key]
+
+    def add_task(self, task_id, name, project_id=None):
+        with self.lock:
+            self._put(self.tasks, str(task_id), (name, project_id))
+
+    def add_project(self, project_id, name):
+        with self.lock:
+            self._put(self.projects, str(project_id), name)
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            # Nieznalezione ID zapisujemy tylko w pamięci - po restarcie spróbujemy je pobrać ponownie
+            data = {
+                "tasks": {task_id: list(value) for task_id, value in self.tasks.items() if value[0] is not None},
+                "projects": {project_id: name for project_id, name in self.projects.items() if name is not None}
+            }
+            try:
+                tmp_file = self.path + ".tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_file, self.path)
+                self.dirty = False
+            except Exception as e:
+                logging.warning(f"⚠️  Nie udało się zapisać cache nazw: {e}")
@@ -0,0 +1,234 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PHASE_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self):
+        with self.lock:
+            return sum(self.values.values())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self.lock:
+            state = self.values.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, state in sorted(self.values.items()):
+                for bound, bucket_count in zip(self.buckets, state["buckets"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), key + (bound,))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), key + ('+Inf',))} {state['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {state['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {state['count']}")
+        return lines
+
+
+# Metryki zbierane przez aplikację
+HTTP_REQUESTS = Counter("everhour_http_requests_total", "Zapytania HTTP", ("host", "method", "endpoint", "status"))
+HTTP_LATENCY = Histogram("everhour_http_request_duration_seconds", "Czas zapytań HTTP", ("host", "method", "endpoint"))
+HTTP_RETRIES = Counter("everhour_http_retries_total", "Ponowione zapytania HTTP", ("host", "endpoint", "reason"))
+HTTP_RATE_LIMITED = Counter("everhour_http_rate_limited_total", "Odpowiedzi 429", ("host",))
+PHASE_DURATION = Histogram("everhour_phase_duration_seconds", "Czas etapów przetwarzania", ("phase",), PHASE_BUCKETS)
+RECORDS = Counter("everhour_records_total", "Rekordy czasu według wyniku", ("result",))
+RUNS = Counter("everhour_runs_total", "Uruchomienia według rodzaju", ("kind",))
+LAST_RUN_RECORDS_PER_SECOND = {"value": 0.0}
+
+REGISTRY = (HTTP_REQUESTS, HTTP_LATENCY, HTTP_RETRIES, HTTP_RATE_LIMITED, PHASE_DURATION, RECORDS, RUNS)
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.append("# HELP everhour_last_run_records_per_second Przetworzone rekordy na sekundę w ostatnim uruchomieniu")
+    lines.append("# TYPE everhour_last_run_records_per_second gauge")
+    lines.append(f"everhour_last_run_records_per_second {LAST_RUN_RECORDS_PER_SECOND['value']}")
+    return "\n".join(lines) + "\n"
+
+
+class RunReport:
+    """Raport jednego uruchomienia: czasy etapów, liczniki rekordów i zapytań"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started_at = time.time()
+        self.started = time.monotonic()
+        self.phases = {}
+        self.records = {}
+        self.http_start = HTTP_REQUESTS.total()
+        self.retries_start = HTTP_RETRIES.total()
+        self.rate_limited_start = HTTP_RATE_LIMITED.total()
+        self.lock = threading.Lock()
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_record(self, result):
+        with self.lock:
+            self.records[result] = self.records.get(result, 0) + 1
+
+    def to_dict(self):
+        wall_time = time.monotonic() - self.started
+        updated = self.records.get("updated", 0)
+        return {
+            "kind": self.kind,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "wall_time_seconds": round(wall_time, 3),
+            # Czasy etapów są sumowane po wątkach, więc przy pracy równoległej mogą przekraczać czas całkowity
+            "phases_seconds": {name: round(value, 3) for name, value in sorted(self.phases.items())},
+            "records": dict(sorted(self.records.items())),
+            "records_per_second": round(updated / wall_time, 3) if wall_time > 0 else 0,
+            "http_requests": HTTP_REQUESTS.total() - self.http_start,
+            "http_retries": HTTP_RETRIES.total() - self.retries_start,
+            "http_rate_limited": HTTP_RATE_LIMITED.total() - self.rate_limited_start
+        }
+
+
+_current_run = None
+
+
+def start_run(kind):
+    """Rozpoczyna raport uruchomienia. Jeśli raport już trwa (np. run_daily_update wywołany
+    z scheduled_job), zwraca None, a etapy trafiają do raportu zewnętrznego."""
+    global _current_run
+    if _current_run is not None:
+        return None
+    RUNS.inc(kind=kind)
+    _current_run = RunReport(kind)
+    return _current_run
+
+
+def finish_run(report, reports_dir=None):
+    """Kończy raport uruchomienia i zapisuje go jako JSON (jeśli podano katalog)"""
+    global _current_run
+    if report is None:
+        return None
+    data = report.to_dict()
+    LAST_RUN_RECORDS_PER_SECOND["value"] = data["records_per_second"]
+    if _current_run is report:
+        _current_run = None
+    logging.info(f"⏱️  Czas: {data['wall_time_seconds']}s, zapytania HTTP: {data['http_requests']}, etapy: {data['phases_seconds']}")
+    if reports_dir:
+        try:
+            if not os.path.exists(reports_dir):
+                os.makedirs(reports_dir)
+            path = os.path.join(reports_dir, f"run_{report.kind}_{time.strftime('%Y%m%d_%H%M%S', time.localtime(report.started_at))}.json")
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+            data["file"] = path
+        except Exception as e:
+            logging.warning(f"⚠️  Nie udało się zapisać raportu uruchomienia: {e}")
+    return data
+
+
+@contextmanager
+def phase(name):
+    """Mierzy czas etapu (histogram + raport bieżącego uruchomienia)"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - started
+        PHASE_DURATION.observe(elapsed, phase=name)
+        report = _current_run
+        if report is not None:
+            report.add_phase(name, elapsed)
+
+
+def timed(name):
+    """Dekorator mierzący czas wywołania funkcji jako etap"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_result(result):
+    RECORDS.inc(result=result)
+    report = _current_run
+    if report is not None:
+        report.add_record(result)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Uruchamia endpoint /metrics w wątku w tle"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info(f"📈 Endpoint metryk: http://{host}:{port}/metrics")
+    return server
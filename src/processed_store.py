@@ -0,0 +1,338 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date as date_type, timedelta
+
+from record_index import BloomFilter
+
+
+class ProcessedStore:
+    """Indeks przetworzonych rekordów w SQLite - klucz: ID rekordu Everhour.
+
+    Rekord zastąpiony przez DELETE + POST jest zapisywany razem z nowym ID (oba są "przetworzone").
+    Dla aktualnego rekordu zapamiętywany jest zapisany czas (written_time) - po późniejszej edycji
+    przez pracownika mnożona jest tylko różnica, a własne zapisy nie wyglądają jak zmiana - oraz suma
+    czasu dodanego przez wszystkie zapisy (added_time), którą przywracanie odejmuje od aktualnego czasu.
+    ID z ostatnich window_days dni są trzymane w pamięci (zbiór), starsza historia jest sprawdzana
+    w bazie - opcjonalnie najpierw w filtrze Blooma, więc większość chybień nie dotyka bazy.
+    Stary klucz (data, użytkownik, zadanie) jest sprawdzany tylko dla dni przetworzonych przed zmianą.
+    """
+
+    def __init__(self, path, window_days=35, history_filter=False, filter_error_rate=0.01):
+        self.path = path
+        self.window_days = window_days
+        self.history_filter = history_filter
+        self.filter_error_rate = filter_error_rate
+        self.lock = threading.Lock()
+        self.recent = None
+        self.window_start = None
+        self.old_filter = None
+        self.legacy_dates = None
+        self.loaded_at = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL + synchronous=NORMAL: każdy wpis jest zatwierdzany od razu (przetrwa awarię procesu),
+        # a fsync wykonywany jest zbiorczo przy checkpoincie WAL, a nie przy każdym rekordzie
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_records (
+                date TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                processed_at INTEGER NOT NULL,
+                PRIMARY KEY (date, user_id, task_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_ids (
+                record_id TEXT NOT NULL PRIMARY KEY,
+                date TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                source_id TEXT,
+                replaced_by TEXT,
+                processed_at INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        if "written_time" not in {row[1] for row in self.conn.execute("PRAGMA table_info(processed_ids)")}:
+            # Bazy sprzed zapamiętywania zapisanego czasu - stare wpisy mają NULL (bez dopisywania różnicy)
+            self.conn.execute("ALTER TABLE processed_ids ADD COLUMN written_time INTEGER")
+        if "added_time" not in {row[1] for row in self.conn.execute("PRAGMA table_info(processed_ids)")}:
+            # Wpisy sprzed zapamiętywania dodanego czasu mają NULL - przywracanie wraca wtedy do najstarszego backupu
+            self.conn.execute("ALTER TABLE processed_ids ADD COLUMN added_time INTEGER")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS processed_ids_date_user ON processed_ids (date, user_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS processed_ids_processed_at ON processed_ids (processed_at)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                job TEXT NOT NULL,
+                date TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                done_at INTEGER NOT NULL,
+                PRIMARY KEY (job, date, user_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS plan_progress (
+                plan_id TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (plan_id, record_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                date TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                mark TEXT NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (date, user_id)
+            ) WITHOUT ROWID
+        """)
+
+    def _load_index(self):
+        """Wczytuje indeks w pamięci przy pierwszym użyciu (wywoływane pod blokadą)"""
+        if self.recent is not None:
+            return
+        self.loaded_at = int(time.time())
+        self.window_start = str(date_type.today() - timedelta(days=self.window_days))
+        # ID rekordu -> zapisany czas (None, jeśli nieznany albo rekord został zastąpiony)
+        self.recent = dict(
+            self.conn.execute("SELECT record_id, written_time FROM processed_ids WHERE date >= ?", (self.window_start,))
+        )
+        if self.history_filter:
+            old_count = self.conn.execute("SELECT COUNT(*) FROM processed_ids WHERE date < ?", (self.window_start,)).fetchone()[0]
+            # Zapas na rekordy dopisywane w trakcie działania procesu
+            self.old_filter = BloomFilter(max(1000, old_count * 2), self.filter_error_rate)
+            for row in self.conn.execute("SELECT record_id FROM processed_ids WHERE date < ?", (self.window_start,)):
+                self.old_filter.add(row[0])
+        self.legacy_dates = {row[0] for row in self.conn.execute("SELECT DISTINCT date FROM processed_records")}
+
+    def refresh(self):
+        """Dociąga do pamięci rekordy zapisane w bazie przez inne procesy (np. repliki) od ostatniego wczytania"""
+        with self.lock:
+            if self.recent is None:
+                return
+            since = self.loaded_at - 1
+            self.loaded_at = int(time.time())
+            self.recent.update(
+                self.conn.execute("SELECT record_id, written_time FROM processed_ids WHERE processed_at >= ?", (since,))
+            )
+
+    def contains_record(self, date, record_id):
+        key = str(record_id)
+        with self.lock:
+            self._load_index()
+            if key in self.recent:
+                return True
+            if str(date) >= self.window_start:
+                return False
+            if self.old_filter is not None and key not in self.old_filter:
+                return False
+            row = self.conn.execute("SELECT 1 FROM processed_ids WHERE record_id = ?", (key,)).fetchone()
+        return row is not None
+
+    def add_record(self, date, user_id, record_id, new_record_id=None, written_time=None, original_time=None):
+        """Oznacza rekord jako przetworzony - razem z nowym ID, jeśli rekord został zastąpiony.
+
+        original_time i written_time to czas przed zapisem i po nim - różnica jest doliczana do czasu
+        dodanego wcześniej do tego rekordu (także pod poprzednimi ID z łańcucha zastąpień).
+        """
+        now = int(time.time())
+        key = str(record_id)
+        new_key = str(new_record_id) if new_record_id is not None and str(new_record_id) != key else None
+        with self.lock:
+            self._load_index()
+            row = self.conn.execute("SELECT added_time FROM processed_ids WHERE record_id = ?", (key,)).fetchone()
+            added_before = row[0] if row else 0
+            added = None
+            if added_before is not None and written_time is not None and original_time is not None:
+                added = added_before + int(written_time) - int(original_time)
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "INSERT INTO processed_ids (record_id, date, user_id, source_id, replaced_by, processed_at, written_time, added_time) "
+                "VALUES (?, ?, ?, NULL, ?, ?, ?, ?) ON CONFLICT (record_id) DO UPDATE SET "
+                "replaced_by = excluded.replaced_by, processed_at = excluded.processed_at, "
+                "written_time = excluded.written_time, added_time = excluded.added_time",
+                (key, str(date), str(user_id), new_key, now, None if new_key else written_time, None if new_key else added)
+            )
+            if new_key:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO processed_ids (record_id, date, user_id, source_id, replaced_by, processed_at, written_time, added_time) "
+                    "VALUES (?, ?, ?, ?, NULL, ?, ?, ?)",
+                    (new_key, str(date), str(user_id), key, now, written_time, added)
+                )
+            self.conn.execute("COMMIT")
+            self.recent[key] = None if new_key else written_time
+            if new_key:
+                self.recent[new_key] = written_time
+            if self.old_filter is not None:
+                for added_key in (key, new_key):
+                    if added_key:
+                        self.old_filter.add(added_key)
+
+    def get_written_time(self, date, record_id):
+        """Zwraca czas zapisany w rekordzie przy ostatnim przetworzeniu (None, jeśli nieznany)"""
+        key = str(record_id)
+        with self.lock:
+            self._load_index()
+            if key in self.recent:
+                return self.recent[key]
+            if str(date) >= self.window_start:
+                return None
+            row = self.conn.execute("SELECT written_time FROM processed_ids WHERE record_id = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_added_time(self, date, user_id, record_id):
+        """Zwraca sumę czasu dodanego do rekordu przez zapisy (0 - rekord nigdy nie był zmieniany,
+        choć dzień pracownika był przetwarzany) albo None, jeśli historia zapisów jest nieznana"""
+        with self.lock:
+            row = self.conn.execute("SELECT added_time FROM processed_ids WHERE record_id = ?", (str(record_id),)).fetchone()
+            if row:
+                return row[0]
+            day = self.conn.execute(
+                "SELECT 1 FROM processed_ids WHERE date = ? AND user_id = ? LIMIT 1", (str(date), str(user_id))
+            ).fetchone()
+        return 0 if day else None
+
+    def get_replacement(self, record_id):
+        """Zwraca aktualne ID rekordu, który zastąpił podany (po całym łańcuchu zastąpień), albo None"""
+        current = None
+        key = str(record_id)
+        with self.lock:
+            for _ in range(10):
+                row = self.conn.execute("SELECT replaced_by FROM processed_ids WHERE record_id = ?", (key,)).fetchone()
+                if not row or not row[0]:
+                    break
+                current = key = row[0]
+        return current
+
+    def contains(self, date, user_id, task_id):
+        """Stary klucz (data, użytkownik, zadanie) - tylko dla dni przetworzonych przed indeksem po ID rekordów"""
+        with self.lock:
+            self._load_index()
+            if str(date) not in self.legacy_dates:
+                return False
+            row = self.conn.execute(
+                "SELECT 1 FROM processed_records WHERE date = ? AND user_id = ? AND task_id = ?",
+                (str(date), str(user_id), str(task_id))
+            ).fetchone()
+        return row is not None
+
+    def remove(self, date, user_id=None):
+        """Zapomina przetworzenie dnia (np. po przywróceniu backupu) - łącznie z punktami kontrolnymi i znacznikami"""
+        condition = "date = ?"
+        params = (str(date),)
+        if user_id is not None:
+            condition += " AND user_id = ?"
+            params = (str(date), str(user_id))
+        with self.lock:
+            removed_ids = [row[0] for row in self.conn.execute(f"SELECT record_id FROM processed_ids WHERE {condition}", params)]
+            self.conn.execute(f"DELETE FROM processed_ids WHERE {condition}", params)
+            if self.recent is not None:
+                for record_id in removed_ids:
+                    self.recent.pop(record_id, None)
+            cursor = self.conn.execute(f"DELETE FROM processed_records WHERE {condition}", params)
+            self.conn.execute(f"DELETE FROM checkpoints WHERE {condition}", params)
+            self.conn.execute(f"DELETE FROM watermarks WHERE {condition}", params)
+        return cursor.rowcount + len(removed_ids)
+
+    def mark_checkpoint(self, job, date, user_id):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO checkpoints (job, date, user_id, done_at) VALUES (?, ?, ?, ?)",
+                (job, str(date), str(user_id), int(time.time()))
+            )
+
+    def get_checkpoints(self, job, date_from, date_to):
+        """Zwraca zbiór (data, użytkownik) zakończonych już w ramach zadania"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT date, user_id FROM checkpoints WHERE job = ? AND date BETWEEN ? AND ?",
+                (job, str(date_from), str(date_to))
+            ).fetchall()
+        return set(rows)
+
+    def mark_plan_entry(self, plan_id, record_id, status):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO plan_progress (plan_id, record_id, status, updated_at) VALUES (?, ?, ?, ?)",
+                (plan_id, str(record_id), status, int(time.time()))
+            )
+
+    def get_plan_progress(self, plan_id):
+        """Zwraca słownik record_id -> status dla danego planu"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT record_id, status FROM plan_progress WHERE plan_id = ?", (plan_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def get_watermarks(self, date):
+        """Zwraca słownik user_id -> znacznik ostatniej widzianej zmiany rekordów z danego dnia"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT user_id, mark FROM watermarks WHERE date = ?", (str(date),)
+            ).fetchall()
+        return dict(rows)
+
+    def set_watermark(self, date, user_id, mark):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watermarks (date, user_id, mark, updated_at) VALUES (?, ?, ?, ?)",
+                (str(date), str(user_id), str(mark), int(time.time()))
+            )
+
+    def prune(self, before_date, before_time):
+        """Usuwa wpisy z dni starszych niż before_date (YYYY-MM-DD) zapisane przed before_time (timestamp).
+
+        Liczy się też czas zapisu - dzień sprzed granicy przetworzony właśnie teraz (ręczne uruchomienie
+        dla starej daty) zostaje, inaczej ponowne uruchomienie pomnożyłoby go drugi raz.
+        """
+        params = (str(before_date), int(before_time))
+        with self.lock:
+            removed = self.conn.execute("DELETE FROM processed_ids WHERE date < ? AND processed_at < ?", params).rowcount
+            removed += self.conn.execute("DELETE FROM processed_records WHERE date < ? AND processed_at < ?", params).rowcount
+            self.conn.execute("DELETE FROM checkpoints WHERE date < ? AND done_at < ?", params)
+            self.conn.execute("DELETE FROM watermarks WHERE date < ? AND updated_at < ?", params)
+            if removed:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def count(self):
+        with self.lock:
+            records = self.conn.execute("SELECT COUNT(*) FROM processed_ids WHERE source_id IS NULL").fetchone()[0]
+            return records + self.conn.execute("SELECT COUNT(*) FROM processed_records").fetchone()[0]
+
+    def import_legacy_json(self, json_path):
+        """Jednorazowa migracja ze starego processed_records.json"""
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r') as f:
+                keys = json.load(f)
+        except Exception as e:
+            logging.error(f"❌ Nie udało się wczytać {json_path}: {e}")
+            return 0
+        rows = []
+        now = int(time.time())
+        for key in keys:
+            parts = str(key).split("_", 2)
+            if len(parts) == 3:
+                rows.append((parts[0], parts[1], parts[2], now))
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO processed_records (date, user_id, task_id, processed_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute("COMMIT")
+        os.replace(json_path, json_path + ".migrated")
+        logging.info(f"📦 Zaimportowano {len(rows)} przetworzonych rekordów z {json_path}")
+        return len(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,129 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from time_records import TimeRecord
+
+
+class ResponseCache:
+    """Cache pobranych rekordów czasu na dysku - klucz: adres, zakres dat i lista użytkowników.
+
+    Zapisywane są tylko kompletne pobrania (wszystkie strony bez błędu), strona po stronie, razem
+    z ETag/Last-Modified każdej strony. Kolejne pobranie wysyła je w zapytaniu warunkowym i przy
+    odpowiedzi 304 używa rekordów z cache - są wtedy potwierdzone przez serwer jako aktualne, więc mogą
+    z nich korzystać także uruchomienia zmieniające dane (np. prawdziwe uruchomienie tuż po DRY RUN).
+    Wpis bez walidatorów może być użyty tylko przez uruchomienie bez zapisów.
+    Wpis znika po ttl sekundach albo od razu po zapisie w Everhour dla jego użytkownika i dnia.
+    """
+
+    def __init__(self, cache_dir, ttl):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = None
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _scan(self):
+        """Wczytuje nagłówki wpisów z katalogu i usuwa przeterminowane (wywoływane pod blokadą)"""
+        entries = {}
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".ndjson.gz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    header = json.loads(f.readline())
+            except (OSError, ValueError):
+                header = None
+            if header is None or "pages" not in header or now - header["created_at"] > self.ttl:
+                self._remove(path)
+                continue
+            entries[path] = header
+        self.entries = entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        if self.entries is not None:
+            self.entries.pop(path, None)
+
+    def get(self, url, date_from, date_to, user_ids=None):
+        """Zwraca strony [{"count", "etag", "last_modified", "records"}] z wpisu obejmującego zakres
+        i użytkowników (rekordy innych użytkowników są pomijane) albo None"""
+        wanted = {str(user_id) for user_id in user_ids} if user_ids else None
+        with self.lock:
+            self._scan()
+            for path, header in self.entries.items():
+                if header["url"] != url or header["date_from"] != str(date_from) or header["date_to"] != str(date_to):
+                    continue
+                users = set(header["users"]) if header["users"] is not None else None
+                if users is not None and (wanted is None or not wanted <= users):
+                    continue
+                try:
+                    pages = []
+                    with gzip.open(path, "rt", encoding="utf-8") as f:
+                        f.readline()
+                        for page in header["pages"]:
+                            records = []
+                            for _ in range(page["stored"]):
+                                line = f.readline().rstrip("\n")
+                                record = TimeRecord.from_dict(json.loads(line), raw=line)
+                                if wanted is None or str(record.user) in wanted:
+                                    records.append(record)
+                            pages.append({"count": page["count"], "etag": page["etag"], "last_modified": page["last_modified"], "records": records})
+                    return pages
+                except (OSError, ValueError, KeyError) as e:
+                    logging.warning(f"⚠️  Uszkodzony wpis cache {path}: {e}")
+                    self._remove(path)
+        return None
+
+    def put(self, url, date_from, date_to, user_ids, pages):
+        users = sorted(str(user_id) for user_id in user_ids) if user_ids else None
+        header = {
+            "url": url,
+            "date_from": str(date_from),
+            "date_to": str(date_to),
+            "users": users,
+            "created_at": time.time(),
+            "pages": [
+                {"count": page["count"], "etag": page.get("etag"), "last_modified": page.get("last_modified"), "stored": len(page["records"])}
+                for page in pages
+            ]
+        }
+        key = json.dumps([url, header["date_from"], header["date_to"], users])
+        path = os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".ndjson.gz")
+        tmp_path = path + ".tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+                for page in pages:
+                    for record in page["records"]:
+                        if isinstance(record, TimeRecord) and record.raw is not None:
+                            f.write(record.raw.replace("\n", " ") + "\n")
+                            continue
+                        data = record.to_dict() if isinstance(record, TimeRecord) else record
+                        f.write(json.dumps(data, separators=(",", ":"), ensure_ascii=False) + "\n")
+            with self.lock:
+                os.replace(tmp_path, path)
+                if self.entries is not None:
+                    self.entries[path] = header
+        except OSError as e:
+            logging.warning(f"⚠️  Nie udało się zapisać cache rekordów: {e}")
+
+    def invalidate(self, user_id, date):
+        """Usuwa wpisy obejmujące użytkownika i dzień - wywoływane po zapisie w Everhour"""
+        date = str(date)
+        with self.lock:
+            if self.entries is None:
+                self._scan()
+            for path, header in list(self.entries.items()):
+                if header["date_from"] <= date <= header["date_to"] and (header["users"] is None or str(user_id) in header["users"]):
+                    self._remove(path)
@@ -0,0 +1,101 @@
+def record_task_id(record):
+    task = record.get('task')
+    return task.get('id') if isinstance(task, dict) else task
+
+
+def record_user_id(record):
+    user = record.get('user')
+    return user.get('id') if isinstance(user, dict) else user
+
+
+def diff_records(originals, current, get_replacement=None, get_added_time=None):
+    """Porównuje rekordy z backupu (wynik BackupStore.load_originals) z aktualnymi - zwraca wpisy przywracania.
+
+    Rekord zastąpiony przez DELETE + POST ma w Everhour nowe ID - jest brany z indeksu przetworzonych
+    (get_replacement), a gdy go tam nie ma, dopasowywany po zadaniu i komentarzu do aktualnego rekordu,
+    który pojawił się w backupach dopiero po zniknięciu oryginału (albo nie ma go w backupach wcale).
+
+    Jeśli znany jest czas dodany do rekordu przez zapisy (get_added_time), od aktualnego czasu odejmowany
+    jest tylko on - zmiany wprowadzone przez pracownika po przetworzeniu zostają (kept_time we wpisie).
+    Bez tej historii rekord wraca do najstarszej wersji z backupu.
+    """
+    current_by_id = {str(record.get('id')): record for record in current}
+    originals_by_id = {str(record.get('id')): (record, first, last) for record, first, last in originals}
+
+    def same_entry(a, b):
+        return record_task_id(a) == record_task_id(b) and (a.get('comment') or None) == (b.get('comment') or None)
+
+    pairs = []
+    missing = []
+    used = set()
+    for record_id, (record, first, last) in originals_by_id.items():
+        if record_id in current_by_id:
+            continue
+        if any(other is not record and same_entry(other, record) and other_last < first
+               for other, _, other_last in originals_by_id.values()):
+            # Pośrednia wersja z łańcucha zastąpień (oryginał -> nowe ID -> kolejne ID) - przywracany jest pierwszy rekord
+            continue
+        replacement = None
+        replacement_id = get_replacement(record_id) if get_replacement else None
+        if replacement_id is not None and replacement_id in current_by_id and replacement_id not in used:
+            replacement = current_by_id[replacement_id]
+        if replacement is None:
+            for candidate in current:
+                candidate_id = str(candidate.get('id'))
+                if candidate_id in used or not same_entry(candidate, record):
+                    continue
+                known = originals_by_id.get(candidate_id)
+                if known is None or known[1] > last:
+                    replacement = candidate
+                    break
+        if replacement is None:
+            missing.append(record)
+        else:
+            used.add(str(replacement.get('id')))
+            pairs.append((record, replacement))
+    for record_id, (record, _, _) in originals_by_id.items():
+        if record_id in current_by_id and record_id not in used:
+            pairs.append((record, current_by_id[record_id]))
+
+    entries = []
+    for original, record in pairs:
+        entry = {
+            "record_id": record.get('id'),
+            "source_record_id": original.get('id'),
+            "user_id": record_user_id(original),
+            "date": record.get('date'),
+            "task_id": record_task_id(record),
+            "original_time": record.get('time', 0),
+            "new_time": original.get('time', 0),
+            "action": "restore",
+            "reason": None
+        }
+        if record.get('comment'):
+            entry["comment"] = record.get('comment')
+        added = get_added_time(record.get('id')) if get_added_time else None
+        if added is not None:
+            entry["new_time"] = entry["original_time"] - added
+            if entry["new_time"] != original.get('time', 0):
+                # Czas zmieniony poza naszymi zapisami (np. pracownik dopisał pracę) - nie cofamy tej zmiany
+                entry["kept_time"] = entry["new_time"] - original.get('time', 0)
+        if entry["original_time"] == entry["new_time"]:
+            entry["action"] = "skip"
+            entry["reason"] = "unchanged"
+        elif entry["new_time"] <= 0:
+            entry["action"] = "skip"
+            entry["reason"] = "edited"
+        entries.append(entry)
+    for original in missing:
+        # Usuniętych rekordów nie odtwarzamy automatycznie - mógł je usunąć sam pracownik
+        entries.append({
+            "record_id": None,
+            "source_record_id": original.get('id'),
+            "user_id": record_user_id(original),
+            "date": original.get('date'),
+            "task_id": record_task_id(original),
+            "original_time": 0,
+            "new_time": original.get('time', 0),
+            "action": "skip",
+            "reason": "missing"
+        })
+    return entries
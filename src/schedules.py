@@ -0,0 +1,72 @@
+import logging
+import zlib
+
+DEFAULT_SCHEDULE = "daily"
+
+
+def parse_schedules(spec, run_hour, run_minute, groups=1, window_minutes=0):
+    """Zwraca listę harmonogramów {"name", "hour", "minute", "employees"}.
+
+    spec (SCHEDULES) ma postać "nazwa@GG:MM=id1,id2;nazwa2@GG:MM" - harmonogram bez listy ID
+    obejmuje wszystkich pracowników nieprzypisanych do innych. Bez spec zespół jest dzielony
+    na `groups` grup rozłożonych równo w oknie `window_minutes` od run_hour:run_minute.
+    """
+    schedules = []
+    for part in (spec or "").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            head, _, ids = part.partition("=")
+            name, _, at = head.partition("@")
+            hour, minute = (int(value) for value in at.split(":"))
+            employees = {user_id.strip() for user_id in ids.split(",") if user_id.strip()} or None
+            schedules.append({"name": name.strip(), "hour": hour, "minute": minute, "employees": employees})
+        except ValueError:
+            logging.error(f"❌ Nieprawidłowy harmonogram {part!r} (oczekiwano nazwa@GG:MM=id1,id2)")
+    catch_all = [schedule["name"] for schedule in schedules if schedule["employees"] is None]
+    if len(catch_all) > 1:
+        # Każdy z nich objąłby wszystkich nieprzypisanych - ci sami pracownicy byliby przetwarzani równolegle
+        logging.error(f"❌ Kilka harmonogramów bez listy ID ({', '.join(catch_all)}) - pomijam wszystkie poza {catch_all[0]!r}")
+        schedules = [s for s in schedules if s["employees"] is not None or s["name"] == catch_all[0]]
+    if schedules:
+        return schedules
+
+    groups = max(1, int(groups))
+    if groups == 1:
+        return [{"name": DEFAULT_SCHEDULE, "hour": run_hour, "minute": run_minute, "employees": None}]
+    step = window_minutes / groups
+    for index in range(groups):
+        start = run_hour * 60 + run_minute + int(index * step)
+        schedules.append({
+            "name": f"grupa-{index + 1}",
+            "hour": (start // 60) % 24,
+            "minute": start % 60,
+            "group": (index, groups),
+            # Przesunięcie względem pierwszej grupy - żeby grupa uruchomiona po północy liczyła ten sam "wczoraj"
+            "offset_minutes": int(index * step),
+            "employees": None
+        })
+    return schedules
+
+
+def employee_group(user_id, groups):
+    # Stały podział (niezależny od kolejności listy i restartów) - crc32, a nie hash(), który jest losowany per proces
+    return zlib.crc32(str(user_id).encode("utf-8")) % groups
+
+
+def select_employees(schedules, name, employees):
+    """Wybiera pracowników (lista krotek (id, nazwa, mnożnik)) obsługiwanych przez harmonogram `name`"""
+    schedule = next((s for s in schedules if s["name"] == name), None)
+    if schedule is None:
+        return []
+    if schedule.get("group"):
+        index, groups = schedule["group"]
+        return [e for e in employees if employee_group(e[0], groups) == index]
+    if schedule["employees"] is not None:
+        return [e for e in employees if str(e[0]) in schedule["employees"]]
+    assigned = set()
+    for other in schedules:
+        if other["employees"] is not None:
+            assigned |= other["employees"]
+    return [e for e in employees if str(e[0]) not in assigned]
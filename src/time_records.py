@@ -0,0 +1,159 @@
+import codecs
+import json
+
+
+class TimeRecord:
+    """Rekord czasu Everhour ograniczony do pól, których używamy.
+
+    Zajmuje ułamek pamięci słownika z odpowiedzi API (bez zagnieżdżonych obiektów zadania
+    i użytkownika), a get() działa jak dla słownika, więc reszta kodu nie musi rozróżniać typów.
+    Oryginalny rekord jest trzymany jako tekst JSON (raw) - backup musi zawierać wszystkie pola,
+    a tekst zajmuje kilka razy mniej niż rozpakowany słownik.
+    """
+
+    __slots__ = ("id", "time", "date", "user", "task_id", "task_name", "project_id", "project_name", "comment", "changed_at", "raw")
+
+    def __init__(self, id, time, date, user, task_id=None, task_name=None, project_id=None, project_name=None, comment=None, changed_at=None, raw=None):
+        self.id = id
+        self.time = time
+        self.date = date
+        self.user = user
+        self.task_id = task_id
+        self.task_name = task_name
+        self.project_id = project_id
+        self.project_name = project_name
+        self.comment = comment
+        self.changed_at = changed_at
+        self.raw = raw
+
+    @classmethod
+    def from_dict(cls, data, raw=None):
+        user = data.get('user')
+        task = data.get('task')
+        task_id = task_name = project_id = project_name = None
+        if isinstance(task, dict):
+            task_id = task.get('id')
+            task_name = task.get('name')
+            if isinstance(task.get('project'), dict):
+                project_name = task['project'].get('name')
+            projects = task.get('projects')
+            if projects and isinstance(projects, list):
+                project_id = projects[0]
+        elif task:
+            task_id = task
+        return cls(
+            data.get('id'),
+            data.get('time', 0),
+            data.get('date'),
+            user.get('id') if isinstance(user, dict) else user,
+            task_id,
+            task_name,
+            project_id,
+            project_name,
+            data.get('comment'),
+            data.get('updatedAt') or data.get('createdAt'),
+            raw
+        )
+
+    def task(self):
+        if self.task_id is None:
+            return None
+        task = {"id": self.task_id}
+        if self.task_name is not None:
+            task["name"] = self.task_name
+        if self.project_name is not None:
+            task["project"] = {"name": self.project_name}
+        if self.project_id is not None:
+            task["projects"] = [self.project_id]
+        return task
+
+    def get(self, key, default=None):
+        if key == "task":
+            value = self.task()
+        elif key in ("updatedAt", "createdAt"):
+            # Przechowujemy tylko znacznik ostatniej zmiany (updatedAt, a gdy go brak - createdAt)
+            value = self.changed_at
+        elif key in self.__slots__ and key != "raw":
+            value = getattr(self, key)
+        else:
+            value = None
+        return default if value is None else value
+
+    def to_dict(self):
+        """Zwraca oryginalny rekord z API (wszystkie pola), a gdy go nie ma - używane pola"""
+        if self.raw is not None:
+            return json.loads(self.raw)
+        data = {"id": self.id, "time": self.time, "date": self.date, "user": self.user}
+        task = self.task()
+        if task is not None:
+            data["task"] = task
+        if self.comment:
+            data["comment"] = self.comment
+        if self.changed_at:
+            data["updatedAt"] = self.changed_at
+        return data
+
+
+def to_dicts(records):
+    """Zamienia rekordy na słowniki (do zapisu w backupie i wysłania do dashboard)"""
+    return [record.to_dict() if isinstance(record, TimeRecord) else record for record in records]
+
+
+def iter_response_text(response, chunk_size=65536):
+    """Zwraca treść odpowiedzi (stream=True) kawałkami tekstu"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in response.iter_content(chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_json_array(chunks, with_text=False):
+    """Parsuje tablicę JSON przyrostowo - zwraca kolejne elementy bez wczytywania całej odpowiedzi.
+
+    with_text=True zwraca pary (element, jego tekst JSON z odpowiedzi).
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    started = False
+    finished = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Odpowiedź nie jest tablicą JSON")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                end = None
+            # Liczba ucięta na granicy kawałka (np. "2." z "2.5") też się parsuje - element uznajemy
+            # za kompletny dopiero, gdy po nim jest separator albo odpowiedź się skończyła
+            if end is not None and (finished or (end < len(buffer) and buffer[end] in " \t\r\n,]")):
+                yield (value, buffer[pos:end]) if with_text else value
+                pos = end
+                continue
+        if finished:
+            raise ValueError("Niekompletna tablica JSON w odpowiedzi")
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+        else:
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def iter_time_records(response, chunk_size=65536):
+    """Zwraca rekordy czasu z odpowiedzi strumieniowo, jako TimeRecord"""
+    try:
+        for data, text in iter_json_array(iter_response_text(response, chunk_size), with_text=True):
+            yield TimeRecord.from_dict(data, raw=text)
+    finally:
+        response.close()
@@ -0,0 +1,146 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseStore:
+    """Dzierżawy jednostek pracy (dzień, pracownik) we wspólnej bazie SQLite.
+
+    Replika przetwarza tylko jednostki, które udało jej się zająć. Dzierżawy są odnawiane w tle
+    (wątek działa tylko, dopóki replika ma niezakończone dzierżawy), a dzierżawa repliki,
+    która przestała działać, wygasa po ttl sekundach i może ją przejąć inna.
+    """
+
+    def __init__(self, path, owner=None, ttl=300):
+        self.path = path
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                date TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                done_at INTEGER,
+                PRIMARY KEY (date, user_id)
+            ) WITHOUT ROWID
+        """)
+        # Jednostki zajęte przez tę instancję i jeszcze nie zakończone ani zwolnione
+        self.active = set()
+        self.stopped = threading.Event()
+        self.heartbeat = None
+
+    def _ensure_heartbeat(self):
+        with self.lock:
+            if self.heartbeat is None and self.active and not self.stopped.is_set():
+                self.heartbeat = threading.Thread(target=self._renew_loop, name="lease-heartbeat", daemon=True)
+                self.heartbeat.start()
+
+    def _renew_loop(self):
+        while not self.stopped.wait(max(1.0, self.ttl / 3)):
+            with self.lock:
+                if not self.active:
+                    # Ostatnia dzierżawa zakończona - wątek kończy się, następne zajęcie uruchomi nowy
+                    self.heartbeat = None
+                    return
+            try:
+                self.renew()
+            except Exception as e:
+                logging.warning(f"⚠️  Nie udało się odnowić dzierżaw: {e}")
+
+    def claim(self, date, user_id):
+        """Zajmuje jednostkę pracy - zwraca False, jeśli jest zakończona albo ma ją inna replika"""
+        now = time.time()
+        with self.lock:
+            # BEGIN IMMEDIATE blokuje zapis od razu, więc sprawdzenie i zajęcie są atomowe między replikami
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT owner, expires_at, done_at FROM leases WHERE date = ? AND user_id = ?",
+                    (str(date), str(user_id))
+                ).fetchone()
+                if row is not None and (row[2] is not None or (row[0] != self.owner and row[1] > now)):
+                    self.conn.execute("COMMIT")
+                    return False
+                if row is not None and row[0] != self.owner:
+                    logging.info(f"♻️  Przejmuję wygasłą dzierżawę {date}/{user_id} od {row[0]}")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO leases (date, user_id, owner, expires_at, done_at) VALUES (?, ?, ?, ?, NULL)",
+                    (str(date), str(user_id), self.owner, now + self.ttl)
+                )
+                self.conn.execute("COMMIT")
+                self.active.add((str(date), str(user_id)))
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        self._ensure_heartbeat()
+        return True
+
+    def renew(self):
+        """Przedłuża wszystkie niezakończone dzierżawy tej repliki"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE owner = ? AND done_at IS NULL",
+                (time.time() + self.ttl, self.owner)
+            )
+        return cursor.rowcount
+
+    def complete(self, date, user_id):
+        """Oznacza jednostkę jako zakończoną - żadna replika nie przetworzy jej ponownie"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE leases SET done_at = ? WHERE date = ? AND user_id = ? AND owner = ?",
+                (int(time.time()), str(date), str(user_id), self.owner)
+            )
+            self.active.discard((str(date), str(user_id)))
+
+    def release(self, date, user_id):
+        """Zwalnia jednostkę bez oznaczania jej jako zakończonej (można ją zająć od razu)"""
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM leases WHERE date = ? AND user_id = ? AND owner = ? AND done_at IS NULL",
+                (str(date), str(user_id), self.owner)
+            )
+            self.active.discard((str(date), str(user_id)))
+
+    def reset(self, date, user_id):
+        """Usuwa dzierżawę niezależnie od właściciela i stanu - dzień można przetworzyć ponownie"""
+        with self.lock:
+            self.conn.execute("DELETE FROM leases WHERE date = ? AND user_id = ?", (str(date), str(user_id)))
+            self.active.discard((str(date), str(user_id)))
+
+    def expired_units(self):
+        """Zwraca (data, użytkownik) porzucone przez repliki, które przestały działać"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT date, user_id FROM leases WHERE done_at IS NULL AND expires_at < ? ORDER BY date",
+                (time.time(),)
+            ).fetchall()
+
+    def prune(self, before_date, before_time):
+        with self.lock:
+            cursor = self.conn.execute(
+                "DELETE FROM leases WHERE date < ? AND COALESCE(done_at, expires_at) < ?",
+                (str(before_date), before_time)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        """Zatrzymuje odnawianie i zamyka połączenie - niezakończone dzierżawy wygasną po ttl"""
+        self.stopped.set()
+        heartbeat = self.heartbeat
+        if heartbeat is not None:
+            heartbeat.join(timeout=5)
+        with self.lock:
+            self.conn.close()
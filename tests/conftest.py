@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Moduły aplikacji leżą płasko w src/ i importują się nawzajem po nazwie (jak przy python src/main.py)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+# Lokalny serwer udający Everhour i dashboard (ten sam co w testach wydajności)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+
+@pytest.fixture
+def everhour():
+    """Serwer udający Everhour - zwraca jego stan (rekordy, licznik zapytań)"""
+    from fake_server import FakeState, start_fake_server
+
+    state = FakeState()
+    server, state.base_url = start_fake_server(state)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def app(everhour, tmp_path, monkeypatch):
+    """Moduł main skierowany na serwer testowy, z bazami i katalogami w tmp_path"""
+    import http_client
+    import main
+
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_BASE", 0.001)
+    settings = {
+        "BASE_URL": everhour.base_url,
+        "EVERHOUR_RATE_LIMIT": 0,
+        "DASHBOARD_API_URL": None,
+        "DRY_RUN": False,
+        "UPDATE_STRATEGY": "auto",
+        "MAX_WORKERS": 1,
+        "BULK_FETCH": True,
+        "PLAN_VALIDATE": True,
+        "RESPONSE_CACHE_TTL": 0,
+        "RESPONSE_CACHE_DIR": str(tmp_path / "response_cache"),
+        "PROCESSED_DB": str(tmp_path / "processed_records.db"),
+        "LEGACY_PROCESSED_FILE": str(tmp_path / "processed_records.json"),
+        "BACKUP_DIR": str(tmp_path / "backups"),
+        "PLANS_DIR": str(tmp_path / "plans"),
+        "REPORTS_DIR": "",
+        "METADATA_CACHE_FILE": str(tmp_path / "metadata_cache.json"),
+        "_metadata_cache": None,
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(main, name, value)
+    return main
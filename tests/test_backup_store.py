@@ -0,0 +1,75 @@
+import pytest
+
+from backup_store import BackupStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BackupStore(str(tmp_path), run_id="test")
+    yield store
+    store.close()
+
+
+def record(record_id, time, **extra):
+    return dict({"id": record_id, "time": time, "date": "2024-01-15", "user": 7, "task": {"id": "ev:1"}}, **extra)
+
+
+def test_unchanged_records_are_not_written_again(store):
+    _, changed = store.add(7, "2024-01-15", [record(1, 900), record(2, 1800)])
+    assert changed == 2
+    _, changed = store.add(7, "2024-01-15", [record(1, 900), record(2, 2700)])
+    assert changed == 1
+
+    assert store.load(7, "2024-01-15") == [record(1, 900), record(2, 1800)]
+    assert store.load(7, "2024-01-15", latest=True) == [record(1, 900), record(2, 2700)]
+
+
+def test_load_originals_returns_earliest_version_and_segment_range(store):
+    first, _ = store.add(7, "2024-01-15", [record(1, 900), record(2, 1800, billable=True)])
+    # Po DELETE + POST rekord 1 ma nowe ID 3; backup przyrostowy obejmuje tylko część rekordów
+    second, _ = store.add(7, "2024-01-15", [record(3, 1350), record(2, 2700, billable=True)])
+    third, _ = store.add(7, "2024-01-15", [record(3, 1350)])
+    store.add(8, "2024-01-15", [record(4, 600)])
+
+    originals = {data["id"]: (data, first_segment, last_segment) for data, first_segment, last_segment in store.load_originals(7, "2024-01-15")}
+
+    assert originals == {
+        1: (record(1, 900), first, first),
+        2: (record(2, 1800, billable=True), first, second),
+        3: (record(3, 1350), second, third),
+    }
+
+
+def test_load_originals_without_backup_is_empty(store):
+    assert store.load_originals(7, "2024-01-15") == []
+    assert store.load(7, "2024-01-15") is None
+
+
+def test_units_lists_user_days_in_range(store):
+    store.add(7, "2024-01-14", [record(1, 900)])
+    store.add(7, "2024-01-15", [record(2, 900)])
+    store.add(8, "2024-01-15", [record(3, 900)])
+    store.add(8, "2024-01-16", [record(4, 900)])
+
+    assert store.units("2024-01-15", "2024-01-16") == [("7", "2024-01-15"), ("8", "2024-01-15"), ("8", "2024-01-16")]
+    assert store.units("2024-01-14", "2024-01-16", user_id=7) == [("7", "2024-01-14"), ("7", "2024-01-15")]
+
+
+def test_processes_sharing_directory_write_separate_files(tmp_path):
+    # Dwie repliki uruchomione w tej samej sekundzie na wspólnym wolumenie
+    first = BackupStore(str(tmp_path), owner="replica-a")
+    second = BackupStore(str(tmp_path), owner="replica/b")
+    try:
+        assert first.run_file != second.run_file
+        assert "/" not in second.run_file
+        first.add(7, "2024-01-15", [record(1, 900)])
+        second.add(8, "2024-01-15", [record(2, 1800)])
+        first.add(9, "2024-01-15", [record(3, 600)])
+
+        # Każda replika widzi backupy obu
+        assert second.load(7, "2024-01-15") == [record(1, 900)]
+        assert first.load(8, "2024-01-15") == [record(2, 1800)]
+        assert second.load(9, "2024-01-15") == [record(3, 600)]
+    finally:
+        first.close()
+        second.close()
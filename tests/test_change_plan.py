@@ -0,0 +1,44 @@
+import gzip
+import os
+
+import pytest
+
+from change_plan import count_actions, read_plan, write_plan
+
+ENTRIES = [
+    {"record_id": 1, "user_id": 7, "date": "2024-01-15", "original_time": 900, "new_time": 1350, "action": "update", "reason": None},
+    {"record_id": 2, "user_id": 7, "date": "2024-01-15", "original_time": 0, "new_time": 0, "action": "skip", "reason": "zero_time"},
+    {"record_id": 3, "user_id": 8, "date": "2024-01-15", "original_time": 600, "new_time": 600, "action": "skip", "reason": "zero_time", "comment": "ąę"},
+]
+
+
+@pytest.mark.parametrize("name", ["plan.jsonl", "plan.jsonl.gz"])
+def test_round_trip(tmp_path, name):
+    path = str(tmp_path / "plans" / name)
+
+    assert write_plan(path, {"id": "p1", "dates": ["2024-01-15"]}, ENTRIES) == path
+    header, entries = read_plan(path)
+
+    assert header == {"id": "p1", "dates": ["2024-01-15"], "version": 1, "entries": 3}
+    assert entries == ENTRIES
+    assert os.listdir(tmp_path / "plans") == [name]
+
+
+def test_gz_plan_is_compressed(tmp_path):
+    path = str(tmp_path / "plan.jsonl.gz")
+    write_plan(path, {"id": "p1"}, ENTRIES)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert len(f.readlines()) == 4
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    path = tmp_path / "plan.jsonl"
+    path.write_text('{"id": "p1", "version": 99}\n', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        read_plan(str(path))
+
+
+def test_count_actions():
+    assert count_actions(ENTRIES) == {"update": 1, "skip:zero_time": 2}
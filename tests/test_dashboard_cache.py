@@ -0,0 +1,50 @@
+import pytest
+import requests
+
+import http_client
+from dashboard_cache import DashboardCache
+
+UNREACHABLE = "http://127.0.0.1:9/api/employees"
+
+
+@pytest.fixture
+def http(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRIES", 0)
+    return http_client.HttpClient()
+
+
+@pytest.fixture
+def dashboard(everhour):
+    everhour.seed_team(2, 0, [])
+    return everhour
+
+
+def test_value_reused_within_ttl(http, dashboard, tmp_path):
+    cache = DashboardCache(http, {}, str(tmp_path / "dashboard.json"), ttl=60)
+    url = f"{dashboard.base_url}/api/employees"
+    value, changed = cache.get("employees", url)
+    assert [e["id"] for e in value] == [1, 2] and changed
+    assert cache.get("employees", url) == (value, False)
+    assert dashboard.requests["GET /api/employees"] == 1
+
+
+def test_revalidated_with_etag_after_ttl(http, dashboard, tmp_path):
+    cache = DashboardCache(http, {}, str(tmp_path / "dashboard.json"), ttl=0)
+    url = f"{dashboard.base_url}/api/employees"
+    value, _ = cache.get("employees", url)
+    assert cache.get("employees", url) == (value, False)
+    assert dashboard.requests["GET /api/employees"] == 2
+
+    dashboard.employees.append({"id": 3, "name": "User 3", "multiplier": 2.0, "active": True})
+    value, changed = cache.get("employees", url)
+    assert changed and len(value) == 3
+
+
+def test_snapshot_used_when_dashboard_unavailable(http, dashboard, tmp_path):
+    snapshot_file = str(tmp_path / "dashboard.json")
+    value, _ = DashboardCache(http, {}, snapshot_file, ttl=60).get("employees", f"{dashboard.base_url}/api/employees")
+
+    # Po restarcie dashboard nie odpowiada - zostaje ostatnia znana wartość
+    assert DashboardCache(http, {}, snapshot_file, ttl=60).get("employees", UNREACHABLE) == (value, False)
+    with pytest.raises(requests.exceptions.RequestException):
+        DashboardCache(http, {}, str(tmp_path / "empty.json"), ttl=60).get("employees", UNREACHABLE)
@@ -0,0 +1,86 @@
+import threading
+
+import requests
+
+from dashboard_reporter import DashboardReporter
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+
+class FakeDashboard:
+    """Zapamiętuje wysłane wpisy; status zwracany dla ścieżki można zmieniać w trakcie testu"""
+
+    def __init__(self):
+        self.statuses = {}
+        self.received = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def post(self, url, json=None, headers=None):
+        self.entered.set()
+        self.release.wait(5)
+        path = url.split("http://dashboard.test", 1)[1]
+        status = self.statuses.get(path, 200)
+        if status == 200:
+            self.received.append((path, json))
+        return FakeResponse(status)
+
+    def logs(self):
+        items = []
+        for path, body in self.received:
+            items.extend(body["logs"] if path == "/api/logs/batch" else [body])
+        return [item["message"] for item in items]
+
+
+def make_reporter(tmp_path, dashboard, **options):
+    return DashboardReporter("http://dashboard.test", "token", dashboard, str(tmp_path / "spool.jsonl"), flush_interval=60, **options)
+
+
+def test_failed_send_is_spooled_and_resent(tmp_path):
+    dashboard = FakeDashboard()
+    dashboard.statuses["/api/logs/batch"] = 503
+    reporter = make_reporter(tmp_path, dashboard)
+    reporter.submit("log", {"message": "a"})
+    assert reporter.flush(timeout=5)
+    assert (tmp_path / "spool.jsonl").exists()
+    assert dashboard.received == []
+
+    dashboard.statuses.clear()
+    reporter.submit("log", {"message": "b"})
+    assert reporter.flush(timeout=5)
+    assert dashboard.logs() == ["a", "b"]
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+def test_single_endpoints_used_without_batch_endpoint(tmp_path):
+    dashboard = FakeDashboard()
+    dashboard.statuses["/api/backups/batch"] = 404
+    reporter = make_reporter(tmp_path, dashboard)
+    reporter.submit("backup", {"user_id": 1, "date": "2024-01-15", "records": [{"id": 1}]})
+    assert reporter.flush(timeout=5)
+    assert dashboard.received == [("/api/backups", {"user_id": 1, "date": "2024-01-15", "data": '[{"id": 1}]'})]
+
+
+def test_entries_spooled_when_queue_is_full(tmp_path):
+    dashboard = FakeDashboard()
+    dashboard.release.clear()
+    reporter = make_reporter(tmp_path, dashboard, queue_size=1)
+    reporter.submit("log", {"message": "a"})
+    reporter.flush(wait=False)
+    # Wątek w tle wysyła "a" i czeka na dashboard - kolejka mieści jeszcze jeden wpis
+    assert dashboard.entered.wait(5)
+    reporter.submit("log", {"message": "b"})
+    reporter.submit("log", {"message": "c"})
+    assert (tmp_path / "spool.jsonl").exists()
+
+    dashboard.release.set()
+    assert reporter.flush(timeout=5)
+    assert sorted(dashboard.logs()) == ["a", "b", "c"]
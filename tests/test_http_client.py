@@ -0,0 +1,91 @@
+import email.utils
+import time
+
+import pytest
+
+import http_client
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Zwraca kolejne odpowiedzi z listy i zapamiętuje wysłane metody"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.methods = []
+
+    def request(self, method, url, **kwargs):
+        self.methods.append(method)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(http_client.time, "sleep", slept.append)
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_BASE", 0.001)
+    return slept
+
+
+def client_with(*responses):
+    client = http_client.HttpClient()
+    client.session = FakeSession(responses)
+    return client
+
+
+def test_idempotent_request_retried_after_server_error(sleeps):
+    client = client_with(FakeResponse(503), FakeResponse(200))
+    response = client.get("http://everhour.test/team/time")
+    assert response.status_code == 200
+    assert response.attempts == 2
+
+
+def test_post_not_retried_after_server_error(sleeps):
+    client = client_with(FakeResponse(503), FakeResponse(201))
+    response = client.post("http://everhour.test/tasks/ev:1/time")
+    assert response.status_code == 503
+    assert client.session.methods == ["POST"]
+    assert sleeps == []
+
+
+def test_post_retried_after_429(sleeps):
+    client = client_with(FakeResponse(429, {"Retry-After": "2"}), FakeResponse(201))
+    assert client.post("http://everhour.test/tasks/ev:1/time").status_code == 201
+    assert sleeps == [2.0]
+
+
+def test_retry_after_longer_than_backoff_max_is_honoured(sleeps):
+    client = client_with(FakeResponse(429, {"Retry-After": "120"}), FakeResponse(200))
+    assert client.get("http://everhour.test/team/time").status_code == 200
+    assert sleeps == [120.0]
+
+
+def test_retry_after_as_http_date(sleeps):
+    retry_at = email.utils.formatdate(time.time() + 300, usegmt=True)
+    client = client_with(FakeResponse(503, {"Retry-After": retry_at}), FakeResponse(200))
+    assert client.get("http://everhour.test/team/time").status_code == 200
+    assert 290 < sleeps[0] <= 300
+
+
+def test_retry_after_above_limit_fails_without_retrying(sleeps, caplog):
+    client = client_with(FakeResponse(429, {"Retry-After": "3600"}), FakeResponse(200))
+    response = client.get("http://everhour.test/team/time")
+    assert response.status_code == 429
+    assert response.attempts == 1
+    assert sleeps == []
+    assert "HTTP_RETRY_AFTER_MAX" in caplog.text
+
+
+def test_attempts_counted_for_retried_delete(sleeps):
+    client = client_with(FakeResponse(502), FakeResponse(404))
+    response = client.delete("http://everhour.test/time/1")
+    assert response.status_code == 404
+    assert response.attempts == 2
@@ -0,0 +1,44 @@
+import time
+from datetime import date
+
+DAY = date(2024, 1, 15)
+EMPLOYEES = [(1, "User 1", 1.5)]
+
+
+def touch(everhour, record_id, seconds_later, **changes):
+    """Zmienia rekord tak jak Everhour - z późniejszym updatedAt"""
+    everhour.records[record_id].update(changes, updatedAt=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() + seconds_later)))
+
+
+def run(app):
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        return multiplier.run_incremental_update(EMPLOYEES, today=DAY)
+
+
+def test_unchanged_records_and_own_writes_skipped(app, everhour):
+    everhour.seed_team(1, 2, [DAY])
+    assert len(run(app)) == 1
+    assert everhour.records[1]["time"] == 1350 and everhour.records[2]["time"] == 2700
+    writes = everhour.requests["PUT /time/{id}"]
+
+    assert run(app) == []
+    # Nasz PUT przesunął updatedAt - rekord nie jest traktowany jak zmieniony przez pracownika
+    touch(everhour, 1, 60)
+    assert run(app) == []
+    assert everhour.requests["PUT /time/{id}"] == writes
+    assert everhour.records[1]["time"] == 1350
+
+
+def test_edited_record_gets_only_the_added_time_multiplied(app, everhour):
+    everhour.seed_team(1, 2, [DAY])
+    run(app)
+
+    # Pracownik dopisał 10 minut do pierwszego rekordu
+    touch(everhour, 1, 60, time=1950)
+    run(app)
+    assert everhour.records[1]["time"] == 1950 + 300
+    assert everhour.records[2]["time"] == 2700
+
+    # Kolejne sprawdzenie niczego już nie zmienia
+    assert run(app) == []
+    assert everhour.records[1]["time"] == 2250
@@ -0,0 +1,37 @@
+import logging
+import re
+from datetime import date
+
+from log_config import RECORD_LOG, USER_LOG, LogSampler, UnitLogAdapter
+
+DAY = date(2024, 1, 15)
+
+
+def test_adapter_prefixes_user_and_date(caplog):
+    log = UnitLogAdapter(RECORD_LOG, {"user_id": 7, "date": "2024-01-15"})
+    with caplog.at_level(logging.INFO, logger=RECORD_LOG.name):
+        log.info("rekord %s: %.2fh", 12, 1.5)
+
+    assert caplog.records[0].getMessage() == "[7 2024-01-15] rekord 12: 1.50h"
+
+
+def test_sampler_passes_every_nth_line():
+    sampler = LogSampler(3)
+    assert [sampler.sample() for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert all(LogSampler(1).sample() for _ in range(5))
+
+
+def test_concurrent_users_lines_carry_user_and_single_summary(app, everhour, monkeypatch, caplog):
+    everhour.seed_team(3, 2, [DAY])
+    monkeypatch.setattr(app, "MAX_WORKERS", 3)
+    with caplog.at_level(logging.INFO):
+        with app.EverhourTimeMultiplier("test") as multiplier:
+            multiplier.run_daily_update(DAY, [(user_id, f"User {user_id}", 1.5) for user_id in (1, 2, 3)])
+
+    record_lines = [r.getMessage() for r in caplog.records if r.name == RECORD_LOG.name]
+    assert len(record_lines) == 3 * 2 * 3
+    assert all(re.match(r"\[[123] 2024-01-15\] ", line) for line in record_lines)
+
+    summaries = [r.getMessage() for r in caplog.records if r.name == USER_LOG.name and "PODSUMOWANIE" in r.getMessage()]
+    assert sorted(summary.split("]")[0] for summary in summaries) == ["[1 2024-01-15", "[2 2024-01-15", "[3 2024-01-15"]
+    assert all("Przetworzonych rekordów: 2" in summary and "Różnica: +0.38h" in summary for summary in summaries)
@@ -0,0 +1,87 @@
+import os
+from datetime import date
+
+import pytest
+
+DAY = date(2024, 1, 15)
+EMPLOYEES = [(1, "User 1", 1.5)]
+
+
+def times(everhour):
+    return sorted(record["time"] for record in everhour.records.values())
+
+
+def test_dry_run_plan_applied_and_restored(app, everhour, monkeypatch):
+    everhour.seed_team(1, 2, [DAY])
+    monkeypatch.setattr(app, "DRY_RUN", True)
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.run_daily_update(DAY, EMPLOYEES)
+    plan_file = os.path.join(app.PLANS_DIR, "dry_run_2024-01-15.jsonl")
+    assert os.path.exists(plan_file)
+    assert times(everhour) == [900, 1800]
+
+    monkeypatch.setattr(app, "DRY_RUN", False)
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        results = multiplier.apply_plan(plan_file)
+    assert [ok for ok, _ in results] == [True]
+    assert times(everhour) == [1350, 2700]
+
+    # Plan z DRY RUN nie robił backupu - robi go wykonanie planu, więc zmiany można cofnąć
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        results = multiplier.run_restore(DAY, DAY)
+    assert results is not None and all(ok for ok, _ in results)
+    assert times(everhour) == [900, 1800]
+
+
+def test_apply_skips_records_changed_since_plan(app, everhour, tmp_path):
+    everhour.seed_team(1, 2, [DAY])
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        plan_file = multiplier.create_plan(DAY, EMPLOYEES, str(tmp_path / "plan.jsonl.gz"))
+    # Pracownik zmienia drugi rekord między planem a wykonaniem
+    everhour.records[2]["time"] = 2000
+
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        results = multiplier.apply_plan(plan_file)
+    summary = results[0][1]
+    assert summary["processed"] == 1
+    assert everhour.records[1]["time"] == 1350
+    assert everhour.records[2]["time"] == 2000
+
+    # Ponowne wykonanie tego samego planu niczego nie zmienia
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        results = multiplier.apply_plan(plan_file)
+    assert results[0][1]["processed"] == 0
+    assert everhour.records[1]["time"] == 1350
+
+
+def test_apply_without_validation_still_backs_up(app, everhour, monkeypatch, tmp_path):
+    everhour.seed_team(1, 1, [DAY])
+    monkeypatch.setattr(app, "BACKUP_DIR", str(tmp_path / "plan_backups"))
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        plan_file = multiplier.create_plan(DAY, EMPLOYEES)
+
+    monkeypatch.setattr(app, "PLAN_VALIDATE", False)
+    monkeypatch.setattr(app, "BACKUP_DIR", str(tmp_path / "apply_backups"))
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.apply_plan(plan_file)
+        assert multiplier.backup_store.load(1, "2024-01-15")[0]["time"] == 900
+    assert times(everhour) == [1350]
+
+
+@pytest.mark.parametrize("strategy", ["in_place", "replace"])
+def test_restore_keeps_time_added_by_employee_after_processing(app, everhour, monkeypatch, strategy):
+    monkeypatch.setattr(app, "UPDATE_STRATEGY", strategy)
+    everhour.seed_team(1, 1, [DAY])
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.run_daily_update(DAY, EMPLOYEES)
+    assert times(everhour) == [1350]
+
+    # Pracownik dopisał 10 minut, ponowne uruchomienie mnoży tylko dopisany czas
+    next(iter(everhour.records.values()))["time"] = 1950
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.run_daily_update(DAY, EMPLOYEES)
+    assert times(everhour) == [2250]
+
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.run_restore(DAY, DAY)
+    assert times(everhour) == [1500]
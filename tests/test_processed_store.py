@@ -0,0 +1,122 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from processed_store import ProcessedStore
+
+TODAY = str(date.today())
+OLD_DATE = str(date.today() - timedelta(days=400))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "processed.db")
+
+
+@pytest.fixture
+def store(path):
+    store = ProcessedStore(path)
+    yield store
+    store.close()
+
+
+def test_added_record_is_processed_with_written_time(store):
+    assert not store.contains_record(TODAY, 1)
+    store.add_record(TODAY, 7, 1, written_time=2700)
+
+    assert store.contains_record(TODAY, 1)
+    assert store.get_written_time(TODAY, 1) == 2700
+    assert store.get_written_time(TODAY, 2) is None
+    assert store.count() == 1
+
+
+def test_replacement_chain(store):
+    store.add_record(TODAY, 7, "A", new_record_id="B", written_time=1350)
+    # Rekord B edytowany później i ponownie zastąpiony przez C
+    store.add_record(TODAY, 7, "B", new_record_id="C", written_time=2000)
+
+    assert all(store.contains_record(TODAY, key) for key in ("A", "B", "C"))
+    assert store.get_replacement("A") == "C"
+    assert store.get_replacement("B") == "C"
+    assert store.get_replacement("C") is None
+    assert store.get_written_time(TODAY, "A") is None
+    assert store.get_written_time(TODAY, "B") is None
+    assert store.get_written_time(TODAY, "C") == 2000
+    assert store.count() == 1
+
+
+def test_legacy_key_only_for_days_processed_before_record_ids(store):
+    store.conn.execute(
+        "INSERT INTO processed_records (date, user_id, task_id, processed_at) VALUES (?, ?, ?, ?)",
+        ("2024-01-15", "7", "ev:1", int(time.time()))
+    )
+
+    assert store.contains("2024-01-15", 7, "ev:1")
+    assert not store.contains("2024-01-15", 7, "ev:2")
+    assert not store.contains("2024-01-16", 7, "ev:1")
+
+
+def test_old_records_are_found_in_database(path):
+    writer = ProcessedStore(path)
+    writer.add_record(OLD_DATE, 7, 1, written_time=900)
+    writer.close()
+
+    for history_filter in (False, True):
+        store = ProcessedStore(path, window_days=35, history_filter=history_filter)
+        assert store.contains_record(OLD_DATE, 1)
+        assert not store.contains_record(OLD_DATE, 2)
+        assert store.get_written_time(OLD_DATE, 1) == 900
+        assert "1" not in store.recent
+        store.close()
+
+
+def test_records_added_by_other_process_are_visible_after_refresh(path, store):
+    assert not store.contains_record(TODAY, 1)
+    other = ProcessedStore(path)
+    other.add_record(TODAY, 7, 1, written_time=900)
+    other.close()
+
+    assert not store.contains_record(TODAY, 1)
+    store.refresh()
+    assert store.contains_record(TODAY, 1)
+
+
+def test_remove_forgets_day_and_user(store):
+    store.add_record(TODAY, 7, 1)
+    store.add_record(TODAY, 8, 2)
+    store.mark_checkpoint("daily", TODAY, 7)
+
+    store.remove(TODAY, 7)
+
+    assert not store.contains_record(TODAY, 1)
+    assert store.contains_record(TODAY, 2)
+    assert store.get_checkpoints("daily", TODAY, TODAY) == set()
+
+
+def test_prune_keeps_old_days_written_recently(store):
+    store.add_record(OLD_DATE, 7, 1)
+    store.add_record(OLD_DATE, 7, 2)
+    store.conn.execute("UPDATE processed_ids SET processed_at = 0 WHERE record_id = '1'")
+
+    assert store.prune(TODAY, time.time() - 60) == 1
+    assert store.conn.execute("SELECT record_id FROM processed_ids").fetchall() == [("2",)]
+
+
+def test_added_time_accumulates_over_writes_and_replacements(store):
+    store.add_record(TODAY, 7, "A", written_time=1350, original_time=900)
+    assert store.get_added_time(TODAY, 7, "A") == 450
+
+    # Pracownik dopisał 600s, ponowny zapis zastąpił rekord nowym (DELETE + POST)
+    store.add_record(TODAY, 7, "A", new_record_id="B", written_time=2250, original_time=1950)
+    assert store.get_added_time(TODAY, 7, "B") == 750
+    assert store.get_added_time(TODAY, 7, "A") is None
+
+    # Rekord tego dnia, którego nic nie zmieniało, i dzień nieznany indeksowi
+    assert store.get_added_time(TODAY, 7, "X") == 0
+    assert store.get_added_time(TODAY, 8, "Y") is None
+
+
+def test_added_time_unknown_without_previous_time(store):
+    store.add_record(TODAY, 7, 1, written_time=1350)
+    assert store.get_added_time(TODAY, 7, 1) is None
@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+DAY = date(2024, 1, 15)
+EMPLOYEES = [(1, "User 1", 1.5)]
+
+
+def times(everhour):
+    return sorted(record["time"] for record in everhour.records.values())
+
+
+@pytest.fixture
+def cached_app(app, monkeypatch):
+    monkeypatch.setattr(app, "RESPONSE_CACHE_TTL", 600)
+    return app
+
+
+def run(app, monkeypatch, dry_run):
+    monkeypatch.setattr(app, "DRY_RUN", dry_run)
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.run_daily_update(DAY, EMPLOYEES)
+
+
+def test_real_run_reuses_records_confirmed_by_server(cached_app, everhour, monkeypatch):
+    everhour.seed_team(1, 2, [DAY])
+    run(cached_app, monkeypatch, dry_run=True)
+    run(cached_app, monkeypatch, dry_run=False)
+    assert everhour.not_modified == 1
+    assert times(everhour) == [1350, 2700]
+
+
+def test_real_run_fetches_records_changed_after_dry_run(cached_app, everhour, monkeypatch):
+    everhour.seed_team(1, 2, [DAY])
+    run(cached_app, monkeypatch, dry_run=True)
+    everhour.records[2]["time"] = 2000
+    run(cached_app, monkeypatch, dry_run=False)
+    assert everhour.not_modified == 0
+    assert times(everhour) == [1350, 3000]
+
+
+def test_plan_backs_up_current_state_not_cached_snapshot(cached_app, everhour, monkeypatch):
+    everhour.seed_team(1, 1, [DAY])
+    run(cached_app, monkeypatch, dry_run=True)
+    everhour.records[1]["time"] = 1200
+    monkeypatch.setattr(cached_app, "DRY_RUN", False)
+    with cached_app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.create_plan(DAY, EMPLOYEES)
+        assert multiplier.backup_store.load(1, "2024-01-15")[0]["time"] == 1200
+
+
+def test_unvalidated_entry_used_only_by_dry_runs(cached_app, everhour, monkeypatch):
+    everhour.etags = False
+    everhour.seed_team(1, 1, [DAY])
+    run(cached_app, monkeypatch, dry_run=True)
+    run(cached_app, monkeypatch, dry_run=True)
+    assert everhour.requests["GET /team/time"] == 1
+
+    everhour.records[1]["time"] = 1200
+    run(cached_app, monkeypatch, dry_run=False)
+    assert everhour.requests["GET /team/time"] == 2
+    assert times(everhour) == [1800]
@@ -0,0 +1,118 @@
+from rollback import diff_records
+
+
+def record(record_id, time, task="ev:1", comment=None, user=7, date="2024-01-15"):
+    data = {"id": record_id, "time": time, "date": date, "user": user, "task": {"id": task}}
+    if comment:
+        data["comment"] = comment
+    return data
+
+
+def by_source(entries):
+    return {entry["source_record_id"]: entry for entry in entries}
+
+
+def test_unchanged_record_is_skipped_and_multiplied_one_restored():
+    originals = [(record(1, 900), 1, 2), (record(2, 1800, task="ev:2"), 1, 2)]
+    current = [record(1, 900), record(2, 2700, task="ev:2")]
+
+    entries = by_source(diff_records(originals, current))
+
+    assert entries[1]["action"] == "skip"
+    assert entries[1]["reason"] == "unchanged"
+    assert entries[2]["action"] == "restore"
+    assert entries[2]["record_id"] == 2
+    assert (entries[2]["original_time"], entries[2]["new_time"]) == (2700, 1800)
+
+
+def test_replace_chain_is_restored_from_first_record():
+    # A (900) -> DELETE + POST -> B (1350) -> ponownie -> C (2025); w Everhour został tylko C
+    originals = [(record("A", 900), 1, 1), (record("B", 1350), 2, 2), (record("C", 2025), 3, 3)]
+    current = [record("C", 2025)]
+    replacements = {"A": "B", "B": "C"}
+
+    def get_replacement(record_id):
+        current_id = None
+        while record_id in replacements:
+            current_id = record_id = replacements[record_id]
+        return current_id
+
+    entries = diff_records(originals, current, get_replacement)
+
+    assert len(entries) == 1
+    assert entries[0]["source_record_id"] == "A"
+    assert entries[0]["record_id"] == "C"
+    assert (entries[0]["original_time"], entries[0]["new_time"]) == (2025, 900)
+    assert entries[0]["action"] == "restore"
+
+
+def test_replace_chain_without_index_matches_by_task_and_comment():
+    originals = [(record("A", 900, comment="x"), 1, 1), (record("B", 1350, comment="x"), 2, 2)]
+    current = [record("C", 2025, comment="x"), record("D", 600, comment="inny")]
+
+    entries = diff_records(originals, current)
+
+    assert [(entry["source_record_id"], entry["record_id"], entry["new_time"]) for entry in entries] == [("A", "C", 900)]
+
+
+def test_replacement_seen_before_original_disappeared_is_not_used():
+    # Rekord o tym samym zadaniu, który istniał już razem z oryginałem, to inny wpis pracownika
+    originals = [(record("A", 900), 1, 1), (record("E", 3600), 1, 2)]
+    current = [record("E", 3600)]
+
+    entries = by_source(diff_records(originals, current))
+
+    assert entries["A"]["action"] == "skip"
+    assert entries["A"]["reason"] == "missing"
+    assert entries["E"]["reason"] == "unchanged"
+
+
+def test_missing_record_is_reported_and_not_recreated():
+    originals = [(record(5, 1200, task="ev:9"), 1, 1)]
+
+    entries = diff_records(originals, [])
+
+    assert entries == [{
+        "record_id": None,
+        "source_record_id": 5,
+        "user_id": 7,
+        "date": "2024-01-15",
+        "task_id": "ev:9",
+        "original_time": 0,
+        "new_time": 1200,
+        "action": "skip",
+        "reason": "missing"
+    }]
+
+
+def test_only_time_added_by_writes_is_subtracted():
+    # 900 -> pomnożony do 1350, pracownik dopisał 600 (1950), ponowne uruchomienie zapisało 2250
+    originals = [(record(1, 900), 1, 2), (record(2, 1800, task="ev:2"), 1, 2), (record(3, 600, task="ev:3"), 1, 2)]
+    current = [record(1, 2250), record(2, 2700, task="ev:2"), record(3, 1200, task="ev:3")]
+    # Rekord 3 nigdy nie był zapisywany - zmienił go tylko pracownik
+    added = {"1": 750, "2": 900, "3": 0}
+
+    entries = by_source(diff_records(originals, current, get_added_time=lambda record_id: added[str(record_id)]))
+
+    assert (entries[1]["action"], entries[1]["new_time"], entries[1]["kept_time"]) == ("restore", 1500, 600)
+    assert (entries[2]["action"], entries[2]["new_time"]) == ("restore", 1800)
+    assert "kept_time" not in entries[2]
+    assert (entries[3]["action"], entries[3]["reason"], entries[3]["new_time"]) == ("skip", "unchanged", 1200)
+
+
+def test_time_reduced_below_added_time_is_not_changed():
+    originals = [(record(1, 900), 1, 1)]
+    current = [record(1, 300)]
+
+    entries = diff_records(originals, current, get_added_time=lambda record_id: 450)
+
+    assert (entries[0]["action"], entries[0]["reason"]) == ("skip", "edited")
+
+
+def test_unknown_write_history_restores_oldest_backup():
+    originals = [(record(1, 900), 1, 1)]
+    current = [record(1, 1350)]
+
+    entries = diff_records(originals, current, get_added_time=lambda record_id: None)
+
+    assert (entries[0]["action"], entries[0]["new_time"]) == ("restore", 900)
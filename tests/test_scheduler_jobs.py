@@ -0,0 +1,28 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+import main
+from sqlite_jobstore import SQLiteJobStore
+
+
+def store_jobs(path, job_ids):
+    """Zapisuje zadania w magazynie tak jak poprzednie uruchomienie aplikacji"""
+    scheduler = BackgroundScheduler(timezone="Europe/Warsaw", jobstores={"default": SQLiteJobStore(path)})
+    for job_id in job_ids:
+        scheduler.add_job(main.scheduled_job, CronTrigger(hour=6, timezone=scheduler.timezone), args=[job_id], id=job_id)
+    scheduler.start(paused=True)
+    scheduler.shutdown(wait=False)
+
+
+def test_jobs_missing_from_config_are_removed(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store_jobs(path, ["time_update_rano", "time_update_wieczor", "incremental_time_update"])
+
+    jobstore = SQLiteJobStore(path)
+    main.remove_stale_scheduler_jobs(jobstore, {"time_update_rano"})
+
+    assert [job.id for job in jobstore.get_all_jobs()] == ["time_update_rano"]
+
+
+def test_without_jobstore_nothing_happens():
+    main.remove_stale_scheduler_jobs(None, set())
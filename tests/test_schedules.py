@@ -0,0 +1,21 @@
+from schedules import parse_schedules
+
+
+def test_explicit_schedules_with_one_catch_all():
+    schedules = parse_schedules("rano@6:30=1, 2;reszta@7:00", 1, 0)
+
+    assert schedules == [
+        {"name": "rano", "hour": 6, "minute": 30, "employees": {"1", "2"}},
+        {"name": "reszta", "hour": 7, "minute": 0, "employees": None},
+    ]
+
+
+def test_only_first_catch_all_schedule_is_kept(caplog):
+    schedules = parse_schedules("a@6:00;b@7:00=5;c@8:00", 1, 0)
+
+    assert [schedule["name"] for schedule in schedules] == ["a", "b"]
+    assert "bez listy ID" in caplog.text
+
+
+def test_invalid_entry_is_skipped():
+    assert [schedule["name"] for schedule in parse_schedules("zly@6;dobry@7:15", 1, 0)] == ["dobry"]
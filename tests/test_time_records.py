@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from time_records import TimeRecord, iter_json_array
+
+RECORDS = [
+    {"id": 1, "time": 2.5, "date": "2024-01-15", "user": {"id": 7}, "task": {"id": "ev:1", "name": "Zadanie", "projects": ["ev:9"]}},
+    {"id": 22, "time": 3600, "date": "2024-01-15", "user": 7, "task": "ev:2", "comment": "ąę \"cytat\" , ]"},
+    {"id": 333, "time": 1e3, "date": "2024-01-15", "user": 7, "task": None, "billable": True},
+]
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", range(1, 12))
+def test_numbers_and_strings_cut_at_chunk_boundaries(size):
+    text = json.dumps(RECORDS, indent=1)
+    assert list(iter_json_array(chunked(text, size))) == RECORDS
+
+
+def test_number_at_end_of_last_chunk():
+    assert list(iter_json_array(["[1, 2", "5", "]"])) == [1, 25]
+    assert list(iter_json_array(["[12.", "5]"])) == [12.5]
+
+
+def test_with_text_returns_exact_source_of_each_element():
+    text = '[ {"id": 1, "x": [1, 2]} ,{"id":2}]'
+    assert list(iter_json_array(chunked(text, 3), with_text=True)) == [
+        ({"id": 1, "x": [1, 2]}, '{"id": 1, "x": [1, 2]}'),
+        ({"id": 2}, '{"id":2}'),
+    ]
+
+
+def test_empty_array():
+    assert list(iter_json_array(["[", " ", "]"])) == []
+
+
+def test_truncated_response_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array(['[{"id": 1}, {"id"']))
+
+
+def test_not_an_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array(['{"error": "x"}']))
+
+
+def test_time_record_keeps_used_fields_and_full_record():
+    raw = json.dumps(RECORDS[0])
+    record = TimeRecord.from_dict(RECORDS[0], raw=raw)
+
+    assert record.get("user") == 7
+    assert record.get("task") == {"id": "ev:1", "name": "Zadanie", "projects": ["ev:9"]}
+    assert record.get("raw") is None
+    assert record.to_dict() == RECORDS[0]
+
+
+def test_time_record_without_raw_returns_used_fields():
+    record = TimeRecord.from_dict(dict(RECORDS[2], updatedAt="2024-01-15 10:00:00"))
+
+    assert record.to_dict() == {"id": 333, "time": 1e3, "date": "2024-01-15", "user": 7, "updatedAt": "2024-01-15 10:00:00"}
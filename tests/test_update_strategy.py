@@ -0,0 +1,42 @@
+from datetime import date
+
+DAY = date(2024, 1, 15)
+EMPLOYEES = [(1, "User 1", 1.5)]
+
+
+def times(everhour):
+    return sorted(record["time"] for record in everhour.records.values())
+
+
+def test_auto_switches_to_replace_when_put_not_supported(app, everhour):
+    everhour.put_supported = False
+    everhour.seed_team(1, 2, [DAY])
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.run_daily_update(DAY, EMPLOYEES)
+        assert multiplier.in_place_supported is False
+    assert times(everhour) == [1350, 2700]
+    assert 1 not in everhour.records and 2 not in everhour.records
+    # PUT sprawdzony raz - kolejne rekordy od razu przez DELETE + POST
+    assert everhour.requests["PUT /time/{id}"] == 1
+    assert everhour.requests["DELETE /time/{id}"] == 2
+
+
+def test_in_place_never_deletes_records(app, everhour, monkeypatch):
+    monkeypatch.setattr(app, "UPDATE_STRATEGY", "in_place")
+    everhour.put_supported = False
+    everhour.seed_team(1, 2, [DAY])
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        multiplier.run_daily_update(DAY, EMPLOYEES)
+    assert times(everhour) == [900, 1800]
+    assert sorted(everhour.records) == [1, 2]
+    assert "DELETE /time/{id}" not in everhour.requests
+
+
+def test_missing_record_does_not_switch_strategy(app, everhour):
+    everhour.seed_team(1, 1, [DAY])
+    record = dict(everhour.records[1], id=99)
+    with app.EverhourTimeMultiplier("test") as multiplier:
+        assert multiplier.update_time_record(99, 1350, record, 1.5) is None
+        assert multiplier.in_place_supported is None
+    assert "DELETE /time/{id}" not in everhour.requests
+    assert times(everhour) == [900]
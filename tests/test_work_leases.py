@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from work_leases import LeaseStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "leases.db")
+
+
+@pytest.fixture
+def stores(path):
+    opened = []
+
+    def open_store(owner, ttl=300):
+        store = LeaseStore(path, owner=owner, ttl=ttl)
+        opened.append(store)
+        return store
+
+    yield open_store
+    for store in opened:
+        store.close()
+
+
+def test_claim_blocks_other_owner_until_released(stores):
+    first, second = stores("a"), stores("b")
+
+    assert first.claim("2024-01-15", 7)
+    assert first.claim("2024-01-15", 7)
+    assert not second.claim("2024-01-15", 7)
+    assert second.claim("2024-01-15", 8)
+
+    first.release("2024-01-15", 7)
+    assert second.claim("2024-01-15", 7)
+
+
+def test_expired_lease_is_taken_over(stores):
+    first, second = stores("a"), stores("b")
+    assert first.claim("2024-01-15", 7)
+    first.conn.execute("UPDATE leases SET expires_at = ?", (time.time() - 1,))
+
+    assert second.expired_units() == [("2024-01-15", "7")]
+    assert second.claim("2024-01-15", 7)
+    assert not first.claim("2024-01-15", 7)
+    # Odnowienie przez poprzedniego właściciela nie odbiera przejętej dzierżawy
+    assert first.renew() == 0
+
+
+def test_completed_unit_is_never_claimed_again(stores):
+    first, second = stores("a"), stores("b")
+    assert first.claim("2024-01-15", 7)
+    first.complete("2024-01-15", 7)
+    first.conn.execute("UPDATE leases SET expires_at = ?", (time.time() - 1,))
+
+    assert not first.claim("2024-01-15", 7)
+    assert not second.claim("2024-01-15", 7)
+    assert second.expired_units() == []
+
+    second.reset("2024-01-15", 7)
+    assert second.claim("2024-01-15", 7)
+
+
+def test_heartbeat_stops_after_last_lease_and_on_close(stores):
+    store = stores("a", ttl=0.1)
+    assert store.claim("2024-01-15", 7)
+    heartbeat = store.heartbeat
+    assert heartbeat is not None and heartbeat.is_alive()
+
+    store.complete("2024-01-15", 7)
+    heartbeat.join(timeout=5)
+    assert not heartbeat.is_alive()
+    assert store.heartbeat is None
+
+    assert store.claim("2024-01-15", 8)
+    heartbeat = store.heartbeat
+    store.close()
+    assert not heartbeat.is_alive()
+
+
+def test_prune_keeps_recently_finished_old_days(stores):
+    store = stores("a")
+    store.claim("2024-01-01", 7)
+    store.complete("2024-01-01", 7)
+    store.claim("2024-01-02", 7)
+    store.complete("2024-01-02", 7)
+    store.conn.execute("UPDATE leases SET done_at = 0 WHERE date = '2024-01-01'")
+
+    assert store.prune("2024-02-01", time.time() - 60) == 1
+    assert not store.claim("2024-01-02", 7)
+    assert store.claim("2024-01-01", 7)